@@ -0,0 +1,83 @@
+"""Incremental copy of static source trees (src/, public/images/) into dist/.
+
+Each synced file's source size and mtime are recorded in a manifest. A file is
+only copied again when those change or its output disappeared, and outputs
+whose source was deleted are pruned. Binary assets are hard-linked when the
+filesystem allows it; everything else goes through shutil.copy2, which uses
+the kernel's copy fast path (sendfile / copy_file_range) where available.
+"""
+import json
+import os
+import shutil
+from pathlib import Path
+
+# Files that later build stages rewrite (minify, fingerprint) are copied, never
+# hard-linked, so those rewrites can't reach back into the source tree.
+COPY_EXTENSIONS = {".html", ".css", ".js", ".json", ".xml", ".txt", ".svg", ".md"}
+COMPRESSED_SUFFIXES = (".gz", ".br")
+
+
+def load_manifest(path):
+    try:
+        return json.loads(Path(path).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def place(src, dst):
+    """Hard-link or copy src to dst; returns 'linked' or 'copied'."""
+    if dst.exists() or dst.is_symlink():
+        dst.unlink()
+    if src.suffix.lower() not in COPY_EXTENSIONS:
+        try:
+            os.link(src, dst)
+            return "linked"
+        except OSError:
+            pass
+    shutil.copy2(src, dst)
+    return "copied"
+
+
+def sync_trees(pairs, dst_root, manifest_path):
+    """Mirror each (src_dir, dst_subdir) pair into dst_root.
+
+    dst_subdir is relative to dst_root ("" for the root itself). Returns a
+    dict of counts: copied, linked, unchanged, removed.
+    """
+    dst_root = Path(dst_root)
+    previous = load_manifest(manifest_path)
+    current = {}
+    counts = {"copied": 0, "linked": 0, "unchanged": 0, "removed": 0}
+
+    for src_dir, dst_sub in pairs:
+        src_dir = Path(src_dir)
+        if not src_dir.exists():
+            continue
+        for root, _dirs, files in os.walk(src_dir):
+            for name in sorted(files):
+                src = Path(root) / name
+                st = src.stat()
+                rel = (Path(dst_sub) / src.relative_to(src_dir)).as_posix()
+                signature = [st.st_size, st.st_mtime_ns]
+                current[rel] = signature
+                dst = dst_root / rel
+                if previous.get(rel) == signature and dst.exists():
+                    counts["unchanged"] += 1
+                    continue
+                dst.parent.mkdir(parents=True, exist_ok=True)
+                counts[place(src, dst)] += 1
+
+    for rel in sorted(set(previous) - set(current)):
+        dst = dst_root / rel
+        for path in [dst] + [dst.with_name(dst.name + s) for s in COMPRESSED_SUFFIXES]:
+            if path.exists():
+                path.unlink()
+        counts["removed"] += 1
+        parent = dst.parent
+        while parent != dst_root and parent.exists() and not any(parent.iterdir()):
+            parent.rmdir()
+            parent = parent.parent
+
+    Path(manifest_path).parent.mkdir(parents=True, exist_ok=True)
+    Path(manifest_path).write_text(json.dumps(current, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+    return counts
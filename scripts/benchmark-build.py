@@ -0,0 +1,373 @@
+#!/usr/bin/env python3
+"""Benchmark the build scripts against synthetic corpora.
+
+For each corpus size a throwaway workspace is created (a copy of scripts/,
+src/ and public/images plus a generated content/pages and content/blog), and
+the build stages run there through their real entry points:
+
+  load, load_warm, categorize, related,      build-pages.py internals, timed
+  render, write                              one phase at a time (load_warm
+                                             is load from the corpus cache)
+  hub, blog, build_pages, build_site, verify generate-knowledge-hub.py,
+                                             generate-blog.py, build-pages.py,
+                                             build-site.py (all stages but
+                                             optimize, in one process) and
+                                             verify-links.py as scripts
+
+Every stage runs in its own process so its peak RSS can be read back. Results
+are written as JSON and compared against a stored baseline; a phase that got
+slower (or hungrier) than the threshold is reported as a regression and the
+script exits non-zero. Timings depend on the machine, so no baseline is
+committed: record one with --save-baseline on the machine that runs the
+comparisons. Without one the comparison is skipped.
+"""
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+SCRIPTS_DIR = ROOT / "scripts"
+BENCH_DIR = ROOT / "benchmarks"
+DEFAULT_SIZES = [1000, 10000, 100000]
+# verify-links.py parses every page in dist/ (a couple of ms each), so it is
+# only timed on corpora up to this size unless --verify-max says otherwise.
+VERIFY_MAX_PAGES = 100000
+
+# Timings under these floors are too noisy to call a regression
+MIN_SECONDS_DELTA = 0.05
+MIN_RSS_DELTA_MB = 5.0
+
+FOODS = [
+    "soy-sauce", "teriyaki-sauce", "oyster-sauce", "rice-noodles", "egg-noodles",
+    "pasta", "corn-tortillas", "dumpling-wrapper", "pancakes", "waffles", "bacon",
+    "oats", "hash-browns", "bread", "bagels", "croissants", "pretzels", "miso",
+    "ramen", "pho", "sushi", "tempura", "kimchi", "tempeh", "vinegar", "mustard",
+    "ketchup", "mayonnaise", "curry", "chicken-nuggets", "meatballs", "sausage",
+    "stuffing", "granola", "licorice", "beer", "hummus", "popcorn", "chocolate",
+]
+RISK_POOL = [
+    "Wheat flour", "Barley malt", "Malt vinegar", "Soy sauce (wheat-based)",
+    "Shared fryers", "Breadcrumb coating", "Rye flour", "Modified wheat starch",
+    "Shared toasters", "Seitan", "Malt flavoring", "Couscous",
+]
+SAFE_POOL = [
+    "Rice flour", "Corn starch", "Tamari (labelled GF)", "Potato starch",
+    "Buckwheat (pure)", "Certified gluten-free oats", "Coconut aminos",
+    "Dedicated gluten-free fryer", "Quinoa", "Arrowroot", "Sorghum flour",
+]
+ALTERNATIVES = [
+    "Rice cakes", "Corn tortillas", "Polenta", "Quinoa bowls", "Rice noodles",
+    "Gluten-free pasta", "Baked potatoes", "Tamari", "Buckwheat soba (100%)",
+]
+SUMMARIES = [
+    "Usually made with wheat or barley, so it is unsafe unless clearly labelled gluten free.",
+    "Often gluten free by recipe, but shared equipment and thickeners make cross-contact likely.",
+    "Naturally gluten free when made from plain ingredients; check sauces and seasonings.",
+]
+STATUSES = ["unsafe", "caution", "safe"]
+
+
+def synthetic_page(i, rng):
+    food = FOODS[i % len(FOODS)]
+    topic = f"{food}-{i}"
+    name = topic.replace("-", " ").title()
+    status = STATUSES[i % len(STATUSES)]
+    slug = f"is-{topic}-gluten-free"
+    return {
+        "schema_version": 1,
+        "topic_key": topic,
+        "slug": slug,
+        "title": f"Is {name} Gluten Free? | BiteRight",
+        "description": f"Public gluten safety analysis for {name}. See major risks, safer alternatives, and what to ask before ordering.",
+        "heading": f"Is {name} gluten free?",
+        "intro": f"This public analysis report explains the biggest gluten risks in {name} and how to order more safely.",
+        "verdict": {"status": status, "summary": SUMMARIES[i % len(SUMMARIES)]},
+        "disclaimer": "This guidance is informational only. Always verify ingredients and preparation with the restaurant.",
+        "meta": {"updated_at": f"2026-{1 + i % 12:02d}-{1 + i % 28:02d}"},
+        "sections": [
+            {"title": "Quick answer", "body": f"{name} can vary by recipe, ingredients, and cross-contact controls in the kitchen."},
+            {"title": "Common gluten risks", "body": "Watch for hidden sources like soy sauce, malt flavoring, marinades, thickeners, and shared fryers."},
+        ],
+        "ingredients": {"risk": rng.sample(RISK_POOL, 5), "safe": rng.sample(SAFE_POOL, 5)},
+        "waiter_script": {"preview": f"Is your {name.lower()} made without wheat, barley or rye, and prepared separately?"},
+        "safe_alternatives": rng.sample(ALTERNATIVES, 5),
+        "faq": [
+            {"question": f"Can BiteRight confirm if {name} is gluten free?",
+             "answer": "BiteRight highlights likely gluten risks based on ingredients and preparation."},
+            {"question": "What should I ask a restaurant?",
+             "answer": "Ask about shared equipment, fryers, and certified gluten-free options."},
+        ],
+        "cta": {
+            "title": "Want to scan menus in seconds?",
+            "body": "Download BiteRight to check ingredients and menu items on the go.",
+            "href": "https://apps.apple.com/app/biteright-gluten-scanner/id6755896176",
+            "label": "Download on the App Store",
+        },
+    }
+
+
+def synthetic_post(i, slugs):
+    sections = []
+    for s in range(6):
+        picks = [slugs[(i * 31 + s * 7 + k) % len(slugs)] for k in range(3)] if slugs else []
+        links = ", ".join(f"[{slug}](/{slug}/)" for slug in picks)
+        sections.append(
+            f"## Section {s + 1}: what to check\n\n"
+            f"Labels change often, so **re-check** every purchase. See {links}.\n\n"
+            "- Look for a certified gluten-free mark\n"
+            "- Read the allergen statement\n"
+            "- Check for *may contain* warnings\n\n"
+            "1. Scan the ingredient list\n2. Confirm the oats are certified\n"
+        )
+    return (
+        "---\n"
+        f'title: "Synthetic guide {i}: reading gluten-free labels"\n'
+        f'description: "Benchmark post {i} covering labels, cross-contact and shopping checks."\n'
+        f"date: 2026-{1 + i % 12:02d}-{1 + i % 28:02d}\n"
+        'tags: ["labels", "benchmark"]\n'
+        f'image: "/images/blog/how-to-read-gluten-free-labels/hero.webp"\n'
+        "---\n\n"
+        f"# Synthetic guide {i}\n\n" + "\n".join(sections) +
+        "\n## SEO Package\n\nInternal notes that the generator strips.\n"
+    )
+
+
+def write_corpus(workspace, pages, posts, seed=0):
+    """Populate workspace/content with `pages` page JSONs and `posts` posts."""
+    rng = random.Random(seed)
+    pages_dir = workspace / "content" / "pages"
+    blog_dir = workspace / "content" / "blog"
+    pages_dir.mkdir(parents=True)
+    blog_dir.mkdir(parents=True)
+    slugs = []
+    for i in range(pages):
+        page = synthetic_page(i, rng)
+        slugs.append(page["slug"])
+        (pages_dir / f"{page['slug']}.json").write_text(json.dumps(page, indent=2), encoding="utf-8")
+    for i in range(posts):
+        text = synthetic_post(i, slugs)
+        (blog_dir / f"2026-01-01-synthetic-guide-{i}.md").write_text(text, encoding="utf-8")
+
+
+def make_workspace(parent):
+    """Copy the code and static inputs of this checkout into a fresh tree."""
+    workspace = Path(tempfile.mkdtemp(prefix="bench-", dir=parent))
+    shutil.copytree(SCRIPTS_DIR, workspace / "scripts",
+                    ignore=shutil.ignore_patterns("__pycache__", "node_modules"))
+    shutil.copytree(ROOT / "src", workspace / "src")
+    images = ROOT / "public" / "images"
+    if images.exists():
+        # Only read by the build, so links are as good as copies
+        shutil.copytree(images, workspace / "public" / "images", copy_function=os.link)
+    return workspace
+
+
+def peak_rss_mb(rusage):
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return round(rusage.ru_maxrss / scale, 1)
+
+
+def run_stage(cmd, cwd):
+    """Run one stage to completion; returns (seconds, peak_rss_mb, stdout)."""
+    start = time.perf_counter()
+    proc = subprocess.Popen(cmd, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+    output = proc.stdout.read()
+    _, status, rusage = os.wait4(proc.pid, 0)
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    seconds = time.perf_counter() - start
+    if proc.returncode != 0:
+        raise RuntimeError(f"{' '.join(map(str, cmd))} failed:\n{output.decode('utf-8', 'replace')}")
+    return seconds, peak_rss_mb(rusage), output.decode("utf-8", "replace")
+
+
+def profile_page_phases(workspace):
+    """Time build-pages.py's phases in-process; runs inside the workspace."""
+    scripts = workspace / "scripts"
+    sys.path.insert(0, str(scripts))
+    spec = importlib.util.spec_from_file_location("build_pages", scripts / "build-pages.py")
+    build = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(build)
+
+    phases = {}
+    start = time.perf_counter()
+    all_pages = build.load_all_pages()
+    phases["load"] = time.perf_counter() - start
+
+    # Same again from the parsed-corpus cache the first load just wrote
+    start = time.perf_counter()
+    all_pages = build.load_all_pages()
+    phases["load_warm"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    page_categories = build.categorize_pages(all_pages)
+    corpus_index = build.build_corpus_index(all_pages)
+    phases["categorize"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    related = [build.get_related_pages(page, page_categories, all_pages, 6, corpus_index) for page in all_pages]
+    phases["related"] = time.perf_counter() - start
+
+    render = write = 0.0
+    for page, rel in zip(all_pages, related):
+        start = time.perf_counter()
+        html = build.build_page_html(page["full_data"], rel)
+        mid = time.perf_counter()
+        page_dir = build.DIST_DIR / page["slug"]
+        page_dir.mkdir(parents=True, exist_ok=True)
+        (page_dir / "index.html").write_text(html, encoding="utf-8")
+        write += time.perf_counter() - mid
+        render += mid - start
+    phases["render"] = render
+    phases["write"] = write
+    return phases
+
+
+def bench_size(pages, posts, args):
+    workspace = make_workspace(args.workdir)
+    python = sys.executable
+    scripts = workspace / "scripts"
+    result = {"pages": pages, "posts": posts, "seconds": {}, "peak_rss_mb": {}}
+    try:
+        start = time.perf_counter()
+        write_corpus(workspace, pages, posts)
+        result["corpus_seconds"] = round(time.perf_counter() - start, 3)
+
+        seconds, rss, output = run_stage([python, __file__, "--phase-worker", str(workspace)], workspace)
+        for phase, value in json.loads(output.strip().splitlines()[-1]).items():
+            result["seconds"][phase] = round(value, 3)
+        result["peak_rss_mb"]["phases"] = rss
+
+        stages = [
+            ("hub", "generate-knowledge-hub.py", []),
+            ("blog", "generate-blog.py", []),
+            ("build_pages", "build-pages.py", ["--jobs", str(args.jobs)]),
+            ("build_site", "build-site.py", ["--jobs", str(args.jobs), "--no-optimize"]),
+        ]
+        if pages <= args.verify_max:
+            stages.append(("verify", "verify-links.py", ["--jobs", str(args.jobs), "--no-fail"]))
+        else:
+            result["skipped"] = ["verify"]
+        for name, script, extra in stages:
+            seconds, rss, _ = run_stage([python, str(scripts / script)] + extra, workspace)
+            result["seconds"][name] = round(seconds, 3)
+            result["peak_rss_mb"][name] = rss
+    finally:
+        if args.keep:
+            print(f"  workspace kept at {workspace}")
+        else:
+            shutil.rmtree(workspace, ignore_errors=True)
+    return result
+
+
+def compare(results, baseline, threshold):
+    """Return human-readable regressions of results against baseline."""
+    regressions = []
+    for size, current in results["sizes"].items():
+        previous = baseline.get("sizes", {}).get(size)
+        if not previous:
+            continue
+        for metric, floor, unit in (("seconds", MIN_SECONDS_DELTA, "s"), ("peak_rss_mb", MIN_RSS_DELTA_MB, " MB")):
+            for phase, value in current[metric].items():
+                old = previous.get(metric, {}).get(phase)
+                if old is None:
+                    continue
+                if value > old * (1 + threshold) and value - old > floor:
+                    regressions.append(f"{size} pages: {phase} {metric} {old}{unit} → {value}{unit} (+{(value / old - 1) * 100 if old else 0:.0f}%)")
+    return regressions
+
+
+def print_table(results):
+    phases = []
+    for size in results["sizes"].values():
+        phases += [p for p in size["seconds"] if p not in phases]
+    print(f"  {'phase':<12}" + "".join(f"{size + ' pages':>16}" for size in results["sizes"]))
+    for phase in phases:
+        row = "".join(f"{size['seconds'][phase]:>15.3f}s" if phase in size["seconds"] else f"{'-':>16}"
+                      for size in results["sizes"].values())
+        print(f"  {phase:<12}{row}")
+    print(f"  {'peak RSS':<12}" + "".join(f"{max(size['peak_rss_mb'].values()):>13.1f} MB"
+                                         for size in results["sizes"].values()))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        help="comma-separated corpus sizes (default: %(default)s)")
+    parser.add_argument("--posts", type=int, default=None, metavar="N",
+                        help="synthetic blog posts per corpus (default: pages / 100, at least 5)")
+    parser.add_argument("--jobs", "-j", type=int, default=1, metavar="N",
+                        help="--jobs passed to build-pages.py (default: 1)")
+    parser.add_argument("--verify-max", type=int, default=VERIFY_MAX_PAGES, metavar="N",
+                        help="largest corpus verify-links.py is timed on (default: %(default)s)")
+    parser.add_argument("--output", type=Path, default=BENCH_DIR / "latest.json",
+                        help="where to write results (default: benchmarks/latest.json)")
+    parser.add_argument("--baseline", type=Path, default=BENCH_DIR / "baseline.json",
+                        help="results to compare against (default: benchmarks/baseline.json)")
+    parser.add_argument("--save-baseline", action="store_true", help="also store these results as the baseline")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="relative slowdown/growth reported as a regression (default: %(default)s)")
+    parser.add_argument("--workdir", type=Path, default=None, help="parent directory for workspaces")
+    parser.add_argument("--keep", action="store_true", help="keep the generated workspaces")
+    parser.add_argument("--phase-worker", type=Path, default=None, help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.phase_worker is not None:
+        print(json.dumps(profile_page_phases(args.phase_worker)))
+        return
+
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    results = {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "jobs": args.jobs,
+        "sizes": {},
+    }
+    for pages in sizes:
+        posts = args.posts if args.posts is not None else max(5, pages // 100)
+        print(f"Benchmarking {pages} pages, {posts} posts...")
+        results["sizes"][str(pages)] = bench_size(pages, posts, args)
+
+    print()
+    print_table(results)
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+    print(f"\n✓ Results written to {args.output}")
+
+    regressions = []
+    if args.baseline.exists() and not args.save_baseline:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"⚠ {len(regressions)} regression(s) against {args.baseline}:")
+            for line in regressions:
+                print(f"  - {line}")
+        else:
+            print(f"✓ No regressions against {args.baseline} (threshold {args.threshold:.0%}).")
+    elif not args.save_baseline:
+        print(f"⚠ No baseline at {args.baseline}, skipping the regression check (record one with --save-baseline).")
+    if args.save_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+        print(f"✓ Baseline saved to {args.baseline}")
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
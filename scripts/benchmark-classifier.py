@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""Benchmark the page category classifier as its keyword lists grow.
+
+Pads every rule in site_categories.RULES with synthetic keywords, then times
+classifying the same topic_key/title pairs three ways:
+
+  cascade    the original per-rule any(keyword in topic) checks
+  compiled   site_categories.classify (one Aho-Corasick automaton per field)
+  memoized   categorize_page's cached path, as hit on repeat calls
+
+and checks that cascade and compiled agree on every page. The compiled cost
+should stay flat while the cascade's grows with the keyword count.
+"""
+import argparse
+import functools
+import random
+import string
+import time
+
+import site_categories
+
+DEFAULT_KEYWORDS = [100, 1000, 10000]
+
+
+def cascade(topic_key, title, rules):
+    """The rule table evaluated the way categorize_page used to."""
+    fields = {'topic_key': topic_key.lower(), 'title': title.lower()}
+    for category, names, words in rules:
+        if any(any(word in fields[name] for word in words) for name in names):
+            return category
+    return site_categories.DEFAULT_CATEGORY
+
+
+def padded_rules(total, rng):
+    """RULES with random keywords added until there are about total of them."""
+    rules = [(category, fields, list(words)) for category, fields, words in site_categories.RULES]
+    have = sum(len(words) for _, _, words in rules)
+    for i in range(max(0, total - have)):
+        word = "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(5, 10)))
+        rules[i % len(rules)][2].append(word)
+    return rules
+
+
+def sample_pages(count, rules, rng):
+    """(topic_key, title) pairs: real topics, hits on padded keywords, misses."""
+    words = [word for _, _, ws in rules for word in ws]
+    plain = ["granola", "licorice", "beer", "hummus", "popcorn", "chocolate", "rice", "chips"]
+    pages = []
+    for i in range(count):
+        parts = [rng.choice(words if i % 3 == 0 else plain) for _ in range(rng.randint(1, 3))]
+        topic_key = "-".join(parts)
+        pages.append((topic_key, f"Is {topic_key.replace('-', ' ').title()} gluten free?"))
+    return pages
+
+
+def time_per_page(fn, pages, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for topic_key, title in pages:
+            fn(topic_key, title)
+        best = min(best, time.perf_counter() - start)
+    return best / len(pages) * 1e6
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--keywords", default=",".join(map(str, DEFAULT_KEYWORDS)),
+                        help="comma-separated total keyword counts (default: %(default)s)")
+    parser.add_argument("--pages", type=int, default=2000, help="pages classified per run (default: %(default)s)")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per measurement; the best is kept")
+    parser.add_argument("--seed", type=int, default=1)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    print(f"  {'keywords':>9}{'compile ms':>12}{'cascade µs':>12}{'compiled µs':>13}{'memoized µs':>13}")
+    totals = [int(s) for s in args.keywords.split(",") if s.strip()]
+    # One page set for every size, drawn from the largest keyword list (the
+    # smaller lists are its prefixes), so only the keyword count varies
+    pages = sample_pages(args.pages, padded_rules(max(totals), random.Random(args.seed)), random.Random(args.seed))
+    for total in totals:
+        rules = padded_rules(total, random.Random(args.seed))
+
+        start = time.perf_counter()
+        matchers = site_categories.compile_rules(rules)
+        compile_ms = (time.perf_counter() - start) * 1e3
+
+        compiled = functools.partial(site_categories.classify, rules=rules, matchers=matchers)
+        mismatches = [page for page in pages if compiled(*page) != cascade(*page, rules)]
+        if mismatches:
+            raise SystemExit(f"compiled classifier disagrees with the cascade on {mismatches[:3]}")
+
+        memoized = functools.lru_cache(maxsize=None)(compiled)
+        for page in pages:
+            memoized(*page)
+        row = [time_per_page(functools.partial(cascade, rules=rules), pages, args.repeat),
+               time_per_page(compiled, pages, args.repeat),
+               time_per_page(memoized, pages, args.repeat)]
+        keywords = sum(len(words) for _, _, words in rules)
+        print(f"  {keywords:>9}{compile_ms:>12.1f}" + "".join(f"{value:>12.2f} " for value in row))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,69 +1,57 @@
 #!/usr/bin/env python3
 """Build all programmatic SEO pages from content/pages with related content links."""
+import argparse
+import hashlib
 import html as html_escape
+import importlib.util
 import json
+import os
+import queue
+import resource
 import shutil
+import sys
+import tempfile
+import threading
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
+import asset_sync
+import build_trace
+import related_balance
+import related_similarity
+import site_assets
+import site_cache
+import site_categories
+import site_corpus
+import site_icons
+import site_images
+import site_search
+import site_sitemap
+import site_templates
+from site_categories import CATEGORIES, categorize_page
+from site_corpus import DESCRIPTION_LIMIT, page_record
+from site_templates import Template
+
 ROOT = Path(__file__).resolve().parent.parent
 SRC_DIR = ROOT / "src"
 PAGES_DIR = ROOT / "content" / "pages"
 DIST_DIR = ROOT / "dist"
+# Build state lives outside dist/, which is deployed as-is
+MANIFEST_PATH = ROOT / ".cache" / "build-manifest.json"
+SYNC_MANIFEST_PATH = ROOT / ".cache" / "sync-manifest.json"
 EXCLUDED = {"is-test-gluten-free", "are-test-gluten-free"}
 
-# Categories for related content
-CATEGORIES = {
-    'sauces': [],
-    'noodles': [],
-    'breakfast': [],
-    'meals': [],
-    'bread_baked': [],
-    'asian': [],
-    'condiments': [],
-    'other': []
-}
-
+@build_trace.traced()
 def load_all_pages():
-    """Load all programmatic pages for related content."""
-    pages = []
-    for f in sorted(PAGES_DIR.glob("*.json")):
-        if f.stem in EXCLUDED:
-            continue
-        data = json.loads(f.read_text(encoding="utf-8"))
-        pages.append({
-            'slug': data.get('slug', f.stem),
-            'title': data.get('heading', data.get('title', '')),
-            'topic_key': data.get('topic_key', ''),
-            'description': data.get('verdict', {}).get('summary', data.get('description', '')),
-            'full_data': data
-        })
-    return pages
-
-def categorize_page(page):
-    """Determine the category for a page."""
-    topic = page['topic_key'].lower()
-    title = page['title'].lower()
-    
-    if 'sauce' in topic or 'sauce' in title:
-        return 'sauces'
-    elif any(x in topic for x in ['noodle', 'vermicelli', 'pasta', 'tortilla', 'wrapper', 'dumpling', 'spring-roll']):
-        return 'noodles'
-    elif any(x in topic for x in ['egg', 'pancake', 'waffle', 'bacon', 'oat', 'hash-brown', 'omelette']):
-        return 'breakfast'
-    elif any(x in topic for x in ['bread', 'bagel', 'croissant', 'pretzel', 'matzo', 'crumb']):
-        return 'bread_baked'
-    elif any(x in topic for x in ['miso', 'ramen', 'pho', 'pad-thai', 'teriyaki', 'sushi', 'tempura', 
-                                   'kimchi', 'gochujang', 'hoisin', 'oyster', 'soy', 'tamari', 
-                                   'tempeh', 'edamame']):
-        return 'asian'
-    elif any(x in topic for x in ['vinegar', 'mustard', 'ketchup', 'mayonnaise', 'tzatziki']):
-        return 'condiments'
-    elif any(x in topic for x in ['stir-fry', 'curry', 'chicken', 'meatball', 'sausage', 
-                                   'nugget', 'fish-and-chips', 'sweet-and-sour', 'stuffing']):
-        return 'meals'
-    else:
-        return 'other'
+    """Load metadata for all programmatic pages (full documents stay on disk)."""
+    corpus = site_corpus.load_corpus(PAGES_DIR, EXCLUDED)
+    for name, problem in corpus.invalid_json():
+        print(f"Warning: skipped {name}: {problem}")
+    return corpus.pages
 
+@build_trace.traced()
 def categorize_pages(all_pages):
     """Organize pages into categories."""
     categories = {k: [] for k in CATEGORIES.keys()}
@@ -72,66 +60,159 @@ def categorize_pages(all_pages):
         categories[cat].append(page)
     return categories
 
-def get_related_pages(current_page, all_categories, all_pages_list, count=6):
-    """Get related pages ensuring more balanced distribution."""
-    primary_cat = categorize_page(current_page)
-    current_index = next((i for i, p in enumerate(all_pages_list) if p['slug'] == current_page['slug']), 0)
-    
+# Categories each primary category borrows related links from, in order
+COMPLEMENTARY = {
+    'sauces': ['asian', 'condiments', 'meals'],
+    'noodles': ['asian', 'meals', 'sauces'],
+    'breakfast': ['bread_baked', 'meals', 'noodles'],
+    'meals': ['sauces', 'asian', 'noodles'],
+    'bread_baked': ['breakfast', 'meals', 'other'],
+    'asian': ['sauces', 'noodles', 'meals'],
+    'condiments': ['sauces', 'meals', 'asian'],
+    'other': ['breakfast', 'meals', 'asian', 'bread_baked']
+}
+
+@build_trace.traced()
+def build_corpus_index(all_pages):
+    """Precompute what related-page selection needs so it never scans the corpus.
+
+    - positions: slug -> index in all_pages (first occurrence wins)
+    - category / rank: per-page category and its position within that category
+    - by_category: category -> array of page indexes, in corpus order
+    """
+    positions = {}
+    category = []
+    rank = array('l')
+    by_category = {k: array('l') for k in CATEGORIES.keys()}
+    for i, page in enumerate(all_pages):
+        positions.setdefault(page['slug'], i)
+        cat = categorize_page(page)
+        category.append(cat)
+        rank.append(len(by_category[cat]))
+        by_category[cat].append(i)
+    return {
+        'positions': positions,
+        'category': category,
+        'rank': rank,
+        'by_category': by_category,
+    }
+
+def _nth_remaining(members, skipped_ranks, n):
+    """members[n] after removing the (sorted) ranks in skipped_ranks."""
+    for skipped in skipped_ranks:
+        if skipped <= n:
+            n += 1
+        else:
+            break
+    return members[n]
+
+def select_related(corpus_index, current, count=6):
+    """Pick related page indexes for all_pages[current] in O(count).
+
+    Same picks as the original list-filtering algorithm: 2 pages from the
+    primary category, then fill from complementary categories, using
+    position-based strides so links spread across the corpus.
+    """
+    category = corpus_index['category']
+    rank = corpus_index['rank']
+    by_category = corpus_index['by_category']
+    primary_cat = category[current]
     related = []
     
-    # Strategy: Mix pages from same category with pages from other categories
-    # Use position-based selection to ensure variety
-    
     # 1. Get from same category (30-40% of links)
-    same_cat_pages = [p for p in all_categories[primary_cat] 
-                     if p['slug'] != current_page['slug']]
-    same_cat_target = min(2, len(same_cat_pages))
+    members = by_category[primary_cat]
+    skipped = [rank[current]]
+    available = len(members) - 1
+    same_cat_target = min(2, available)
     
-    if same_cat_pages:
+    if available:
         # Use hash-based selection for consistency but variety
-        indices = [(current_index * 7 + i * 11) % len(same_cat_pages) for i in range(same_cat_target)]
-        related.extend([same_cat_pages[idx] for idx in set(indices)][:same_cat_target])
+        indices = [(current * 7 + i * 11) % available for i in range(same_cat_target)]
+        related.extend([_nth_remaining(members, skipped, idx) for idx in set(indices)][:same_cat_target])
     
     # 2. Get from complementary categories
-    complementary = {
-        'sauces': ['asian', 'condiments', 'meals'],
-        'noodles': ['asian', 'meals', 'sauces'],
-        'breakfast': ['bread_baked', 'meals', 'noodles'],
-        'meals': ['sauces', 'asian', 'noodles'],
-        'bread_baked': ['breakfast', 'meals', 'other'],
-        'asian': ['sauces', 'noodles', 'meals'],
-        'condiments': ['sauces', 'meals', 'asian'],
-        'other': ['breakfast', 'meals', 'asian', 'bread_baked']
-    }
-    
-    preferred_cats = complementary.get(primary_cat, [])
-    all_other_cats = [c for c in all_categories.keys() if c != primary_cat]
-    search_order = preferred_cats + [c for c in all_other_cats if c not in preferred_cats]
+    preferred_cats = COMPLEMENTARY.get(primary_cat, [])
+    search_order = preferred_cats + [c for c in by_category if c != primary_cat and c not in preferred_cats]
     
     # 3. Fill remaining slots from other categories
     for cat_name in search_order:
         if len(related) >= count:
             break
-            
-        cat_pages = [p for p in all_categories[cat_name] 
-                    if p['slug'] != current_page['slug'] 
-                    and not any(r['slug'] == p['slug'] for r in related)]
+
+        members = by_category[cat_name]
+        skipped = sorted(rank[r] for r in related if category[r] == cat_name)
+        available = len(members) - len(skipped)
         
-        if cat_pages:
+        if available:
             # Use hash-based selection for this category too
-            needed = min(count - len(related), max(1, len(cat_pages) // 2))
-            indices = [(current_index * 13 + i * 17) % len(cat_pages) for i in range(needed * 2)]
+            needed = min(count - len(related), max(1, available // 2))
             selected = []
-            for idx in indices:
+            for i in range(needed * 2):
                 if len(selected) >= needed:
                     break
-                page = cat_pages[idx]
-                if page not in selected and not any(r['slug'] == page['slug'] for r in related):
-                    selected.append(page)
+                pick = _nth_remaining(members, skipped, (current * 13 + i * 17) % available)
+                if pick not in selected:
+                    selected.append(pick)
             related.extend(selected[:needed])
     
     return related[:count]
 
+@build_trace.traced(label=lambda page, *args, **kwargs: page['slug'])
+def get_related_pages(current_page, all_categories, all_pages_list, count=6, corpus_index=None):
+    """Get related pages ensuring more balanced distribution.
+
+    Pass a prebuilt corpus_index (see build_corpus_index) when calling this
+    for many pages; without one the index is rebuilt on every call.
+    """
+    if corpus_index is None:
+        corpus_index = build_corpus_index(all_pages_list)
+    current = corpus_index['positions'].get(current_page['slug'], 0)
+    return [all_pages_list[i] for i in select_related(corpus_index, current, count)]
+
+PAGE_TEMPLATE = Template('''<!doctype html>
+<html lang="en">
+<head>
+{{ analytics_head|safe }}
+  <meta charset="utf-8" />
+  <meta name="viewport" content="width=device-width,initial-scale=1" />
+  <title>{{ title }}</title>
+  <meta name="description" content="{{ description }}" />
+  <link rel="canonical" href="{{ canonical }}" />
+{{ head_assets|safe }}
+  <link rel="stylesheet" href="{{ page_css_url }}" />
+</head>
+<body>
+{{ gtm_noscript|safe }}
+  <div class="container">
+{{ nav|safe }}
+    <main class="verdict-{{ verdict_key }}">
+      <div class="badge verdict-badge">{{ badge_text }}</div>
+      <h1>{{ heading }}</h1>
+      <p class="intro">{{ intro }}</p>
+
+      <div class="verdict-summary">
+        <p>{{ verdict_summary }}</p>
+      </div>
+      {{ risk_html|safe }}
+      {{ safe_html|safe }}
+      {{ waiter_html|safe }}
+      {{ alternatives_html|safe }}
+      {{ faq_html|safe }}
+
+      <div class="cta-section">
+        <h2>{{ cta_title }}</h2>
+        <p>{{ cta_body }}</p>
+        <a href="{{ cta_href }}" class="cta-btn">{{ cta_label }}</a>
+      </div>
+      {{ related_section|safe }}
+    </main>
+  </div>
+{{ site_js|safe }}
+</body>
+</html>
+''')
+
+@build_trace.traced(label=lambda page_data, *args, **kwargs: page_data.get('slug', ''))
 def build_page_html(page_data, related_pages):
     """Build HTML for a programmatic SEO page from full JSON data."""
     title = page_data.get('title', '')
@@ -159,13 +240,14 @@ def build_page_html(page_data, related_pages):
     cta_href = cta.get('href', 'https://apps.apple.com/app/biteright-gluten-scanner/id6755896176')
     cta_label = cta.get('label', 'Download on the App Store')
     
-    # Build verdict badge
+    # Build verdict badge (colour comes from the verdict-<key> class in page.css)
     verdict_badges = {
-        'safe': ('✓ Generally Safe', '#00a36f'),
-        'caution': ('⚠ Use Caution', '#f59e0b'),
-        'unsafe': ('✗ High Risk', '#ef4444')
+        'safe': '✓ Generally Safe',
+        'caution': '⚠ Use Caution',
+        'unsafe': '✗ High Risk'
     }
-    badge_text, badge_color = verdict_badges.get(verdict_status, verdict_badges['caution'])
+    verdict_key = verdict_status if verdict_status in verdict_badges else 'caution'
+    badge_text = verdict_badges[verdict_key]
     
     # Build risk/safe sections
     risk_html = ''
@@ -238,386 +320,670 @@ def build_page_html(page_data, related_pages):
           </div>
         </section>'''
     
-    return f'''<!doctype html>
-<html lang="en">
-  <head>
-  <!-- Google tag (gtag.js) -->
-  <script async src="https://www.googletagmanager.com/gtag/js?id=G-NFPKT4GJ0P"></script>
-  <script>
-    window.dataLayer = window.dataLayer || [];
-    function gtag(){{dataLayer.push(arguments);}}
-    gtag('js', new Date());
-  
-    gtag('config', 'G-NFPKT4GJ0P');
-  </script>
-    <!-- Google Tag Manager -->
-    <script>(function(w,d,s,l,i){{w[l]=w[l]||[];w[l].push({{'gtm.start':
-    new Date().getTime(),event:'gtm.js'}});var f=d.getElementsByTagName(s)[0],
-    j=d.createElement(s),dl=l!='dataLayer'?'&l='+l:'';j.async=true;j.src=
-    'https://www.googletagmanager.com/gtm.js?id='+i+dl;f.parentNode.insertBefore(j,f);
-    }})(window,document,'script','dataLayer','GTM-NM5CZKKT');</script>
-    <!-- End Google Tag Manager -->
-    <meta charset="utf-8" />
-    <meta name="viewport" content="width=device-width,initial-scale=1" />
-    <title>{html_escape.escape(title)}</title>
-    <meta name="description" content="{html_escape.escape(description)}" />
-    <link rel="canonical" href="{html_escape.escape(canonical)}" />
-    <link rel="preconnect" href="https://fonts.googleapis.com">
-    <link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>
-    <link href="https://fonts.googleapis.com/css2?family=Nunito:wght@400;600;700;800&display=swap" rel="stylesheet">
-    <script src="https://unpkg.com/feather-icons/dist/feather.min.js"></script>
-    <style>
-      :root {{
-        --paper-color: #FDFBF7;
-        --primary-teal: #00A36F;
-        --navy: #0D1B2A;
-        --text-body: #5F6B7A;
-        --safe-green: #00a36f;
-        --caution-amber: #f59e0b;
-        --risk-red: #ef4444;
-      }}
-      * {{ box-sizing: border-box; }}
-      body {{
-        margin: 0;
-        font-family: 'Nunito', system-ui, -apple-system, sans-serif;
-        background: var(--paper-color);
-        color: var(--navy);
-        line-height: 1.6;
-      }}
-      .container {{
-        max-width: 960px;
-        margin: 0 auto;
-        padding: 24px 24px 80px;
-      }}
-      a {{ color: var(--primary-teal); text-decoration: none; }}
-      a:hover {{ text-decoration: underline; }}
-      nav {{ display:flex; justify-content:space-between; align-items:center; padding:32px 0; margin-bottom:16px; }}
-      .logo {{ font-size:24px; font-weight:800; color:var(--navy); display:flex; align-items:center; gap:8px; text-decoration:none; }}
-      .logo:hover {{ color:var(--primary-teal); }}
-      .logo-mark {{ width:32px; height:32px; border-radius:8px; object-fit:cover; display:block; flex-shrink:0; }}
-      .nav-links a {{ text-decoration:none; color:var(--navy); font-weight:700; margin-left:24px; font-size:15px; transition:color 0.2s; border-radius:8px; padding:4px 8px; }}
-      .nav-links a:hover {{ color:var(--primary-teal); }}
-      .nav-links a:focus-visible {{ outline:2px solid var(--primary-teal); outline-offset:2px; }}
-      .nav-kebab {{ display:none; background:none; border:none; cursor:pointer; padding:8px; color:var(--navy); border-radius:8px; transition:background 0.2s; }}
-      .nav-kebab:hover {{ background: rgba(0,0,0,0.05); }}
-      .nav-kebab svg {{ width:24px; height:24px; }}
-      .nav-menu-mobile {{ display:none; position:absolute; top:100%; right:0; margin-top:8px; background:white; border-radius:16px; box-shadow:0 10px 40px rgba(13,27,42,0.15); padding:12px; min-width:200px; z-index:100; border:1px solid rgba(0,0,0,0.06); }}
-      .nav-menu-mobile.open {{ display:flex; flex-direction:column; gap:4px; }}
-      .nav-menu-mobile a {{ display:block; padding:12px 16px; text-decoration:none; color:var(--navy); font-weight:700; font-size:15px; border-radius:10px; transition:background 0.2s, color 0.2s; }}
-      .nav-menu-mobile a:hover {{ background: rgba(0,163,111,0.08); color: var(--primary-teal); }}
-      .nav-wrapper {{ position:relative; }}
-      .badge {{
-        display: inline-block;
-        padding: 8px 16px;
-        border-radius: 999px;
-        font-weight: 700;
-        font-size: 13px;
-        letter-spacing: 0.05em;
-        margin-bottom: 12px;
-      }}
-      .verdict-badge {{
-        background: {badge_color};
-        color: white;
-      }}
-      h1 {{
-        font-size: 42px;
-        margin: 16px 0 20px;
-        letter-spacing: -1px;
-        line-height: 1.1;
-      }}
-      h2 {{
-        font-size: 26px;
-        margin: 40px 0 16px;
-        letter-spacing: -0.5px;
-      }}
-      h3 {{
-        font-size: 18px;
-        margin: 20px 0 12px;
-      }}
-      p {{ 
-        line-height: 1.7; 
-        color: var(--text-body); 
-        font-size: 17px;
-        margin-bottom: 16px;
-      }}
-      .intro {{
-        font-size: 19px;
-        color: var(--navy);
-        margin-bottom: 24px;
-      }}
-      .verdict-summary {{
-        background: white;
-        border-radius: 16px;
-        padding: 24px;
-        margin: 32px 0;
-        box-shadow: 0 4px 12px rgba(13, 27, 42, 0.08);
-        border-left: 4px solid {badge_color};
-      }}
-      .verdict-summary p {{
-        margin: 0;
-        font-size: 17px;
-        color: var(--navy);
-      }}
-      ul {{
-        padding-left: 24px;
-        margin: 16px 0 24px;
-      }}
-      li {{
-        margin-bottom: 10px;
-        color: var(--text-body);
-      }}
-      .risk-list li {{
-        color: var(--risk-red);
-      }}
-      .safe-list li {{
-        color: var(--safe-green);
-      }}
-      .waiter-script {{
-        background: rgba(0, 163, 111, 0.08);
-        border-radius: 16px;
-        padding: 24px;
-        margin: 32px 0;
-      }}
-      .waiter-script h3 {{
-        margin-top: 0;
-        color: var(--primary-teal);
-      }}
-      .script-text {{
-        font-size: 18px;
-        font-style: italic;
-        color: var(--navy);
-        font-weight: 600;
-      }}
-      .faq {{
-        margin: 24px 0;
-      }}
-      .faq-item {{
-        background: white;
-        border-radius: 12px;
-        padding: 20px;
-        margin-bottom: 16px;
-        box-shadow: 0 2px 8px rgba(13, 27, 42, 0.06);
-      }}
-      .faq-item h3 {{
-        margin-top: 0;
-        font-size: 17px;
-        color: var(--navy);
-      }}
-      .faq-item p {{
-        margin-bottom: 0;
-      }}
-      .cta-section {{
-        background: var(--navy);
-        color: white;
-        border-radius: 20px;
-        padding: 32px;
-        margin: 48px 0;
-        text-align: center;
-      }}
-      .cta-section h2 {{
-        color: white;
-        margin-top: 0;
-      }}
-      .cta-section p {{
-        color: rgba(255, 255, 255, 0.9);
-        margin-bottom: 24px;
-      }}
-      .cta-btn {{
-        display: inline-block;
-        padding: 14px 32px;
-        background: var(--primary-teal);
-        color: white;
-        border-radius: 999px;
-        font-weight: 700;
-        font-size: 16px;
-        text-decoration: none;
-      }}
-      .cta-btn:hover {{
-        background: #00b87a;
-        text-decoration: none;
-      }}
-      .related-pages {{
-        margin-top: 64px;
-        padding-top: 40px;
-        border-top: 2px solid rgba(0, 0, 0, 0.08);
-      }}
-      .related-intro {{
-        color: var(--text-body);
-        margin-bottom: 24px;
-      }}
-      .related-grid {{
-        display: grid;
-        grid-template-columns: repeat(auto-fill, minmax(220px, 1fr));
-        gap: 16px;
-        margin-top: 24px;
-      }}
-      .related-card {{
-        background: white;
-        border-radius: 16px;
-        padding: 20px;
-        box-shadow: 0 4px 12px rgba(13, 27, 42, 0.06);
-        transition: transform 0.2s, box-shadow 0.2s;
-        text-decoration: none;
-        color: inherit;
-        display: block;
-      }}
-      .related-card:hover {{
-        transform: translateY(-2px);
-        box-shadow: 0 8px 20px rgba(0, 163, 111, 0.12);
-        text-decoration: none;
-      }}
-      .related-card h3 {{
-        font-size: 16px;
-        margin: 0 0 8px;
-        color: var(--navy);
-        font-weight: 700;
-      }}
-      .related-card p {{
-        font-size: 14px;
-        color: var(--text-body);
-        margin: 0;
-        line-height: 1.5;
-      }}
-      @media (max-width: 768px) {{ .nav-links {{ display:none; }} .nav-kebab {{ display:flex; align-items:center; justify-content:center; }} }}
-      @media (max-width: 640px) {{
-        h1 {{ font-size: 32px; }}
-        .related-grid {{ grid-template-columns: 1fr; }}
-      }}
-    </style>
-  </head>
-  <body>
-    <!-- Google Tag Manager (noscript) -->
-    <noscript><iframe src="https://www.googletagmanager.com/ns.html?id=GTM-NM5CZKKT"
-    height="0" width="0" style="display:none;visibility:hidden"></iframe></noscript>
-    <!-- End Google Tag Manager (noscript) -->
-    <div class="container">
-      <nav>
-        <a href="/" class="logo" aria-label="BiteRight home">
-          <img class="logo-mark" src="/img/biteright-icon.png" alt="" width="32" height="32" />
-          BiteRight
-        </a>
-        <div class="nav-wrapper">
-          <div class="nav-links">
-            <a href="/#features">Features</a>
-            <a href="/#how-it-works">How it works</a>
-            <a href="/knowledge-hub/">Knowledge Hub</a>
-            <a href="/blog/">Blog</a>
-            <a href="/gluten-free-diet/">Gluten&#8209;free diet</a>
-            <a href="/newly-diagnosed/">Newly diagnosed?</a>
-            <a href="/#faq">FAQ</a>
-          </div>
-          <button class="nav-kebab" type="button" aria-label="Open menu" aria-expanded="false" aria-haspopup="true">
-            <i data-feather="more-vertical"></i>
-          </button>
-          <div class="nav-menu-mobile" id="nav-menu-mobile">
-            <a href="/#features">Features</a>
-            <a href="/#how-it-works">How it works</a>
-            <a href="/knowledge-hub/">Knowledge Hub</a>
-            <a href="/blog/">Blog</a>
-            <a href="/gluten-free-diet/">Gluten&#8209;free diet</a>
-            <a href="/newly-diagnosed/">Newly diagnosed?</a>
-            <a href="/#faq">FAQ</a>
-          </div>
-        </div>
-      </nav>
-      <main>
-        <div class="badge verdict-badge">{badge_text}</div>
-        <h1>{html_escape.escape(heading)}</h1>
-        <p class="intro">{html_escape.escape(intro)}</p>
-        
-        <div class="verdict-summary">
-          <p>{html_escape.escape(verdict_summary)}</p>
-        </div>
-        {risk_html}
-        {safe_html}
-        {waiter_html}
-        {alternatives_html}
-        {faq_html}
-        
-        <div class="cta-section">
-          <h2>{html_escape.escape(cta_title)}</h2>
-          <p>{html_escape.escape(cta_body)}</p>
-          <a href="{html_escape.escape(cta_href)}" class="cta-btn">{html_escape.escape(cta_label)}</a>
-        </div>
-        {related_section}
-      </main>
-    </div>
-  <script>
-    if (typeof feather !== 'undefined') {{ feather.replace(); }}
-    (function() {{
-      var kebab = document.querySelector('.nav-kebab');
-      var menu = document.getElementById('nav-menu-mobile');
-      if (kebab && menu) {{
-        kebab.addEventListener('click', function() {{
-          var open = menu.classList.toggle('open');
-          kebab.setAttribute('aria-expanded', open ? 'true' : 'false');
-        }});
-        document.addEventListener('click', function(e) {{
-          if (!kebab.contains(e.target) && !menu.contains(e.target)) {{
-            menu.classList.remove('open');
-            kebab.setAttribute('aria-expanded', 'false');
-          }}
-        }});
-      }}
-    }})();
-    // GA4 key event: any App Store CTA / bio-link click
-    (function () {{
-      document.addEventListener('click', function (e) {{
-        var link = e.target && e.target.closest ? e.target.closest('a[href]') : null;
-        if (!link) return;
-
-        var href = link.getAttribute('href') || '';
-        var isAppStore = href.indexOf('apps.apple.com/app/biteright-gluten-scanner') !== -1;
-        var isBioRoute = href === '/tt' || href === '/go' || href === '/app' || href.indexOf('/tt?') === 0 || href.indexOf('/go?') === 0 || href.indexOf('/app?') === 0;
-        if (!isAppStore && !isBioRoute) return;
-
-        if (typeof window.gtag === 'function') {{
-          window.gtag('event', 'app_store_cta_click', {{
-            event_category: 'engagement',
-            event_label: href,
-            link_url: href,
-            link_text: (link.textContent || '').trim().slice(0, 120)
-          }});
-        }}
-      }}, true);
-    }})();
-  </script>
-  </body>
-</html>
-'''
+    return PAGE_TEMPLATE.render(
+        title=title,
+        description=description,
+        canonical=canonical,
+        verdict_key=verdict_key,
+        badge_text=badge_text,
+        heading=heading,
+        intro=intro,
+        verdict_summary=verdict_summary,
+        risk_html=risk_html,
+        safe_html=safe_html,
+        waiter_html=waiter_html,
+        alternatives_html=alternatives_html,
+        faq_html=faq_html,
+        cta_title=cta_title,
+        cta_body=cta_body,
+        cta_href=cta_href,
+        cta_label=cta_label,
+        related_section=related_section,
+    )
 
-def main():
-    # Load all pages
-    all_pages = load_all_pages()
-    page_categories = categorize_pages(all_pages)
-    
-    # Copy src/ to dist/ (homepage, knowledge-hub, static pages, img, etc.)
-    if DIST_DIR.exists():
+TEMPLATE_SOURCES = [Path(__file__), Path(site_assets.__file__), Path(site_templates.__file__)]
+
+def template_version():
+    """Hash of the template sources, so any template change invalidates every page."""
+    h = hashlib.sha256()
+    for path in TEMPLATE_SOURCES:
+        h.update(path.read_bytes())
+    # Fragments embed fingerprinted asset URLs, which change without the sources
+    h.update("".join(site_templates.FRAGMENTS.values()).encode("utf-8"))
+    return h.hexdigest()
+
+def related_hash(related_pages):
+    """Hash the fields of related pages that end up in the rendered cards."""
+    h = hashlib.sha256()
+    for r in related_pages:
+        h.update(f"{r['slug']}\0{r['title']}\0{r['description'][:100]}\0{len(r['description']) > 100}\n".encode("utf-8"))
+    return h.hexdigest()
+
+def load_manifest():
+    """Load the previous build manifest, or an empty one if missing/unreadable."""
+    try:
+        return json.loads(MANIFEST_PATH.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+def rebuild_reason(page, entry, tmpl_version, rel_hash, manifest):
+    """Return why a page needs rendering, or None if its output is current."""
+    if entry is None:
+        return "new page"
+    if manifest.get('template_version') != tmpl_version:
+        return "template changed"
+    if entry.get('input') != page['source_hash']:
+        return "input changed"
+    if entry.get('related') != rel_hash:
+        return "related links changed"
+    if not (DIST_DIR / page['slug'] / "index.html").exists():
+        return "output missing"
+    return None
+
+def write_page(page, related):
+    """Render one page and write it to dist/<slug>/index.html."""
+    page_dir = DIST_DIR / page['slug']
+    page_dir.mkdir(parents=True, exist_ok=True)
+    html = build_page_html(page['full_data'], related)
+    with build_trace.span("write", slug=page['slug']):
+        (page_dir / "index.html").write_text(html, encoding="utf-8")
+
+def write_manifest(tmpl_version, entries):
+    with build_trace.span("write_manifest"):
+        MANIFEST_PATH.parent.mkdir(parents=True, exist_ok=True)
+        MANIFEST_PATH.write_text(json.dumps({
+            'template_version': tmpl_version,
+            'pages': entries
+        }, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+
+# Shared build state, set once per process (directly for serial builds,
+# via the pool initializer for --jobs) so chunks don't re-pickle the corpus.
+_BUILD_STATE = {}
+
+def init_build_state(state):
+    _BUILD_STATE.clear()
+    _BUILD_STATE.update(state)
+
+def build_chunk(bounds):
+    """Select related pages, render and write pages all_pages[start:stop].
+
+    Returns one (slug, manifest_entry, rebuild_reason) tuple per page, in order;
+    the reason is None when an incremental build skipped the page.
+    """
+    start, stop = bounds
+    all_pages = _BUILD_STATE['all_pages']
+    page_categories = _BUILD_STATE['page_categories']
+    incremental = _BUILD_STATE['incremental']
+    previous = _BUILD_STATE['manifest'].get('pages', {})
+    related_lists = _BUILD_STATE['related_lists']
+    results = []
+    for position in range(start, stop):
+        page = all_pages[position]
+        # Get related pages
+        if related_lists is not None:
+            related = [all_pages[i] for i in related_lists[position]]
+        else:
+            related = get_related_pages(page, page_categories, all_pages, 6, _BUILD_STATE['corpus_index'])
+        rel_hash = related_hash(related)
+        entry = {'input': page['source_hash'], 'related': rel_hash}
+
+        reason = "full build"
+        if incremental:
+            reason = rebuild_reason(page, previous.get(page['slug']), _BUILD_STATE['template_version'],
+                                    rel_hash, _BUILD_STATE['manifest'])
+            if reason is None:
+                results.append((page['slug'], entry, None))
+                continue
+
+        write_page(page, related)
+        results.append((page['slug'], entry, reason))
+    build_trace.flush()
+    return results
+
+def chunk_bounds(total, jobs):
+    """Split range(total) into contiguous chunks, a few per worker for balance."""
+    size = max(1, -(-total // (jobs * 4)))
+    return [(start, min(start + size, total)) for start in range(0, total, size)]
+
+# Streaming build (--stream): a two-pass build with a bounded per-page memory
+# overhead. It isn't constant: pass one keeps fixed-width arrays per page and
+# spills the card text to a temp file; pass two renders page by page and hands
+# the HTML to a writer thread through a bounded queue.
+CATEGORY_NAMES = list(CATEGORIES.keys())
+CATEGORY_CODES = {name: code for code, name in enumerate(CATEGORY_NAMES)}
+WRITE_QUEUE_DEPTH = 256
+
+class CategoryColumn:
+    """Per-page category names stored as one byte each."""
+    __slots__ = ('codes',)
+
+    def __init__(self):
+        self.codes = array('B')
+
+    def append(self, name):
+        self.codes.append(CATEGORY_CODES[name])
+
+    def __getitem__(self, i):
+        return CATEGORY_NAMES[self.codes[i]]
+
+    def __len__(self):
+        return len(self.codes)
+
+class StreamingCorpus:
+    """Pass-one index for streaming builds.
+
+    Holds what select_related needs as arrays (about 20 bytes per page) and
+    writes each page's file stem, slug, title and short description to an
+    unlinked temp file, read back on demand with os.pread. Memory still grows
+    linearly with the corpus: the arrays, plus the sorted file-name list while
+    pass one runs (together about 130 bytes per page at peak; see
+    scripts/check-scaling.py stream-memory).
+    """
+
+    def __init__(self, pages_dir=PAGES_DIR, excluded=EXCLUDED):
+        self._file = tempfile.TemporaryFile()
+        self.offsets = array('Q', [0])
+        category = CategoryColumn()
+        rank = array('L')
+        by_category = {k: array('L') for k in CATEGORIES.keys()}
+        names = sorted(n for n in os.listdir(pages_dir) if n.endswith(".json") and n[:-5] not in excluded)
+        pos = 0
+        for i, name in enumerate(names):
+            data = json.loads((pages_dir / name).read_bytes())
+            page = {
+                'slug': data.get('slug', name[:-5]),
+                'title': data.get('heading', data.get('title', '')),
+                'topic_key': data.get('topic_key', ''),
+            }
+            override = data.get('category')
+            # Uncached: the memo would keep every page's strings alive
+            cat = site_categories.classify(page['topic_key'], page['title'], override if isinstance(override, str) else None)
+            category.append(cat)
+            rank.append(len(by_category[cat]))
+            by_category[cat].append(i)
+            description = data.get('verdict', {}).get('summary', data.get('description', ''))[:DESCRIPTION_LIMIT]
+            record = "\0".join((name[:-5], page['slug'], page['title'], description)).encode("utf-8")
+            self._file.write(record)
+            pos += len(record)
+            self.offsets.append(pos)
+        del names
+        self._file.flush()
+        self.index = {'category': category, 'rank': rank, 'by_category': by_category}
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def record(self, i):
+        start = self.offsets[i]
+        raw = os.pread(self._file.fileno(), self.offsets[i + 1] - start, start)
+        stem, slug, title, description = raw.decode("utf-8").split("\0", 3)
+        return {'stem': stem, 'slug': slug, 'title': title, 'description': description}
+
+    def close(self):
+        self._file.close()
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def stream_pages(corpus, tmpl_version, abort_above_mb):
+    """Pass two: select, render and queue each page; a thread writes them.
+
+    Writes the build manifest as it goes. This is a guard, not a limit: it
+    exits with an error as soon as peak RSS passes abort_above_mb.
+    """
+    pending = queue.Queue(maxsize=WRITE_QUEUE_DEPTH)
+    errors = []
+
+    def writer():
+        while True:
+            item = pending.get()
+            if item is None:
+                return
+            if errors:
+                continue  # keep draining so the producer never blocks
+            slug, html = item
+            try:
+                page_dir = DIST_DIR / slug
+                page_dir.mkdir(parents=True, exist_ok=True)
+                with build_trace.span("write", slug=slug):
+                    (page_dir / "index.html").write_text(html, encoding="utf-8")
+            except OSError as e:
+                errors.append(e)
+
+    thread = threading.Thread(target=writer, daemon=True)
+    thread.start()
+    MANIFEST_PATH.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        with MANIFEST_PATH.open("w", encoding="utf-8") as manifest:
+            manifest.write('{"template_version": %s, "pages": {' % json.dumps(tmpl_version))
+            for i in range(len(corpus)):
+                page = corpus.record(i)
+                raw = (PAGES_DIR / f"{page['stem']}.json").read_bytes()
+                with build_trace.span("select_related", slug=page['slug']):
+                    related = [corpus.record(j) for j in select_related(corpus.index, i, 6)]
+                pending.put((page['slug'], build_page_html(json.loads(raw), related)))
+                entry = {'input': hashlib.sha256(raw).hexdigest(), 'related': related_hash(related)}
+                manifest.write("%s\n%s: %s" % ("," if i else "", json.dumps(page['slug']), json.dumps(entry, sort_keys=True)))
+                if i % 1000 == 0 and peak_rss_mb() > abort_above_mb:
+                    errors.append(MemoryError(f"peak RSS {peak_rss_mb():.0f} MB exceeded --abort-above-rss {abort_above_mb} MB"))
+                if errors:
+                    break
+            manifest.write("\n}}\n")
+    finally:
+        pending.put(None)
+        thread.join()
+    if errors:
+        print(f"Error: {errors[0]}")
+        sys.exit(1)
+    return len(corpus)
+
+# Watch mode (--watch): keeps the page records, related graph and hub cards in
+# memory, polls the inputs and re-renders only the outputs a change can reach.
+BLOG_DIR = ROOT / "content" / "blog"
+STATIC_DIRS = [SRC_DIR, ROOT / "public" / "images"]
+
+def load_script(name):
+    """Import a sibling script with a hyphenated file name, e.g. generate-blog."""
+    spec = importlib.util.spec_from_file_location(name.replace("-", "_"), Path(__file__).with_name(f"{name}.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def scan_tree(directory, suffix=""):
+    """{path: (mtime_ns, size)} for every file under directory ending in suffix."""
+    found = {}
+    for root, _dirs, files in os.walk(directory):
+        for name in files:
+            if name.endswith(suffix):
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                found[path] = (st.st_mtime_ns, st.st_size)
+    return found
+
+def diff_scan(before, after):
+    """Paths added or modified between two scans, and paths removed."""
+    changed = sorted(p for p, sig in after.items() if before.get(p) != sig)
+    removed = sorted(p for p in before if p not in after)
+    return changed, removed
+
+class WatchedCorpus:
+    """The parsed corpus a --watch session keeps between rebuilds."""
+
+    def __init__(self, hub, tmpl_version):
+        self.hub = hub
+        self.tmpl_version = tmpl_version
+        corpus = site_corpus.load_corpus(PAGES_DIR, EXCLUDED)
+        for name, problem in corpus.invalid_json():
+            print(f"Warning: skipped {name}: {problem}")
+        paths = [page.path for page in corpus.pages]
+        self.records = dict(zip(paths, corpus.pages))  # page file -> PageRecord
+        self.cards = dict(zip(paths, corpus.cards))    # page file -> knowledge hub card
+        self.sitemap = dict(zip(paths, corpus.sitemap))  # page file -> (loc, lastmod)
+        self.search = dict(zip(paths, corpus.search))    # page file -> hub search terms
+        manifest = load_manifest()
+        # A template change since the last build makes every entry stale
+        self.entries = manifest.get('pages', {}) if manifest.get('template_version') == tmpl_version else {}
+        self.reindex()
+
+    def read(self, path):
+        raw = path.read_bytes()
+        data = json.loads(raw.decode("utf-8"))
+        record = self.records[path] = page_record(path, raw, data)
+        self.cards[path] = site_corpus.hub_card(path.stem, data)
+        self.sitemap[path] = site_corpus.sitemap_entry(record, data)
+        self.search[path] = site_search.page_terms(self.cards[path][1], data)
+
+    def reindex(self):
+        """Recompute categories and every page's related picks."""
+        self.pages = [self.records[p] for p in sorted(self.records)]
+        corpus_index = build_corpus_index(self.pages)
+        self.related = [select_related(corpus_index, i, 6) for i in range(len(self.pages))]
+        self.positions = corpus_index['positions']
+        self.shown_in = {}
+        for i, picks in enumerate(self.related):
+            for j in picks:
+                self.shown_in.setdefault(j, []).append(i)
+
+    def update(self, changed, removed):
+        """Apply edited/added/deleted page files.
+
+        Returns the positions whose output may be stale and whether the hub
+        needs regenerating. Adding or deleting a page, renaming its slug or moving
+        it to another category reshuffles related picks, so every page is a
+        candidate; otherwise only the edited pages and the pages whose
+        related cards show them are.
+        """
+        structural = False
+        touched = []
+        cards_changed = False
+        for path in removed:
+            if self.records.pop(path, None) is not None:
+                del self.cards[path]
+                del self.sitemap[path]
+                del self.search[path]
+                structural = cards_changed = True
+        for path in changed:
+            if path.stem in EXCLUDED:
+                continue
+            old = self.records.get(path)
+            old_card = self.cards.get(path)
+            old_terms = self.search.get(path)
+            try:
+                self.read(path)
+            except (OSError, ValueError) as e:
+                print(f"  skipped {path.name}: {e}")
+                continue
+            new = self.records[path]
+            recategorized = old is None or categorize_page(old) != categorize_page(new)
+            if old is None or old.slug != new.slug or recategorized:
+                structural = True
+            # The hub shards by category and by topic_key's first letter, and indexes the search terms
+            cards_changed = (cards_changed or recategorized or self.cards[path] != old_card
+                             or old.topic_key[:1] != new.topic_key[:1] or self.search[path] != old_terms)
+            touched.append(new.slug)
+        if structural:
+            self.reindex()
+            return range(len(self.pages)), cards_changed
+        candidates = set()
+        for slug in touched:
+            i = self.positions[slug]
+            self.pages[i] = self.records[self.pages[i].path]
+            candidates.add(i)
+            candidates.update(self.shown_in.get(i, ()))
+        return sorted(candidates), cards_changed
+
+    def render(self, candidates):
+        """Re-render stale candidates and prune deleted pages; returns (rendered, removed)."""
+        rendered = []
+        for i in candidates:
+            page = self.pages[i]
+            related = [self.pages[j] for j in self.related[i]]
+            rel_hash = related_hash(related)
+            manifest = {'template_version': self.tmpl_version}
+            if rebuild_reason(page, self.entries.get(page.slug), self.tmpl_version, rel_hash, manifest) is None:
+                continue
+            write_page(page, related)
+            self.entries[page.slug] = {'input': page.source_hash, 'related': rel_hash}
+            rendered.append(page.slug)
+        removed = [slug for slug in self.entries if slug not in self.positions]
+        for slug in removed:
+            del self.entries[slug]
+            shutil.rmtree(DIST_DIR / slug, ignore_errors=True)
+        if rendered or removed:
+            write_manifest(self.tmpl_version, self.entries)
+        return rendered, removed
+
+    def write_hub(self):
+        paths = sorted(self.cards)
+        self.hub.write_hub([self.records[p] for p in paths], [self.cards[p] for p in paths],
+                           [self.search[p] for p in paths])
+
+    def write_sitemap(self):
+        paths = sorted(self.sitemap)
+        urls = site_sitemap.sitemap_urls([self.sitemap[p] for p in paths], [self.records[p] for p in paths],
+                                         SRC_DIR, BLOG_DIR)
+        site_sitemap.write_sitemap(DIST_DIR / "sitemap.xml", urls)
+
+def main_watch(args):
+    hub = load_script("generate-knowledge-hub")
+    blog = load_script("generate-blog")
+    corpus = WatchedCorpus(hub, template_version())
+
+    # Catch up once, like an incremental npm run build without the optimize step
+    corpus.write_hub()
+    site_images.build_variants()
+    blog.main()
+    prepare_dist(incremental=True)
+    rendered, removed = corpus.render(range(len(corpus.pages)))
+    corpus.write_sitemap()
+    print(f"✓ Initial build: {len(rendered)} pages rendered, {len(corpus.pages) - len(rendered)} unchanged, {len(removed)} removed.")
+
+    # Fingerprinted URLs baked into the compiled templates at import time
+    fragments = "".join(site_templates.FRAGMENTS.values())
+    template_assets = {url: target for url, target in site_cache.fingerprints().items() if target in fragments}
+    page_scan = scan_tree(PAGES_DIR, ".json")
+    blog_scan = scan_tree(BLOG_DIR, ".md")
+    static_scan = {}
+    for directory in STATIC_DIRS:
+        static_scan.update(scan_tree(directory))
+    print("Watching content/pages, content/blog, src/ and public/images (Ctrl+C to stop; restart after editing the build scripts)...")
+    try:
+        while True:
+            time.sleep(args.interval)
+            started = time.perf_counter()
+            done = []
+            # The hub and blog are generated into src/; dist/ gets them this tick
+            src_written = False
+
+            now = scan_tree(PAGES_DIR, ".json")
+            changed, removed = diff_scan(page_scan, now)
+            page_scan = now
+            if changed or removed:
+                candidates, cards_changed = corpus.update([Path(p) for p in changed], [Path(p) for p in removed])
+                rendered, pruned = corpus.render(candidates)
+                done.append(f"{len(rendered)} pages rendered" + (f", {len(pruned)} removed" if pruned else ""))
+                if cards_changed:
+                    corpus.write_hub()
+                    src_written = True
+                    done.append("hub")
+
+            now = scan_tree(BLOG_DIR, ".md")
+            blog_changed = now != blog_scan
+            blog_scan = now
+            if blog_changed:
+                blog.main()
+                src_written = True
+                done.append("blog")
+
+            now = {}
+            for directory in STATIC_DIRS:
+                now.update(scan_tree(directory))
+            if now != static_scan or src_written:
+                touched = sum(diff_scan(static_scan, now), [])
+                image_roots = [root for root, _ in site_cache.STATIC_DIRS]
+                if any(Path(p).is_relative_to(root) for p in touched for root in image_roots):
+                    # New variants and fingerprints; the blog embeds both
+                    _, encoded = site_images.build_variants()
+                    site_cache.fingerprints.cache_clear()
+                    blog.main()
+                    done.append(f"images ({encoded} re-encoded), blog")
+                    if any(site_cache.asset_url(url) != target for url, target in template_assets.items()):
+                        print("  ! an image the shared templates embed changed; restart --watch to re-render every page")
+                # Same steps as a build: sync, variants, fingerprinted copies, rewritten static pages
+                synced = prepare_dist(incremental=True)
+                done.append(f"{synced['copied'] + synced['linked']} assets synced, {synced['removed']} removed")
+            static_scan = now
+
+            if done:
+                corpus.write_sitemap()
+                done.append("sitemap")
+                print(f"  ↻ {', '.join(done)} ({time.perf_counter() - started:.2f}s)")
+    except KeyboardInterrupt:
+        print("\nStopped watching.")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--incremental", action="store_true",
+                        help="only re-render pages whose inputs or related links changed since the last build")
+    parser.add_argument("--jobs", "-j", type=int, default=1, metavar="N",
+                        help="render pages in N worker processes (0 = one per CPU core)")
+    parser.add_argument("--related", choices=("category", "similarity", "balanced"), default="category",
+                        help="pick related guides by category rotation, by ingredient/summary similarity, or by "
+                             "similarity rebalanced so incoming links spread evenly (the last two need numpy)")
+    parser.add_argument("--stream", action="store_true",
+                        help="two-pass streaming build with a bounded per-page memory overhead, for very large corpora")
+    parser.add_argument("--abort-above-rss", type=int, default=512, metavar="MB",
+                        help="abort a --stream build once peak RSS exceeds this many MB; "
+                             "memory is not held under it (default: 512)")
+    parser.add_argument("--watch", action="store_true",
+                        help="build once, then poll content/, src/ and public/images and rebuild only what changed")
+    parser.add_argument("--interval", type=float, default=0.25, metavar="SECONDS",
+                        help="--watch polling interval (default: 0.25)")
+    args = parser.parse_args(argv)
+    if args.related != "category" and not related_similarity.available():
+        parser.error(f"--related {args.related} requires numpy (run: pip install numpy)")
+    if args.watch and (args.stream or args.jobs != 1 or args.related != "category"):
+        parser.error("--watch keeps a category-based corpus in one process; "
+                     "it can't be combined with --stream, --jobs or --related similarity/balanced")
+    if args.stream and (args.incremental or args.jobs != 1 or args.related != "category"):
+        parser.error("--stream builds everything in one process with category-based related links; "
+                     "it can't be combined with --incremental, --jobs or --related similarity/balanced")
+    return args
+
+def sync_static():
+    return asset_sync.sync_trees(
+        [(SRC_DIR, ""), (ROOT / "public" / "images", "images")],
+        DIST_DIR, SYNC_MANIFEST_PATH)
+
+@build_trace.traced()
+def prepare_dist(incremental):
+    """Start dist/ (from scratch unless incremental) and fill in static assets."""
+    # Sync src/ (homepage, knowledge-hub, static pages, img, etc.) and public
+    # images (blog assets and other runtime static image paths) into dist/;
+    # incremental builds only touch files whose source changed.
+    if not incremental and DIST_DIR.exists():
         shutil.rmtree(DIST_DIR)
-    shutil.copytree(SRC_DIR, DIST_DIR)
+    synced = sync_static()
+
+    # Shared, content-hashed CSS/JS referenced by every generated page
+    site_assets.write_bundles(DIST_DIR)
+    # Responsive image variants (scripts/optimize-images.py), fingerprinted
+    # copies of the static images, _headers, and the copied static pages
+    # pointed at both
+    site_images.publish(DIST_DIR)
+    site_cache.publish(DIST_DIR)
+    rewrite_static_pages()
+    return synced
+
+def rewrite_static_pages():
+    """Rewrite dist's copies of the hand-written src/ pages: responsive,
+    fingerprinted images and inline icons.
+
+    Always starts from the source file, so new variants or hashes replace
+    markup from an earlier build.
+    """
+    images = site_images.load_index()
+    for url, path in site_images.static_pages(SRC_DIR):
+        source = path.read_text(encoding="utf-8")
+        page, unknown = site_icons.inline_icons(source)
+        if unknown:
+            print(f"Warning: {path.relative_to(ROOT)} uses icons not in scripts/site_icons.py: {', '.join(unknown)}")
+        page = site_cache.rewrite_urls(site_images.rewrite_imgs(page, url, images), url)
+        if page != source:
+            (DIST_DIR / url.strip("/") / "index.html").write_text(page, encoding="utf-8")
 
-    # Copy public images (blog assets and other runtime static image paths)
-    public_images = ROOT / "public" / "images"
-    if public_images.exists():
-        shutil.copytree(public_images, DIST_DIR / "images", dirs_exist_ok=True)
+def main_stream(args):
+    with build_trace.span("index_corpus"):
+        corpus = StreamingCorpus()
+    print(f"✓ Indexed {len(corpus)} pages (peak RSS {peak_rss_mb():.0f} MB).")
+    prepare_dist(incremental=False)
+    try:
+        built_count = stream_pages(corpus, template_version(), args.abort_above_rss)
+    finally:
+        corpus.close()
+    by_category = corpus.index['by_category']
+    print(f"✓ Built {built_count} programmatic SEO pages with related content links (streaming, peak RSS {peak_rss_mb():.0f} MB).")
+    print(f"✓ Categories: {', '.join(f'{k}({len(v)})' for k, v in by_category.items() if v)}")
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    if args.stream:
+        main_stream(args)
+        return
+    if args.watch:
+        main_watch(args)
+        return
+
+    build_pages(load_all_pages(), args)
+
+def balance_related(related_lists, candidates, categories):
+    """related_balance.balance(), printing the link distribution before and after."""
+    started = time.perf_counter()
+    before = related_balance.summarize(related_lists)
+    related_lists, swaps, rounds = related_balance.balance(related_lists, candidates, categories)
+    after = related_balance.summarize(related_lists)
+    print(f"✓ Balanced related links: {swaps} swaps in {rounds} rounds ({time.perf_counter() - started:.2f}s).")
+    for label, key in (("in-degree min", "in_min"), ("in-degree max", "in_max"),
+                       ("PageRank max", "pagerank_max"), ("PageRank Gini", "gini")):
+        print(f"    {label:<14} {before[key]:>6.4g} → {after[key]:.4g}")
+    return related_lists
+
+def build_pages(all_pages, args):
+    """Render all_pages into dist/ as parsed args (--incremental, --jobs, --related) say.
+
+    Returns the build state, including the corpus index and any precomputed
+    related lists, so callers can reuse the related-link graph.
+    """
+    page_categories = categorize_pages(all_pages)
+    tmpl_version = template_version()
+    manifest = load_manifest() if args.incremental else {}
+    previous = manifest.get('pages', {})
+    
+    synced = prepare_dist(args.incremental)
     
     # Build each programmatic page
+    corpus_index = build_corpus_index(all_pages)
+    related_lists = None
+    if args.related in ("similarity", "balanced"):
+        # Score the whole corpus in one matrix pass before fanning out
+        candidates = related_similarity.candidate_indexes(all_pages, 6 * 4)
+        related_lists = related_similarity.related_indexes(all_pages, corpus_index['category'], 6,
+                                                           candidates=candidates)
+        if args.related == "balanced":
+            related_lists = balance_related(related_lists, candidates, corpus_index['category'])
+    state = {
+        'all_pages': all_pages,
+        'page_categories': page_categories,
+        'corpus_index': corpus_index,
+        'related_lists': related_lists,
+        'incremental': args.incremental,
+        'manifest': manifest,
+        'template_version': tmpl_version,
+    }
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    chunks = chunk_bounds(len(all_pages), jobs)
+    if jobs > 1 and len(chunks) > 1:
+        with ProcessPoolExecutor(max_workers=jobs, initializer=init_build_state, initargs=(state,)) as pool:
+            chunk_results = list(pool.map(build_chunk, chunks))
+    else:
+        init_build_state(state)
+        chunk_results = [build_chunk(bounds) for bounds in chunks]
+
     built_count = 0
-    for page in all_pages:
-        page_dir = DIST_DIR / page['slug']
-        page_dir.mkdir(parents=True, exist_ok=True)
-        
-        # Get related pages
-        related = get_related_pages(page, page_categories, all_pages, 6)
-        
-        # Build and write HTML
-        html = build_page_html(page['full_data'], related)
-        (page_dir / "index.html").write_text(html, encoding="utf-8")
-        built_count += 1
-    
-    print(f"✓ Built {built_count} programmatic SEO pages with related content links.")
+    reasons = {}
+    entries = {}
+    for results in chunk_results:
+        for slug, entry, reason in results:
+            entries[slug] = entry
+            if reason is not None:
+                reasons[slug] = reason
+                built_count += 1
+
+    # Drop outputs of pages that no longer exist in content/pages
+    removed = [slug for slug in previous if slug not in entries]
+    for slug in removed:
+        shutil.rmtree(DIST_DIR / slug, ignore_errors=True)
+
+    write_manifest(tmpl_version, entries)
+
+    if args.incremental:
+        for slug, reason in sorted(reasons.items()):
+            print(f"  rebuilt {slug}: {reason}")
+        for slug in removed:
+            print(f"  removed {slug}: page deleted")
+        print(f"✓ Incremental build: {built_count} rebuilt, {len(all_pages) - built_count} unchanged, {len(removed)} removed.")
+        print(f"✓ Assets: {synced['copied']} copied, {synced['linked']} linked, {synced['unchanged']} unchanged, {synced['removed']} removed.")
+    else:
+        print(f"✓ Built {built_count} programmatic SEO pages with related content links.")
     print(f"✓ Each page links to up to 6 related guides for better internal linking.")
     print(f"✓ Categories: {', '.join(f'{k}({len(v)})' for k, v in page_categories.items() if v)}")
+    return state
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""Build the whole site in one process, parsing content/pages only once.
+
+Runs the same stages as the individual scripts, in the same order, but feeds
+them all from one validated corpus (scripts/site_corpus.py):
+
+  knowledge hub   generate-knowledge-hub.py's sharded hub, from the corpus cards
+  images          optimize-images.py's responsive variants
+  blog            generate-blog.py
+  pages           build-pages.py's renderer (--incremental/--jobs/--related)
+  sitemap         generate-sitemap.py's sitemap (index), from the corpus lastmod entries
+  links           verify-links.py's analysis, from the related-link graph
+  optimize        optimize-dist.py (minify, + .gz/.br with --precompress)
+
+Each of those scripts still runs on its own. With --store, pages that differ
+in the SQLite content store (scripts/content_store.py) are exported to
+content/pages first.
+"""
+import argparse
+import importlib.util
+import sys
+from pathlib import Path
+
+import content_store
+import site_corpus
+import site_images
+import site_sitemap
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+
+
+def load_script(name):
+    """Import a sibling script with a hyphenated file name, e.g. build-pages."""
+    spec = importlib.util.spec_from_file_location(name.replace("-", "_"), SCRIPTS_DIR / f"{name}.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def incoming_links(pages, state, select_related):
+    """slug -> number of other pages whose related cards link to it."""
+    corpus_index = state['corpus_index']
+    related_lists = state['related_lists']
+    positions = corpus_index['positions']
+    sources = {page.slug: set() for page in pages}
+    for page in pages:
+        position = positions[page.slug]
+        picks = related_lists[position] if related_lists is not None else select_related(corpus_index, position, 6)
+        for i in picks:
+            if pages[i].slug != page.slug:
+                sources[pages[i].slug].add(page.slug)
+    return {slug: len(linking) for slug, linking in sources.items()}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--incremental", action="store_true",
+                        help="only re-render pages whose inputs or related links changed since the last build")
+    parser.add_argument("--jobs", "-j", type=int, default=1, metavar="N",
+                        help="worker processes for page rendering and optimization (0 = one per CPU core)")
+    parser.add_argument("--related", choices=("category", "similarity", "balanced"), default="category",
+                        help="how related guides are picked (see build-pages.py)")
+    parser.add_argument("--link-report", action="store_true",
+                        help="print verify-links.py's full report instead of a one-line summary")
+    parser.add_argument("--no-optimize", action="store_true", help="skip minification and precompression")
+    parser.add_argument("--precompress", action="store_true",
+                        help="write .gz/.br siblings (off by default: Cloudflare compresses responses itself)")
+    parser.add_argument("--store", type=Path, metavar="DB",
+                        help="export changed pages from this content store before building")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    build = load_script("build-pages")
+    build_args = build.parse_args(
+        (["--incremental"] if args.incremental else []) + ["--jobs", str(args.jobs), "--related", args.related])
+    hub = load_script("generate-knowledge-hub")
+    blog = load_script("generate-blog")
+
+    if args.store:
+        with content_store.ContentStore(args.store) as store:
+            try:
+                written, _ = store.export_dir(build.PAGES_DIR)
+            except content_store.ExportConflict as e:
+                print(f"Error: {e}. Run scripts/content-store.py import (or export --force) first.")
+                sys.exit(1)
+        print(f"✓ Exported {written} changed pages from {args.store}")
+
+    corpus = site_corpus.load_corpus(build.PAGES_DIR, build.EXCLUDED)
+    if corpus.problems:
+        for name, problem in corpus.problems:
+            print(f"Error: {name}: {problem}")
+        sys.exit(1)
+    print(f"✓ Loaded and validated {len(corpus.pages)} programmatic pages.")
+
+    shards, changed, removed = hub.write_hub(corpus.pages, corpus.cards, corpus.search)
+    print(f"Generated knowledge hub with {len(corpus.cards)} pages in {shards} shards "
+          f"({changed} changed, {removed} removed): {hub.HUB_DIR}")
+
+    images, encoded = site_images.build_variants(args.jobs or None)
+    print(f"✓ Responsive images: {images} sources, {encoded} re-encoded"
+          + ("." if site_images.Image else " (install Pillow for resized variants)."))
+
+    blog.main()
+
+    state = build.build_pages(corpus.pages, build_args)
+
+    urls = site_sitemap.sitemap_urls(corpus.sitemap, corpus.pages, build.SRC_DIR, build.BLOG_DIR)
+    files, written = site_sitemap.write_sitemap(build.DIST_DIR / "sitemap.xml", urls)
+    print(f"✓ Wrote sitemap: {build.DIST_DIR / 'sitemap.xml'} ({len(urls)} urls"
+          + (f" in {files} shards, {written} rewritten)" if files > 1 else ")"))
+
+    incoming = incoming_links(corpus.pages, state, build.select_related)
+    hub_slugs = {card[0] for card in corpus.cards}
+    kb_links = sum(1 for page in corpus.pages if page.slug in hub_slugs)
+    if args.link_report:
+        print()
+        load_script("verify-links").print_report(corpus.pages, incoming, kb_links)
+        print()
+    else:
+        well_linked = sum(1 for page in corpus.pages if incoming[page.slug] + 1 >= 3)
+        print(f"✓ Links: {well_linked}/{len(corpus.pages)} pages have 3+ internal links (--link-report for details).")
+
+    if not args.no_optimize:
+        load_script("optimize-dist").main(["--quiet", "--jobs", str(args.jobs)] + (["--precompress"] if args.precompress else []))
+
+
+if __name__ == "__main__":
+    main()
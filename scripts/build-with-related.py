@@ -5,24 +5,14 @@ import json
 import shutil
 from pathlib import Path
 
+from site_categories import CATEGORIES, categorize_page
+
 ROOT = Path(__file__).resolve().parent.parent
 DATA_PATH = ROOT / "data" / "programmatic-pages.json"
 PAGES_DIR = ROOT / "content" / "pages"
 DIST_DIR = ROOT / "dist"
 SEO_DIR = DIST_DIR / "seo"
 
-# Categories for related content
-CATEGORIES = {
-    'sauces': [],
-    'noodles': [],
-    'breakfast': [],
-    'meals': [],
-    'bread_baked': [],
-    'asian': [],
-    'condiments': [],
-    'other': []
-}
-
 def load_all_pages():
     """Load all programmatic pages for related content."""
     pages = []
@@ -34,35 +24,11 @@ def load_all_pages():
             'slug': data.get('slug', f.stem),
             'title': data.get('heading', data.get('title', '')),
             'topic_key': data.get('topic_key', ''),
+            'category': data.get('category'),
             'description': data.get('verdict', {}).get('summary', data.get('description', ''))
         })
     return pages
 
-def categorize_page(page):
-    """Determine the category for a page."""
-    topic = page['topic_key'].lower()
-    title = page['title'].lower()
-    
-    if 'sauce' in topic or 'sauce' in title:
-        return 'sauces'
-    elif any(x in topic for x in ['noodle', 'vermicelli', 'pasta', 'tortilla', 'wrapper', 'dumpling', 'spring-roll']):
-        return 'noodles'
-    elif any(x in topic for x in ['egg', 'pancake', 'waffle', 'bacon', 'oat', 'hash-brown', 'omelette']):
-        return 'breakfast'
-    elif any(x in topic for x in ['bread', 'bagel', 'croissant', 'pretzel', 'matzo', 'crumb']):
-        return 'bread_baked'
-    elif any(x in topic for x in ['miso', 'ramen', 'pho', 'pad-thai', 'teriyaki', 'sushi', 'tempura', 
-                                   'kimchi', 'gochujang', 'hoisin', 'oyster', 'soy', 'tamari', 
-                                   'tempeh', 'edamame']):
-        return 'asian'
-    elif any(x in topic for x in ['vinegar', 'mustard', 'ketchup', 'mayonnaise', 'tzatziki']):
-        return 'condiments'
-    elif any(x in topic for x in ['stir-fry', 'curry', 'chicken', 'meatball', 'sausage', 
-                                   'nugget', 'fish-and-chips', 'sweet-and-sour', 'stuffing']):
-        return 'meals'
-    else:
-        return 'other'
-
 def categorize_pages(all_pages):
     """Organize pages into categories."""
     categories = {k: [] for k in CATEGORIES.keys()}
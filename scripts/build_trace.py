@@ -0,0 +1,169 @@
+"""Opt-in phase tracing for the build scripts.
+
+Set BUILD_TRACE to a directory to turn it on:
+
+    BUILD_TRACE=traces npm run build
+
+Each script then writes traces/<script>.trace.json (Chrome trace-event format;
+open it in chrome://tracing or https://ui.perfetto.dev) and a plain-text
+traces/<script>.summary.txt with per-span totals, the slowest individual
+pages and the tracemalloc peak. Process-pool workers buffer their own spans
+and hand them over with flush(); the main process merges them on exit.
+
+With BUILD_TRACE unset, traced() returns the function untouched and span()
+returns a shared no-op context manager, so the instrumentation costs nothing.
+"""
+import atexit
+import contextlib
+import functools
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+
+TRACE_DIR = os.environ.get("BUILD_TRACE")
+SESSION = None
+if TRACE_DIR is not None:
+    # A script's main process starts a session; its pool workers inherit it
+    if multiprocessing.parent_process() is None:
+        os.environ["BUILD_TRACE_SESSION"] = str(os.getpid())
+    SESSION = os.environ["BUILD_TRACE_SESSION"]
+SCRIPT = Path(sys.argv[0]).stem or "python"
+OUTLIERS = 5
+
+_events = []
+_lock = threading.Lock()
+_NOOP = contextlib.nullcontext()
+
+
+def enabled():
+    return TRACE_DIR is not None
+
+
+def _now_us():
+    return time.perf_counter_ns() // 1000
+
+
+class _Span:
+    __slots__ = ("name", "args", "start")
+
+    def __init__(self, name, args):
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = _now_us()
+        return self
+
+    def __exit__(self, *exc):
+        end = _now_us()
+        event = {"name": self.name, "ph": "X", "ts": self.start, "dur": end - self.start,
+                 "pid": os.getpid(), "tid": threading.get_native_id()}
+        if self.args:
+            event["args"] = self.args
+        with _lock:
+            _events.append(event)
+            if not self.args:
+                # Phase-level span: sample traced memory for a counter track
+                current, peak = tracemalloc.get_traced_memory()
+                _events.append({"name": "tracemalloc", "ph": "C", "ts": end, "pid": os.getpid(),
+                                "args": {"current_mb": round(current / 1048576, 2), "peak_mb": round(peak / 1048576, 2)}})
+        return False
+
+
+def span(name, **args):
+    """Context manager timing one span; keyword args (e.g. slug=) mark a per-item span."""
+    if TRACE_DIR is None:
+        return _NOOP
+    return _Span(name, args)
+
+
+def traced(name=None, label=None):
+    """Decorator recording a span per call.
+
+    label(*args, **kwargs) may return the page slug the call works on; it
+    marks the span as per-page, so it shows up in the outlier list.
+    """
+    def decorate(fn):
+        if TRACE_DIR is None:
+            return fn
+        span_name = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            span_args = {"slug": label(*args, **kwargs)} if label else {}
+            with _Span(span_name, span_args):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def _part_path(pid):
+    return Path(TRACE_DIR) / f".{SCRIPT}.{SESSION}.{pid}.part"
+
+
+def flush():
+    """Append this process's spans to its part file (called by pool workers)."""
+    if TRACE_DIR is None:
+        return
+    pid = os.getpid()
+    with _lock:
+        # Forked workers inherit the parent's buffer; only ship their own spans
+        mine = [e for e in _events if e["pid"] == pid]
+        _events.clear()
+    if mine:
+        with _part_path(pid).open("a", encoding="utf-8") as f:
+            for event in mine:
+                f.write(json.dumps(event) + "\n")
+
+
+def summarize(events, peak_bytes):
+    spans = {}
+    for e in events:
+        if e["ph"] == "X":
+            spans.setdefault(e["name"], []).append(e)
+    wall = (max(e["ts"] + e["dur"] for e in events if e["ph"] == "X") - min(e["ts"] for e in events)) / 1e6 if spans else 0.0
+    lines = [f"{SCRIPT}: {wall:.3f}s traced, tracemalloc peak {peak_bytes / 1048576:.1f} MB (main process)", ""]
+    lines.append(f"  {'span':<28}{'calls':>8}{'total s':>11}{'mean ms':>10}{'max ms':>10}")
+    for span_name, items in sorted(spans.items(), key=lambda kv: -sum(e["dur"] for e in kv[1])):
+        total = sum(e["dur"] for e in items)
+        lines.append(f"  {span_name:<28}{len(items):>8}{total / 1e6:>11.3f}{total / len(items) / 1e3:>10.2f}"
+                     f"{max(e['dur'] for e in items) / 1e3:>10.2f}")
+    for span_name, items in sorted(spans.items()):
+        labelled = [e for e in items if e.get("args")]
+        if len(labelled) < 2:
+            continue
+        lines.append("")
+        lines.append(f"  Slowest {span_name}:")
+        for e in sorted(labelled, key=lambda e: -e["dur"])[:OUTLIERS]:
+            detail = ", ".join(f"{k}={v}" for k, v in e["args"].items())
+            lines.append(f"    {e['dur'] / 1e3:8.2f} ms  {detail}")
+    return "\n".join(lines) + "\n"
+
+
+def _write():
+    if SESSION != str(os.getpid()):
+        return  # only the process that started the session writes the files
+    trace_dir = Path(TRACE_DIR)
+    events = list(_events)
+    for part in sorted(trace_dir.glob(f".{SCRIPT}.{SESSION}.*.part")):
+        events.extend(json.loads(line) for line in part.read_text(encoding="utf-8").splitlines() if line)
+        part.unlink()
+    _, peak = tracemalloc.get_traced_memory()
+    names = [{"name": "process_name", "ph": "M", "pid": pid, "args": {"name": f"{SCRIPT} ({'main' if str(pid) == SESSION else 'worker'} {pid})"}}
+             for pid in sorted({e["pid"] for e in events})]
+    (trace_dir / f"{SCRIPT}.trace.json").write_text(
+        json.dumps({"traceEvents": names + events, "displayTimeUnit": "ms"}) + "\n", encoding="utf-8")
+    summary = summarize(events, peak)
+    (trace_dir / f"{SCRIPT}.summary.txt").write_text(summary, encoding="utf-8")
+    print(f"✓ Trace written to {trace_dir / (SCRIPT + '.trace.json')}", file=sys.stderr)
+
+
+if TRACE_DIR is not None:
+    Path(TRACE_DIR).mkdir(parents=True, exist_ok=True)
+    tracemalloc.start()
+    atexit.register(_write)
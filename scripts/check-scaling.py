@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""Check the build's scaling claims on scaled-down synthetic corpora.
+
+Each check runs the real code at two corpus sizes and fails (exit 1) if the
+cost per extra page is above its budget. That keeps claims like "streaming
+memory grows by a few dozen bytes per page" verified without a 1M-page run.
+
+  stream-memory   peak RSS of build-pages.py --stream. Pass one keeps about
+                  20 bytes of arrays per page plus the sorted list of file
+                  names; the budget is STREAM_BYTES_PER_PAGE. The 1M-page
+                  peak is extrapolated from the measurements.
+  related         build_corpus_index plus select_related for every page of
+                  an in-memory corpus. Each pick is O(count), so the total
+                  grows linearly; the budget is RELATED_MICROSECONDS_PER_PAGE,
+                  far below what rescanning the corpus per page would cost.
+
+Corpora come from benchmark-build.py's generator, in throwaway workspaces
+when a check needs files on disk.
+"""
+import argparse
+import importlib.util
+import random
+import shutil
+import sys
+import time
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+
+# Extra peak RSS allowed per extra page for build-pages.py --stream
+STREAM_BYTES_PER_PAGE = 400
+STREAM_SIZES = (10000, 40000)
+PROJECT_TO = 1_000_000
+# Extra time allowed per extra page for indexing and picking related pages
+RELATED_MICROSECONDS_PER_PAGE = 60
+RELATED_SIZES = (20000, 100000)
+
+
+def load_script(name):
+    """Import a sibling script with a hyphenated file name, e.g. benchmark-build."""
+    spec = importlib.util.spec_from_file_location(name.replace("-", "_"), SCRIPTS_DIR / f"{name}.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def check_growth(label, sizes, values, budget, unit, scale=1.0):
+    """Print the measurements; returns True if (value growth) / (size growth) <= budget."""
+    (small, large), (low, high) = sizes, values
+    per_page = (high - low) * scale / (large - small)
+    ok = per_page <= budget
+    print(f"{'✓' if ok else '✗'} {label}: {low:.1f} → {high:.1f} for {small} → {large} pages, "
+          f"{per_page:.0f} {unit} per extra page (budget {budget})")
+    return ok, per_page
+
+
+def check_stream_memory(bench, sizes, workdir):
+    python = sys.executable
+    peaks = []
+    for pages in sizes:
+        workspace = bench.make_workspace(workdir)
+        try:
+            bench.write_corpus(workspace, pages, 0)
+            _, rss, _ = bench.run_stage(
+                [python, str(workspace / "scripts" / "build-pages.py"), "--stream", "--abort-above-rss", "4096"], workspace)
+            peaks.append(rss)
+        finally:
+            shutil.rmtree(workspace, ignore_errors=True)
+    ok, per_page = check_growth("stream-memory: peak RSS (MB)", sizes, peaks, STREAM_BYTES_PER_PAGE, "bytes",
+                                scale=1024 * 1024)
+    projected = peaks[-1] + per_page * (PROJECT_TO - sizes[-1]) / (1024 * 1024)
+    print(f"  projected peak at {PROJECT_TO} pages: {projected:.0f} MB")
+    return ok
+
+
+def check_related(bench, sizes, workdir):
+    build = load_script("build-pages")
+    seconds = []
+    for pages in sizes:
+        rng = random.Random(0)
+        records = [bench.synthetic_page(i, rng) for i in range(pages)]
+        # Categories are memoised per topic; start each size cold
+        build.site_categories._classify_cached.cache_clear()
+        start = time.perf_counter()
+        corpus_index = build.build_corpus_index(records)
+        for current in range(pages):
+            build.select_related(corpus_index, current)
+        seconds.append(time.perf_counter() - start)
+    ok, _ = check_growth("related: index + select_related (s)", sizes, seconds, RELATED_MICROSECONDS_PER_PAGE,
+                         "µs", scale=1e6)
+    return ok
+
+
+CHECKS = {
+    "stream-memory": (check_stream_memory, STREAM_SIZES),
+    "related": (check_related, RELATED_SIZES),
+}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("checks", nargs="*", metavar="CHECK",
+                        help=f"checks to run: {', '.join(CHECKS)} (default: all)")
+    parser.add_argument("--sizes", help="two comma-separated corpus sizes instead of each check's default")
+    parser.add_argument("--workdir", type=Path, default=None, help="parent directory for workspaces")
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.checks if name not in CHECKS]
+    if unknown:
+        parser.error(f"unknown check(s): {', '.join(unknown)}")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    bench = load_script("benchmark-build")
+    failed = []
+    for name in args.checks or list(CHECKS):
+        check, sizes = CHECKS[name]
+        if args.sizes:
+            sizes = tuple(int(s) for s in args.sizes.split(","))
+        if not check(bench, sizes, args.workdir):
+            failed.append(name)
+    if failed:
+        print(f"✗ Failed: {', '.join(failed)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""Manage the optional SQLite content store (scripts/content_store.py).
+
+  import   copy new/changed content/pages/*.json into the store
+  export   write store pages whose JSON file is missing or differs (refuses
+           to overwrite files edited since the last import; see --force)
+  query    list slugs by category, verdict status, topic or updated_at
+  stats    page counts per category and status
+
+Examples:
+
+  python3 scripts/content-store.py import --prune
+  python3 scripts/content-store.py query --category sauces --status caution
+  python3 scripts/content-store.py query --updated-after 2025-06-01
+"""
+import argparse
+import sys
+from pathlib import Path
+
+import content_store
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", type=Path, default=content_store.STORE_PATH,
+                        help=f"store file (default: {content_store.STORE_PATH.relative_to(content_store.ROOT)})")
+    parser.add_argument("--pages-dir", type=Path, default=content_store.PAGES_DIR, help="JSON page directory")
+    commands = parser.add_subparsers(dest="command", required=True)
+    for name, what in (("import", "store pages whose JSON file was deleted"),
+                       ("export", "JSON files with no page in the store")):
+        command = commands.add_parser(name)
+        command.add_argument("--prune", action="store_true", help=f"also delete {what}")
+        if name == "export":
+            command.add_argument("--force", action="store_true",
+                                 help="overwrite files that changed on disk since the last import/export")
+    query = commands.add_parser("query")
+    query.add_argument("--category")
+    query.add_argument("--status", help="verdict.status, e.g. safe, caution or unsafe")
+    query.add_argument("--topic-key")
+    query.add_argument("--updated-after", metavar="YYYY-MM-DD")
+    query.add_argument("--updated-before", metavar="YYYY-MM-DD")
+    query.add_argument("--paths", action="store_true", help="print JSON file paths instead of slugs")
+    commands.add_parser("stats")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    with content_store.ContentStore(args.db) as store:
+        if args.command == "import":
+            imported, removed, problems = store.import_dir(args.pages_dir, prune=args.prune)
+            for name, problem in problems:
+                print(f"Warning: skipped {name}: {problem}")
+            print(f"✓ Imported {imported} changed pages, removed {len(removed)} ({len(store)} in {args.db})")
+        elif args.command == "export":
+            try:
+                written, removed = store.export_dir(args.pages_dir, prune=args.prune, force=args.force)
+            except content_store.ExportConflict as e:
+                sys.exit(f"Error: {e}. Import them first, or export --force to overwrite them.")
+            print(f"✓ Exported {written} changed pages, removed {len(removed)} files ({args.pages_dir})")
+        elif args.command == "query":
+            for slug in store.query(category=args.category, status=args.status, topic_key=args.topic_key,
+                                    updated_after=args.updated_after, updated_before=args.updated_before):
+                print(args.pages_dir / f"{slug}.json" if args.paths else slug)
+        else:
+            print(f"{len(store)} pages in {args.db}")
+            for column in ("category", "status"):
+                print(f"\nBy {column}:")
+                for value, count in store.counts(column).items():
+                    print(f"  {value or '(none)':<14}{count:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+"""Optional SQLite store for the programmatic pages.
+
+content/pages/*.json stays the layout git tracks and the build reads. The
+store mirrors it in one file with indexed columns, so scripts can ask for
+"pages updated after X" or "caution pages in sauces" without scanning the
+tree (see scripts/content-store.py for the command line).
+
+Each row keeps the page file's text verbatim, so exporting reproduces the JSON
+files byte for byte. It also keeps the columns derived from the page:
+
+  slug         file name without .json (primary key)
+  topic_key    topic_key
+  title        heading, falling back to title (what categorize_page sees)
+  category     site_categories.categorize_page (honours a "category" field)
+  status       verdict.status
+  updated_at   meta.updated_at (YYYY-MM-DD, so it compares as text)
+  source_hash  sha256 of the file text, compared on import/export
+
+Categories are recomputed when site_categories.py changes.
+
+The synced table remembers each file's hash as of the last import or
+export. Export only overwrites a file that is unchanged since then. If a
+file was hand-edited, pulled or deleted on disk since then while the store
+differs, export raises ExportConflict and writes nothing; import the file
+first, or pass force=True to let the store win. save_page(), which scripts
+use to write one page to both the store and its file, checks the same way.
+"""
+import hashlib
+import json
+import sqlite3
+from pathlib import Path
+
+import site_categories
+import site_corpus
+
+ROOT = Path(__file__).resolve().parent.parent
+PAGES_DIR = ROOT / "content" / "pages"
+STORE_PATH = ROOT / "content" / "pages.sqlite"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    slug TEXT PRIMARY KEY,
+    topic_key TEXT NOT NULL,
+    title TEXT NOT NULL,
+    category TEXT NOT NULL,
+    status TEXT,
+    updated_at TEXT,
+    source_hash TEXT NOT NULL,
+    body TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS pages_topic_key ON pages (topic_key);
+CREATE INDEX IF NOT EXISTS pages_category_status ON pages (category, status);
+CREATE INDEX IF NOT EXISTS pages_status ON pages (status);
+CREATE INDEX IF NOT EXISTS pages_updated_at ON pages (updated_at);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS synced (slug TEXT PRIMARY KEY, source_hash TEXT NOT NULL);
+"""
+
+
+class ExportConflict(Exception):
+    """Export would overwrite or delete files that changed on disk since the last sync."""
+
+    def __init__(self, slugs):
+        self.slugs = slugs
+        shown = ", ".join(f"{slug}.json" for slug in slugs[:5]) + (f" and {len(slugs) - 5} more" if len(slugs) > 5 else "")
+        super().__init__(f"{len(slugs)} page files changed on disk since the last import/export: {shown}")
+
+
+def _categorizer_key():
+    return hashlib.sha256(Path(site_categories.__file__).read_bytes()).hexdigest()
+
+
+def page_text(page):
+    """A page dict as the repo writes it to content/pages."""
+    return json.dumps(page, indent=2) + "\n"
+
+
+def row_values(slug, text):
+    """The pages row for one page file's text (raises ValueError if it isn't JSON)."""
+    data = json.loads(text)
+    title = data.get('heading', data.get('title', ''))
+    topic_key = data.get('topic_key', '')
+    verdict = data.get('verdict') if isinstance(data.get('verdict'), dict) else {}
+    meta = data.get('meta') if isinstance(data.get('meta'), dict) else {}
+    category = site_categories.categorize_page({'topic_key': topic_key, 'title': title, 'category': data.get('category')})
+    source_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    return (slug, topic_key, title, category, verdict.get('status'), meta.get('updated_at'), source_hash, text)
+
+
+class ContentStore:
+    """A connection to the store; use as a context manager to close it."""
+
+    def __init__(self, path=STORE_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(self.path)
+        self.db.executescript(SCHEMA)
+        key = _categorizer_key()
+        row = self.db.execute("SELECT value FROM meta WHERE key = 'categorizer'").fetchone()
+        if row is None or row[0] != key:
+            self.recategorize(key)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def close(self):
+        self.db.close()
+
+    def recategorize(self, key):
+        rows = self.db.execute("SELECT slug, body FROM pages").fetchall()
+        with self.db:
+            self.db.executemany("UPDATE pages SET category = ? WHERE slug = ?", [
+                (row_values(slug, body)[3], slug) for slug, body in rows])
+            self.db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('categorizer', ?)", (key,))
+
+    def __contains__(self, slug):
+        return self.db.execute("SELECT 1 FROM pages WHERE slug = ?", (slug,)).fetchone() is not None
+
+    def __len__(self):
+        return self.db.execute("SELECT count(*) FROM pages").fetchone()[0]
+
+    def text(self, slug):
+        """The page's file text, or None if it isn't in the store."""
+        row = self.db.execute("SELECT body FROM pages WHERE slug = ?", (slug,)).fetchone()
+        return row[0] if row else None
+
+    def get(self, slug):
+        """The parsed page, or None if it isn't in the store."""
+        text = self.text(slug)
+        return json.loads(text) if text is not None else None
+
+    def put(self, slug, page):
+        """Insert or replace a page, serialized the way the JSON files are."""
+        self.put_text(slug, page_text(page))
+
+    def put_text(self, slug, text):
+        with self.db:
+            self.db.execute("INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?, ?)", row_values(slug, text))
+
+    def delete(self, slug):
+        with self.db:
+            self.db.execute("DELETE FROM pages WHERE slug = ?", (slug,))
+
+    def hashes(self):
+        """slug -> source_hash for every page."""
+        return dict(self.db.execute("SELECT slug, source_hash FROM pages"))
+
+    def synced_hashes(self):
+        """slug -> hash of the page file as of its last import or export."""
+        return dict(self.db.execute("SELECT slug, source_hash FROM synced"))
+
+    def _mark_synced(self, hashes, forget=()):
+        self.db.executemany("INSERT OR REPLACE INTO synced VALUES (?, ?)", hashes.items())
+        self.db.executemany("DELETE FROM synced WHERE slug = ?", [(slug,) for slug in forget])
+
+    def query(self, category=None, status=None, topic_key=None, updated_after=None, updated_before=None):
+        """Slugs matching every given filter, in slug order.
+
+        updated_after/updated_before compare against meta.updated_at
+        (exclusive); pages without it never match either.
+        """
+        where, params = [], []
+        for column, op, value in (("category", "=", category), ("status", "=", status),
+                                  ("topic_key", "=", topic_key), ("updated_at", ">", updated_after),
+                                  ("updated_at", "<", updated_before)):
+            if value is not None:
+                where.append(f"{column} {op} ?")
+                params.append(value)
+        sql = "SELECT slug FROM pages" + (" WHERE " + " AND ".join(where) if where else "") + " ORDER BY slug"
+        return [slug for (slug,) in self.db.execute(sql, params)]
+
+    def counts(self, column):
+        """{value: page count} for category or status."""
+        if column not in ("category", "status"):
+            raise ValueError(f"can't count by {column!r}")
+        return dict(self.db.execute(f"SELECT {column}, count(*) FROM pages GROUP BY {column} ORDER BY {column}"))
+
+    def import_dir(self, pages_dir=PAGES_DIR, prune=False):
+        """Copy new and changed JSON files into the store.
+
+        Unchanged files are recognised from the corpus cache's hashes, so only
+        changed ones are read. Returns (imported, removed, problems).
+        """
+        corpus = _load_corpus(pages_dir)
+        stored = self.hashes()
+        changed = [page for page in corpus.pages if stored.get(page.path.stem) != page.source_hash]
+        imported, problems = 0, corpus.invalid_json()
+        synced = {page.path.stem: page.source_hash for page in corpus.pages}
+        with self.db:
+            for page in changed:
+                try:
+                    values = row_values(page.path.stem, page.path.read_bytes().decode("utf-8"))
+                except (OSError, ValueError) as e:
+                    problems.append((page.path.name, str(e)))
+                    del synced[page.path.stem]
+                    continue
+                self.db.execute("INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?, ?)", values)
+                synced[page.path.stem] = values[6]
+                imported += 1
+            removed = []
+            if prune:
+                on_disk = {page.path.stem for page in corpus.pages} | {name[:-5] for name, _ in problems}
+                removed = sorted(slug for slug in stored if slug not in on_disk)
+                self.db.executemany("DELETE FROM pages WHERE slug = ?", [(slug,) for slug in removed])
+            self._mark_synced(synced, forget=removed)
+        return imported, removed, problems
+
+    def export_dir(self, pages_dir=PAGES_DIR, prune=False, force=False):
+        """Write pages whose JSON file is missing or differs; returns (written, removed).
+
+        Raises ExportConflict, before touching any file, if a file it would
+        overwrite or delete changed on disk since the last import or export
+        (unless force).
+        """
+        pages_dir = Path(pages_dir)
+        pages_dir.mkdir(parents=True, exist_ok=True)
+        on_disk = {page.path.stem: page.source_hash for page in _load_corpus(pages_dir).pages}
+        stored = self.hashes()
+        synced = self.synced_hashes()
+        stale = sorted(slug for slug, source_hash in stored.items() if on_disk.get(slug) != source_hash)
+        # Invalid JSON files aren't in the corpus; leave those for a human
+        removed = sorted(slug for slug in on_disk if slug not in stored) if prune else []
+        conflicts = [slug for slug in stale + removed if on_disk.get(slug) != synced.get(slug)]
+        if conflicts and not force:
+            raise ExportConflict(sorted(conflicts))
+        for slug in stale:
+            (pages_dir / f"{slug}.json").write_bytes(self.text(slug).encode("utf-8"))
+        for slug in removed:
+            (pages_dir / f"{slug}.json").unlink()
+        with self.db:
+            self._mark_synced({slug: h for slug, h in stored.items() if slug in stale or on_disk.get(slug) == h},
+                              forget=removed)
+        return len(stale), removed
+
+
+    def conflicts(self, slugs, pages_dir=PAGES_DIR):
+        """The slugs whose page file changed on disk since their last import or export."""
+        pages_dir = Path(pages_dir)
+        changed = []
+        for slug in slugs:
+            path = pages_dir / f"{slug}.json"
+            on_disk = hashlib.sha256(path.read_bytes()).hexdigest() if path.exists() else None
+            row = self.db.execute("SELECT source_hash FROM synced WHERE slug = ?", (slug,)).fetchone()
+            if on_disk != (row[0] if row else None):
+                changed.append(slug)
+        return changed
+
+    def save_page(self, slug, page, pages_dir=PAGES_DIR, force=False):
+        """Put a page in the store and write its JSON file.
+
+        Raises ExportConflict, before writing anything, if the file changed on
+        disk since the last import or export (unless force).
+        """
+        if not force and self.conflicts([slug], pages_dir):
+            raise ExportConflict([slug])
+        text = page_text(page)
+        values = row_values(slug, text)
+        path = Path(pages_dir) / f"{slug}.json"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(text.encode("utf-8"))
+        with self.db:
+            self.db.execute("INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?, ?)", values)
+            self._mark_synced({slug: values[6]})
+
+
+def _load_corpus(pages_dir):
+    # The corpus cache is only valid for the real content/pages
+    same_dir = Path(pages_dir).resolve() == PAGES_DIR
+    return site_corpus.load_corpus(pages_dir, set(), cache_path=site_corpus.CACHE_PATH if same_dir else None)
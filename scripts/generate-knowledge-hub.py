@@ -1,211 +1,294 @@
 #!/usr/bin/env python3
-"""Generate knowledge hub HTML from content/pages JSON files."""
+"""Generate the knowledge hub from content/pages JSON files.
+
+The hub is sharded so no single page grows with the corpus:
+
+  /knowledge-hub/                      all guides by title, page 1, with the
+  /knowledge-hub/page/N/               category and A–Z navigation
+  /knowledge-hub/category/<name>/      one category, paginated the same way
+  /knowledge-hub/a-z/<letter>/         guides by topic, one letter per shard
+  /knowledge-hub/search/<version>/     search index (site_search) for the
+                                       search box on every shard
+
+Shards are written one at a time as their cards stream past, and files are
+only rewritten when their HTML changed. Shards left over from a bigger
+corpus are deleted. Categories come from site_categories, like build-pages.py.
+"""
 import html as html_escape
-import json
+import math
 from pathlib import Path
 
+import build_trace
+import site_corpus
+import site_search
+from site_categories import CATEGORIES, categorize_page
+from site_templates import Template
+
 ROOT = Path(__file__).resolve().parent.parent
 PAGES_DIR = ROOT / "content" / "pages"
-OUT_PATH = ROOT / "src" / "knowledge-hub" / "index.html"
+HUB_DIR = ROOT / "src" / "knowledge-hub"
+OUT_PATH = HUB_DIR / "index.html"
+HUB_URL = "/knowledge-hub/"
 EXCLUDED = {"is-test-gluten-free", "are-test-gluten-free"}
+PAGE_SIZE = 60
+# Subdirectories of HUB_DIR that hold generated shards (pruned when stale)
+SHARD_DIRS = ("page", "category", "a-z")
+SEARCH_DIR = "search"
 
-
-def short_desc(page):
-    """Generate a short description from page data."""
-    verdict = page.get("verdict", {})
-    summary = verdict.get("summary", "")
-    if len(summary) > 80:
-        return summary[:77] + "..."
-    return summary
+CATEGORY_LABELS = {
+    'sauces': "Sauces",
+    'noodles': "Noodles & wraps",
+    'breakfast': "Breakfast",
+    'meals': "Meals",
+    'bread_baked': "Bread & baked goods",
+    'asian': "Asian dishes",
+    'condiments': "Condiments",
+    'other': "Everything else",
+}
+LETTERS = [chr(c) for c in range(ord("a"), ord("z") + 1)] + ["0-9"]
 
 
-def main():
-    files = sorted(f for f in PAGES_DIR.glob("*.json") if f.stem not in EXCLUDED)
-    pages = []
-    for f in files:
-        data = json.loads(f.read_text(encoding="utf-8"))
-        slug = data.get("slug", f.stem)
-        title = data.get("heading", data.get("title", slug.replace("-", " ").title()))
-        pages.append((slug, title, short_desc(data)))
-
-    pages.sort(key=lambda x: x[1].lower())
-
-    cards_html = "\n      ".join(
-        f'<a class="card" href="/{html_escape.escape(slug)}/"><h3>{html_escape.escape(title)}</h3><p>{html_escape.escape(desc)}</p></a>'
-        for slug, title, desc in pages
-    )
-
-    html = f'''<!doctype html>
+HUB_TEMPLATE = Template('''<!doctype html>
 <html lang="en">
 <head>
-  <!-- Google tag (gtag.js) -->
-  <script async src="https://www.googletagmanager.com/gtag/js?id=G-NFPKT4GJ0P"></script>
-  <script>
-    window.dataLayer = window.dataLayer || [];
-    function gtag(){{dataLayer.push(arguments);}}
-    gtag('js', new Date());
-  
-    gtag('config', 'G-NFPKT4GJ0P');
-  </script>
-  <!-- Google Tag Manager -->
-  <script>(function(w,d,s,l,i){{w[l]=w[l]||[];w[l].push({{'gtm.start':
-  new Date().getTime(),event:'gtm.js'}});var f=d.getElementsByTagName(s)[0],
-  j=d.createElement(s),dl=l!='dataLayer'?'&l='+l:'';j.async=true;j.src=
-  'https://www.googletagmanager.com/gtm.js?id='+i+dl;f.parentNode.insertBefore(j,f);
-  }})(window,document,'script','dataLayer','GTM-NM5CZKKT');</script>
-  <!-- End Google Tag Manager -->
+{{ analytics_head|safe }}
   <meta charset="utf-8" />
   <meta name="viewport" content="width=device-width,initial-scale=1" />
-  <title>Knowledge Hub — Is It Gluten Free? | BiteRight</title>
-  <meta name="description" content="Browse our gluten safety guides: soy sauce, teriyaki, miso, and more. Identify hidden gluten in food labels and menus." />
-  <link rel="canonical" href="https://biterightgluten.com/knowledge-hub/" />
+  <title>{{ page_title }} | BiteRight</title>
+  <meta name="description" content="{{ description }}" />
+  <link rel="canonical" href="https://biterightgluten.com{{ url }}" />
+{{ pager_links|safe }}
   <meta name="theme-color" content="#00A36F" />
-  <link rel="preconnect" href="https://fonts.googleapis.com">
-  <link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>
-  <link href="https://fonts.googleapis.com/css2?family=Nunito:wght@400;600;700;800&display=swap" rel="stylesheet">
-  <script src="https://unpkg.com/feather-icons/dist/feather.min.js"></script>
-  <style>
-    :root {{ --paper-color: #FDFBF7; --primary-teal: #00A36F; --navy: #0D1B2A; --text-body: #5F6B7A; --radius-lg: 24px; --shadow-card: 0 10px 30px rgba(13, 27, 42, 0.05); }}
-    * {{ box-sizing: border-box; }}
-    body {{ font-family: 'Nunito', sans-serif; margin: 0; background: var(--paper-color); color: var(--navy); }}
-    .container {{ max-width: 980px; margin: 0 auto; padding: 0 24px; }}
-    nav {{ display: flex; justify-content: space-between; align-items: center; padding: 24px 0; }}
-    .logo {{ font-size: 22px; font-weight: 800; color: var(--navy); display: flex; align-items: center; gap: 8px; text-decoration: none; }}
-    .logo:hover {{ color: var(--primary-teal); }}
-    .logo-mark {{ width: 32px; height: 32px; border-radius: 8px; object-fit: cover; flex-shrink: 0; }}
-    .nav-links a {{ text-decoration: none; color: var(--navy); font-weight: 700; margin-left: 20px; }}
-    .nav-links a:hover {{ color: var(--primary-teal); }}
-    .nav-kebab {{ display: none; background: none; border: none; cursor: pointer; padding: 8px; color: var(--navy); border-radius: 8px; transition: background 0.2s; }}
-    .nav-kebab:hover {{ background: rgba(0,0,0,0.05); }}
-    .nav-kebab svg {{ width: 24px; height: 24px; }}
-    .nav-menu-mobile {{ display: none; position: absolute; top: 100%; right: 0; margin-top: 8px; background: white; border-radius: 16px; box-shadow: 0 10px 40px rgba(13,27,42,0.15); padding: 12px; min-width: 200px; z-index: 100; border: 1px solid rgba(0,0,0,0.06); }}
-    .nav-menu-mobile.open {{ display: flex; flex-direction: column; gap: 4px; }}
-    .nav-menu-mobile a {{ display: block; padding: 12px 16px; text-decoration: none; color: var(--navy); font-weight: 700; font-size: 15px; border-radius: 10px; transition: background 0.2s, color 0.2s; }}
-    .nav-menu-mobile a:hover {{ background: rgba(0,163,111,0.08); color: var(--primary-teal); }}
-    .nav-wrapper {{ position: relative; }}
-    @media (max-width: 768px) {{ .nav-links {{ display: none; }} .nav-kebab {{ display: flex; align-items: center; justify-content: center; }} }}
-    h1 {{ font-size: 36px; margin: 0 0 12px; }}
-    .sub {{ color: var(--text-body); margin-bottom: 32px; }}
-    .grid {{ display: grid; grid-template-columns: repeat(auto-fill, minmax(260px, 1fr)); gap: 16px; }}
-    .card {{ background: white; border-radius: var(--radius-lg); padding: 20px; box-shadow: var(--shadow-card); text-decoration: none; color: inherit; display: block; transition: transform 0.2s, box-shadow 0.2s; }}
-    .card:hover {{ transform: translateY(-4px); box-shadow: 0 20px 40px rgba(0,163,111,0.12); }}
-    .card h3 {{ font-size: 18px; margin: 0 0 6px; color: var(--navy); }}
-    .card p {{ font-size: 14px; color: var(--text-body); margin: 0; line-height: 1.4; }}
-    .btn {{ display: inline-flex; align-items: center; gap: 8px; padding: 14px 28px; border-radius: 999px; background: var(--navy); color: #fff; text-decoration: none; font-weight: 700; margin-top: 32px; }}
-    .btn:hover {{ opacity: 0.9; }}
-    footer {{ margin-top: 60px; padding: 40px 0; border-top: 1px solid rgba(0,0,0,0.05); color: var(--text-body); font-size: 14px; }}
-    .footer-content {{ display: flex; justify-content: space-between; align-items: center; flex-wrap: wrap; gap: 16px; }}
-  </style>
+{{ head_assets|safe }}
+  <link rel="stylesheet" href="{{ hub_css_url }}" />
 </head>
 <body>
-  <!-- Google Tag Manager (noscript) -->
-  <noscript><iframe src="https://www.googletagmanager.com/ns.html?id=GTM-NM5CZKKT"
-  height="0" width="0" style="display:none;visibility:hidden"></iframe></noscript>
-  <!-- End Google Tag Manager (noscript) -->
+{{ gtm_noscript|safe }}
   <div class="container">
-    <nav>
-      <a href="/" class="logo" aria-label="BiteRight home">
-        <img class="logo-mark" src="../img/biteright-icon.png" alt="" width="32" height="32" />
-        BiteRight
-      </a>
-      <div class="nav-wrapper">
-        <div class="nav-links">
-          <a href="/#features">Features</a>
-          <a href="/#how-it-works">How it works</a>
-          <a href="/knowledge-hub/">Knowledge Hub</a>
-          <a href="/blog/">Blog</a>
-          <a href="/gluten-free-diet/">Gluten‑free diet</a>
-          <a href="/newly-diagnosed/">Newly diagnosed?</a>
-          <a href="/#faq">FAQ</a>
-        </div>
-        <button class="nav-kebab" type="button" aria-label="Open menu" aria-expanded="false" aria-haspopup="true">
-          <i data-feather="more-vertical"></i>
-        </button>
-        <div class="nav-menu-mobile" id="nav-menu-mobile">
-          <a href="/#features">Features</a>
-          <a href="/#how-it-works">How it works</a>
-          <a href="/knowledge-hub/">Knowledge Hub</a>
-          <a href="/blog/">Blog</a>
-          <a href="/gluten-free-diet/">Gluten‑free diet</a>
-          <a href="/newly-diagnosed/">Newly diagnosed?</a>
-          <a href="/#faq">FAQ</a>
-        </div>
-      </div>
-    </nav>
-    <h1>Knowledge Hub</h1>
-    <p class="sub">Is it gluten free? Browse our guides to hidden gluten in sauces, noodles, and everyday foods.</p>
+{{ nav|safe }}
+    <h1>{{ heading }}</h1>
+    <p class="sub">{{ intro }}</p>
+{{ search_box|safe }}
+{{ hub_nav|safe }}
     <div class="grid">
-      {cards_html}
+      {{ cards_html|safe }}
     </div>
+{{ pager|safe }}
     <a href="https://apps.apple.com/app/biteright-gluten-scanner/id6755896176" class="btn">
       <svg width="20" height="20" viewBox="0 0 24 24" fill="currentColor"><path d="M18.71 19.5c-.83 1.24-1.71 2.45-3.05 2.47-1.34.03-1.77-.79-3.29-.79-1.53 0-2 .77-3.27.82-1.31.05-2.3-1.32-3.14-2.53C4.25 17 2.94 12.45 4.7 9.39c.87-1.52 2.43-2.48 4.12-2.51 1.28-.02 2.5.87 3.29.87.78 0 2.26-1.07 3.81-.91.65.03 2.47.26 3.64 1.98-.09.06-2.17 1.28-2.15 3.81.03 3.02 2.65 4.03 2.68 4.04-.03.07-.42 1.44-1.38 2.83M13 3.5c.73-.83 1.94-1.46 2.94-1.5.13 1.17-.34 2.35-1.04 3.19-.69.85-1.83 1.51-2.95 1.42-.15-1.15.41-2.35 1.05-3.11z"/></svg>
       Download BiteRight — 3-day free trial. Cancel anytime.
     </a>
-    <footer>
-      <div class="footer-content">
-        <div>
-          <strong>BiteRight</strong> • Eat safely. <span style="opacity: 0.7; font-size: 13px; margin-left: 8px;">Try free for 3 days. Cancel anytime.</span>
-        </div>
-        <div style="text-align: center;">
-          Made with aroha in Aotearoa ❤️
-        </div>
-        <div>
-          © <span id="y"></span> BiteRight Inc.
-          <a href="/#privacy" style="margin-left:20px; color:inherit; text-decoration:none;">Privacy</a>
-          <a href="/#support" style="margin-left:20px; color:inherit; text-decoration:none;">Support</a>
-          <a href="https://www.instagram.com/biterightgluten" target="_blank" rel="noopener noreferrer" style="margin-left:20px; color:inherit; text-decoration:none;" aria-label="Instagram" title="Instagram"><i data-feather="instagram" style="width:20px;height:20px;vertical-align:middle;"></i></a>
-          <a href="https://www.tiktok.com/@biterightgluten" target="_blank" rel="noopener noreferrer" style="margin-left:20px; color:inherit; text-decoration:none;" aria-label="TikTok" title="TikTok"><svg viewBox="0 0 24 24" width="20" height="20" fill="currentColor" style="vertical-align: middle;"><path d="M19.59 6.69a4.83 4.83 0 0 1-3.77-4.25V2h-3.45v13.67a2.89 2.89 0 0 1-5.2 1.74 2.89 2.89 0 0 1 2.31-4.64 2.93 2.93 0 0 1 .88.13V9.4a6.84 6.84 0 0 0-1-.05A6.33 6.33 0 0 0 5 20.1a6.34 6.34 0 0 0 10.86-4.43v-7a8.16 8.16 0 0 0 4.77 1.52v-3.4a4.85 4.85 0 0 1-1-.1z"/></svg></a>
-        </div>
-      </div>
-    </footer>
+{{ footer|safe }}
   </div>
-  <script>
-    feather.replace();
-    document.getElementById("y").textContent = new Date().getFullYear();
-    (function() {{
-      var kebab = document.querySelector('.nav-kebab');
-      var menu = document.getElementById('nav-menu-mobile');
-      if (kebab && menu) {{
-        kebab.addEventListener('click', function() {{
-          var isOpen = menu.classList.toggle('open');
-          kebab.setAttribute('aria-expanded', isOpen);
-        }});
-        document.addEventListener('click', function(e) {{
-          if (!kebab.contains(e.target) && !menu.contains(e.target)) {{
-            menu.classList.remove('open');
-            kebab.setAttribute('aria-expanded', 'false');
-          }}
-        }});
-      }}
-    }})();
-
-    // GA4 key event: any App Store CTA / bio-link click
-    document.addEventListener('click', function (e) {{
-      var link = e.target && e.target.closest ? e.target.closest('a[href]') : null;
-      if (!link) return;
-
-      var href = link.getAttribute('href') || '';
-      var isAppStore = href.indexOf('apps.apple.com/app/biteright-gluten-scanner') !== -1;
-      var isBioRoute = href === '/tt' || href === '/go' || href === '/app' || href.indexOf('/tt?') === 0 || href.indexOf('/go?') === 0 || href.indexOf('/app?') === 0;
-      if (!isAppStore && !isBioRoute) return;
-
-      if (typeof window.gtag === 'function') {{
-        window.gtag('event', 'app_store_cta_click', {{
-          event_category: 'engagement',
-          event_label: href,
-          link_url: href,
-          link_text: (link.textContent || '').trim().slice(0, 120)
-        }});
-      }}
-    }}, true);
-  </script>
+{{ site_js|safe }}
+{{ hub_search_js|safe }}
 </body>
 </html>
-'''
+''')
+
+
+def page_url(base_url, number):
+    return base_url if number == 1 else f"{base_url}page/{number}/"
+
+
+def letter_of(topic_key):
+    first = topic_key[:1].lower()
+    return first if "a" <= first <= "z" else "0-9"
+
+
+def card_html(card):
+    slug, title, desc = card
+    return (f'<a class="card" href="/{html_escape.escape(slug)}/"><h3>{html_escape.escape(title)}</h3>'
+            f'<p>{html_escape.escape(desc)}</p></a>')
+
+
+def render_hub_nav(category_counts, letter_counts, current=None):
+    """Category and A–Z links shown on every shard; current is the shard's own URL."""
+    def link(url, label):
+        attrs = ' aria-current="page"' if url == current else ""
+        return f'<a href="{url}"{attrs}>{html_escape.escape(label)}</a>'
+
+    categories = " ".join(
+        link(f"{HUB_URL}category/{name.replace('_', '-')}/", f"{CATEGORY_LABELS[name]} ({count})")
+        for name, count in category_counts.items() if count)
+    letters = " ".join(
+        link(f"{HUB_URL}a-z/{letter}/", letter.upper()) if letter_counts.get(letter)
+        else f'<span>{letter.upper()}</span>'
+        for letter in LETTERS)
+    return (f'    <nav class="hub-nav" aria-label="Browse guides">\n'
+            f'      <div class="hub-categories">{link(HUB_URL, "All guides")} {categories}</div>\n'
+            f'      <div class="hub-letters">{letters}</div>\n'
+            f'    </nav>')
+
+
+def render_search_box(version):
+    """The search form; search.js reads the index from data-index and shows results below it."""
+    return (f'    <form class="hub-search" role="search" action="{HUB_URL}" '
+            f'data-index="{HUB_URL}{SEARCH_DIR}/{version}/">\n'
+            f'      <input type="search" name="q" aria-label="Search guides" '
+            f'placeholder="Search guides, e.g. soy sauce or malt" autocomplete="off" />\n'
+            f'      <ul class="hub-results" hidden></ul>\n'
+            f'    </form>')
+
+
+def render_pager(base_url, number, pages):
+    """(pager HTML, <link rel=prev/next> tags) for page number of pages."""
+    if pages == 1:
+        return "", ""
+    parts, links = [], []
+    if number > 1:
+        parts.append(f'<a rel="prev" href="{page_url(base_url, number - 1)}">← Previous</a>')
+        links.append(f'  <link rel="prev" href="https://biterightgluten.com{page_url(base_url, number - 1)}" />')
+    parts.append(f"<span>Page {number} of {pages}</span>")
+    if number < pages:
+        parts.append(f'<a rel="next" href="{page_url(base_url, number + 1)}">Next →</a>')
+        links.append(f'  <link rel="next" href="https://biterightgluten.com{page_url(base_url, number + 1)}" />')
+    return f'    <nav class="pager" aria-label="Pagination">{" ".join(parts)}</nav>', "\n".join(links)
+
+
+class Listing:
+    """One paginated shard series (all guides, a category or a letter).
+
+    Cards are added in display order; each page of PAGE_SIZE cards is
+    rendered and written as soon as it is full, so only one page of HTML is
+    held per listing.
+    """
+
+    def __init__(self, writer, base_url, total, heading, intro, description):
+        self.writer = writer
+        self.base_url = base_url
+        self.pages = max(1, math.ceil(total / PAGE_SIZE))
+        self.heading = heading
+        self.intro = intro
+        self.description = description
+        self.number = 1
+        self.cards = []
+
+    def add(self, card):
+        self.cards.append(card_html(card))
+        if len(self.cards) == PAGE_SIZE and self.number < self.pages:
+            self.flush()
+
+    def flush(self):
+        url = page_url(self.base_url, self.number)
+        pager, pager_links = render_pager(self.base_url, self.number, self.pages)
+        suffix = f" (page {self.number} of {self.pages})" if self.pages > 1 else ""
+        self.writer.write(url, HUB_TEMPLATE.render(
+            page_title=self.heading + suffix, description=self.description, url=url, pager_links=pager_links,
+            heading=self.heading, intro=self.intro, search_box=self.writer.search_box,
+            hub_nav=self.writer.hub_nav(self.base_url),
+            cards_html="\n      ".join(self.cards), pager=pager))
+        self.cards = []
+        self.number += 1
+
+
+class HubWriter:
+    """Writes shard files under HUB_DIR and remembers which ones it wrote."""
+
+    def __init__(self, hub_dir, category_counts, letter_counts, search_box):
+        self.hub_dir = Path(hub_dir)
+        self.category_counts = category_counts
+        self.letter_counts = letter_counts
+        self.search_box = search_box
+        self.written = set()
+        self.changed = 0
+
+    def hub_nav(self, current):
+        return render_hub_nav(self.category_counts, self.letter_counts, current)
+
+    def write(self, url, html):
+        path = self.hub_dir / url[len(HUB_URL):] / "index.html"
+        self.written.add(path)
+        data = html.encode("utf-8")
+        try:
+            if path.read_bytes() == data:
+                return
+        except OSError:
+            pass
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+        self.changed += 1
+
+    def prune(self):
+        """Delete shard files (and emptied directories) not written this run."""
+        removed = 0
+        for name in SHARD_DIRS:
+            root = self.hub_dir / name
+            if not root.exists():
+                continue
+            for path in sorted(root.rglob("index.html")):
+                if path not in self.written:
+                    path.unlink()
+                    removed += 1
+            for directory in sorted((p for p in root.rglob("*") if p.is_dir()), reverse=True) + [root]:
+                if not any(directory.iterdir()):
+                    directory.rmdir()
+        return removed
+
+
+@build_trace.traced()
+def write_hub(pages, cards, search, hub_dir=HUB_DIR):
+    """Write every hub shard and the search index from a corpus' PageRecords,
+    their hub cards and their search terms (site_search.page_terms).
+
+    Returns (shards written, shards changed, stale shards removed).
+    """
+    entries = [(card, categorize_page(page), letter_of(page.topic_key or card[0]), page.topic_key, terms)
+               for page, card, terms in zip(pages, cards, search)]
+    category_counts = {name: 0 for name in CATEGORIES}
+    letter_counts = {}
+    for _, category, letter, _, _ in entries:
+        category_counts[category] += 1
+        letter_counts[letter] = letter_counts.get(letter, 0) + 1
+    # All guides and categories by title (the hub's historical order); search
+    # results use the same order, so the index is written first for its version
+    by_title = sorted(entries, key=lambda entry: entry[0][1].lower())
+    version = site_search.write_index(Path(hub_dir) / SEARCH_DIR,
+                                      [(card[0], card[1], terms) for card, _, _, _, terms in by_title])
+    writer = HubWriter(hub_dir, category_counts, letter_counts, render_search_box(version))
+
+    everything = Listing(writer, HUB_URL, len(entries), "Knowledge Hub",
+                         "Is it gluten free? Browse our guides to hidden gluten in sauces, noodles, and everyday foods.",
+                         "Browse our gluten safety guides: soy sauce, teriyaki, miso, and more. "
+                         "Identify hidden gluten in food labels and menus.")
+    by_category = {
+        name: Listing(writer, f"{HUB_URL}category/{name.replace('_', '-')}/", count,
+                      f"{CATEGORY_LABELS[name]} — gluten free guides",
+                      f"Is it gluten free? Our guides to hidden gluten in {CATEGORY_LABELS[name].lower()}.",
+                      f"Gluten safety guides for {CATEGORY_LABELS[name].lower()}: hidden gluten, risks and safer swaps.")
+        for name, count in category_counts.items() if count
+    }
+    for card, category, _, _, _ in by_title:
+        everything.add(card)
+        by_category[category].add(card)
+    for listing in [everything, *by_category.values()]:
+        listing.flush()
+
+    # A–Z by topic, one letter at a time
+    by_letter = {}
+    for card, _, letter, _, _ in sorted(entries, key=lambda entry: (entry[3].lower(), entry[0][1].lower())):
+        listing = by_letter.get(letter)
+        if listing is None:
+            label = "0–9" if letter == "0-9" else letter.upper()
+            listing = by_letter[letter] = Listing(
+                writer, f"{HUB_URL}a-z/{letter}/", letter_counts[letter], f"Gluten free guides: {label}",
+                f"Is it gluten free? Our guides to foods starting with {label}.",
+                f"Gluten safety guides to foods starting with {label}.")
+        listing.add(card)
+    for listing in by_letter.values():
+        listing.flush()
+
+    return len(writer.written), writer.changed, writer.prune()
+
+
+def main():
+    corpus = site_corpus.load_corpus(PAGES_DIR, EXCLUDED)
+    for name, problem in corpus.invalid_json():
+        print(f"Warning: skipped {name}: {problem}")
 
-    OUT_PATH.parent.mkdir(parents=True, exist_ok=True)
-    OUT_PATH.write_text(html, encoding="utf-8")
-    print(f"Generated knowledge hub with {len(pages)} pages: {OUT_PATH}")
+    shards, changed, removed = write_hub(corpus.pages, corpus.cards, corpus.search)
+    print(f"Generated knowledge hub with {len(corpus.cards)} pages in {shards} shards "
+          f"({changed} changed, {removed} removed): {HUB_DIR}")
 
 
 if __name__ == "__main__":
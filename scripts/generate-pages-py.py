@@ -9,6 +9,9 @@ ROOT = Path(__file__).resolve().parent.parent
 SEEDS_PATH = ROOT / "content" / "seeds" / "topics.txt"
 OUT_DIR = ROOT / "content" / "pages"
 MAX_NEW = int(os.environ.get("MAX_NEW_PAGES", "10"))
+# Optional SQLite store (scripts/content_store.py): existing pages are looked
+# up there instead of listing content/pages, and new pages are added to it
+CONTENT_STORE = os.environ.get("CONTENT_STORE")
 
 
 def slugify(topic):
@@ -196,7 +199,12 @@ def build_page(topic_name):
 def main():
     topics = [line.strip() for line in SEEDS_PATH.read_text().splitlines() if line.strip()]
     OUT_DIR.mkdir(parents=True, exist_ok=True)
-    existing = {f.replace(".json", "") for f in os.listdir(OUT_DIR) if f.endswith(".json")}
+    store = None
+    if CONTENT_STORE:
+        import content_store
+        store = content_store.ContentStore(CONTENT_STORE)
+    else:
+        existing = {f.replace(".json", "") for f in os.listdir(OUT_DIR) if f.endswith(".json")}
     created = 0
     for topic in topics:
         if created >= MAX_NEW:
@@ -206,10 +214,15 @@ def main():
             continue
         page = build_page(topic)
         slug = page["slug"]
-        if slug in existing:
-            continue
         out_path = OUT_DIR / f"{slug}.json"
-        out_path.write_text(json.dumps(page, indent=2) + "\n", encoding="utf-8")
+        if store is not None:
+            if slug in store or out_path.exists():
+                continue
+            store.save_page(slug, page, OUT_DIR)
+        elif slug in existing:
+            continue
+        else:
+            out_path.write_text(json.dumps(page, indent=2) + "\n", encoding="utf-8")
         created += 1
         print(f"Created {slug}.json")
     print(f"Done. Created {created} new pages.")
@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""Write dist/sitemap.xml (or a sitemap index plus gzipped shards).
+
+Python replacement for generate-sitemap.mjs; see scripts/site_sitemap.py for
+the lastmod rules and sharding. build-site.py runs the same stage from its
+shared corpus.
+"""
+from pathlib import Path
+
+import site_corpus
+import site_sitemap
+
+ROOT = Path(__file__).resolve().parent.parent
+PAGES_DIR = ROOT / "content" / "pages"
+BLOG_DIR = ROOT / "content" / "blog"
+SRC_DIR = ROOT / "src"
+OUT_PATH = ROOT / "dist" / "sitemap.xml"
+EXCLUDED = {"is-test-gluten-free", "are-test-gluten-free"}
+
+
+def main():
+    if not PAGES_DIR.exists():
+        print("No content/pages directory; skipping sitemap.")
+        return
+    corpus = site_corpus.load_corpus(PAGES_DIR, EXCLUDED)
+    for name, problem in corpus.invalid_json():
+        print(f"Warning: skipped {name}: {problem}")
+
+    urls = site_sitemap.sitemap_urls(corpus.sitemap, corpus.pages, SRC_DIR, BLOG_DIR)
+    files, written = site_sitemap.write_sitemap(OUT_PATH, urls)
+    print(f"Wrote sitemap: {OUT_PATH} ({len(urls)} urls"
+          + (f" in {files} shards, {written} rewritten)" if files > 1 else ")"))
+
+
+if __name__ == "__main__":
+    main()
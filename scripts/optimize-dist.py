@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""Minify text assets in dist/, optionally with precompressed .gz/.br siblings.
+
+Runs after the page build. Files whose content hash matches the previous run
+(.cache/optimize-manifest.json) and whose siblings exist are skipped, so warm
+incremental builds only touch what was re-rendered.
+
+Cloudflare's static assets compress responses themselves and never serve
+.gz/.br siblings, which would only count against the per-deployment file
+limit, so precompression is opt-in (--precompress) for other hosts. Without
+it, siblings left by an earlier run are removed. Brotli output needs the
+optional `brotli` package; without it only gzip siblings are written.
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+ROOT = Path(__file__).resolve().parent.parent
+DIST_DIR = ROOT / "dist"
+# Outside dist/, which is deployed as-is
+MANIFEST_PATH = ROOT / ".cache" / "optimize-manifest.json"
+TEXT_EXTENSIONS = {".html", ".css", ".js", ".json", ".xml", ".txt", ".svg"}
+# Cloudflare Worker entry point; bundled by wrangler, not served
+SKIP_FILES = {"index.js"}
+
+RAW_BLOCK_RE = re.compile(r"(<(pre|textarea|script|style)\b[^>]*>)(.*?)(</\2\s*>)", re.I | re.S)
+COMMENT_RE = re.compile(r"<!--(?!\[if).*?-->", re.S)
+WS_NEWLINE_RE = re.compile(r"\s*\n\s*")
+WS_RE = re.compile(r"[ \t]{2,}")
+CSS_STRING = r""""(?:[^"\\\n]|\\.)*"|'(?:[^'\\\n]|\\.)*'"""
+CSS_STRING_RE = re.compile(f"({CSS_STRING})", re.S)
+# Strings are matched too so a "/*" inside one isn't taken for a comment
+CSS_COMMENT_RE = re.compile(f"({CSS_STRING})|/\\*.*?\\*/", re.S)
+CSS_PUNCT_RE = re.compile(r"\s*([{};,>])\s*")
+# A property name right after "{" or ";" and its colon: only declarations match,
+# so selectors such as "div :first-child" keep their whitespace
+CSS_DECL_COLON_RE = re.compile(r"([{;][\w-]+):\s+")
+TEMPLATE_TICK_RE = re.compile(r"(?<!\\)`")
+
+
+def minify_css(css):
+    """Conservative CSS minifier: comments and insignificant whitespace only.
+
+    Quoted strings (content: "a  b", url("...")) are kept exactly as written.
+    """
+    css = CSS_COMMENT_RE.sub(lambda m: m.group(1) or "", css)
+    # split() with a group alternates text and strings: text, "str", text, ...
+    parts = CSS_STRING_RE.split(css)
+    parts[::2] = [_minify_css_text(text) for text in parts[::2]]
+    return "".join(parts).strip()
+
+
+def _minify_css_text(css):
+    css = re.sub(r"\s+", " ", css)
+    css = CSS_PUNCT_RE.sub(r"\1", css)
+    css = CSS_DECL_COLON_RE.sub(r"\1:", css)
+    return css.replace(";}", "}")
+
+
+def minify_js(js):
+    """Drop indentation, blank lines and whole-line // comments.
+
+    Newlines are kept so automatic semicolon insertion behaves exactly as
+    before; nothing inside a line is rewritten. Whitespace that falls inside
+    a `template literal` is part of its value, so lines that start or end
+    inside one keep it on that side.
+    """
+    lines = []
+    in_template = False
+    for line in js.splitlines():
+        starts_inside = in_template
+        if len(TEMPLATE_TICK_RE.findall(line)) % 2:
+            in_template = not in_template
+        if not starts_inside:
+            line = line.lstrip()
+            if not line or line.startswith("//"):
+                continue
+        if not in_template:
+            line = line.rstrip()
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def _minify_html_text(text):
+    text = COMMENT_RE.sub("", text)
+    text = WS_NEWLINE_RE.sub("\n", text)
+    return WS_RE.sub(" ", text)
+
+
+def minify_html(html):
+    """Collapse whitespace and drop comments outside <pre>/<textarea>.
+
+    Inline <style>/<script> bodies go through the CSS/JS minifiers; JSON and
+    other non-JavaScript script types are left untouched.
+    """
+    out = []
+    pos = 0
+    for m in RAW_BLOCK_RE.finditer(html):
+        out.append(_minify_html_text(html[pos:m.start()]))
+        open_tag, tag, body, close_tag = m.group(1), m.group(2).lower(), m.group(3), m.group(4)
+        if tag == "style":
+            body = minify_css(body)
+        elif tag == "script":
+            type_m = re.search(r'\btype\s*=\s*["\']?([^"\'\s>]+)', open_tag, re.I)
+            if not type_m or type_m.group(1).lower() in ("text/javascript", "module"):
+                body = minify_js(body)
+        out.append(_minify_html_text(open_tag) + body + close_tag)
+        pos = m.end()
+    out.append(_minify_html_text(html[pos:]))
+    return "".join(out).strip() + "\n"
+
+
+MINIFIERS = {".html": minify_html, ".css": minify_css, ".js": minify_js}
+
+
+def optimize_file(task):
+    """Minify one file in place and write its .gz/.br siblings.
+
+    Returns (relpath, original_bytes, minified_bytes, gz_bytes, br_bytes, digest);
+    gz_bytes and br_bytes are None when the siblings aren't written.
+    """
+    rel, minify, precompress = task
+    path = DIST_DIR / rel
+    data = path.read_bytes()
+    original = len(data)
+    if minify and path.suffix in MINIFIERS:
+        minified = MINIFIERS[path.suffix](data.decode("utf-8")).encode("utf-8")
+        if len(minified) < original:
+            data = minified
+            # Replace rather than rewrite in place, in case the file is a hard link
+            tmp = path.with_name(path.name + ".tmp")
+            tmp.write_bytes(data)
+            os.replace(tmp, path)
+    gz_size = br_size = None
+    if precompress:
+        gz = gzip.compress(data, compresslevel=9, mtime=0)
+        path.with_name(path.name + ".gz").write_bytes(gz)
+        gz_size = len(gz)
+        if brotli is not None:
+            br = brotli.compress(data, quality=11)
+            path.with_name(path.name + ".br").write_bytes(br)
+            br_size = len(br)
+    return rel, original, len(data), gz_size, br_size, hashlib.sha256(data).hexdigest()
+
+
+def text_assets():
+    for path in sorted(DIST_DIR.rglob("*")):
+        if not path.is_file() or path.suffix not in TEXT_EXTENSIONS or path.name.startswith("."):
+            continue
+        rel = path.relative_to(DIST_DIR).as_posix()
+        if rel in SKIP_FILES:
+            continue
+        yield rel
+
+
+def load_manifest():
+    try:
+        return json.loads(MANIFEST_PATH.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def siblings(rel):
+    path = DIST_DIR / rel
+    return [path.with_name(path.name + suffix) for suffix in (".gz", ".br")]
+
+
+def is_current(rel, previous, precompress):
+    """True if the file is unchanged since it was last optimized."""
+    digest = previous.get(rel)
+    if digest is None:
+        return False
+    path = DIST_DIR / rel
+    gz, br = siblings(rel)
+    if precompress and (not gz.exists() or (brotli is not None and not br.exists())):
+        return False
+    return hashlib.sha256(path.read_bytes()).hexdigest() == digest
+
+
+def fmt_size(n):
+    if n is None:
+        return "-"
+    return f"{n / 1024:.1f}K" if n >= 1024 else f"{n}B"
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--jobs", "-j", type=int, default=0, metavar="N",
+                        help="worker processes (0 = one per CPU core)")
+    parser.add_argument("--no-minify", action="store_true", help="skip minification")
+    parser.add_argument("--precompress", action="store_true",
+                        help="also write .gz/.br siblings (not used by Cloudflare static assets)")
+    parser.add_argument("--quiet", "-q", action="store_true", help="print totals only")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if not DIST_DIR.exists():
+        print("No dist/ directory; run the build first.")
+        return
+
+    previous = load_manifest()
+    digests = {}
+    tasks = []
+    skipped = 0
+    removed = 0
+    for rel in text_assets():
+        if not args.precompress:
+            for sibling in siblings(rel):
+                if sibling.exists():
+                    sibling.unlink()
+                    removed += 1
+        if is_current(rel, previous, args.precompress):
+            digests[rel] = previous[rel]
+            skipped += 1
+        else:
+            tasks.append((rel, not args.no_minify, args.precompress))
+
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    if jobs > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            results = list(pool.map(optimize_file, tasks, chunksize=16))
+    else:
+        results = [optimize_file(task) for task in tasks]
+
+    totals = [0, 0, 0, 0]
+    for rel, original, minified, gz, br, digest in results:
+        digests[rel] = digest
+        totals[0] += original
+        totals[1] += minified
+        totals[2] += gz or 0
+        totals[3] += br or 0
+        if not args.quiet:
+            line = f"  {rel}: {fmt_size(original)} → min {fmt_size(minified)}"
+            print(line + (f" → gz {fmt_size(gz)} / br {fmt_size(br)}" if args.precompress else ""))
+
+    MANIFEST_PATH.parent.mkdir(parents=True, exist_ok=True)
+    MANIFEST_PATH.write_text(json.dumps(digests, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+
+    saved = totals[0] - totals[1]
+    print(f"✓ Optimized {len(results)} text assets ({skipped} unchanged, skipped).")
+    if results:
+        print(f"✓ Minified {fmt_size(totals[0])} → {fmt_size(totals[1])} (saved {fmt_size(saved)}, {saved / totals[0] * 100:.1f}%).")
+        if args.precompress:
+            print(f"✓ Precompressed: gzip {fmt_size(totals[2])}" + (f", brotli {fmt_size(totals[3])}." if brotli else " (install brotli for .br output)."))
+    if removed:
+        print(f"✓ Removed {removed} precompressed siblings (pass --precompress to keep them).")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+"""Make responsive variants of the images in public/images and src/img.
+
+See scripts/site_images.py: AVIF/WebP at several widths plus blurred
+placeholders, cached by source hash. build-pages.py publishes them into
+dist/ and generate-blog.py references them; build-site.py runs this stage
+before both. Needs Pillow (pip install Pillow); without it only image
+dimensions are recorded.
+"""
+import argparse
+
+import site_images
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", "-j", type=int, default=0, metavar="N",
+                        help="encoder processes (default: one per CPU)")
+    args = parser.parse_args(argv)
+    images, encoded = site_images.build_variants(args.jobs or None)
+    if site_images.Image is None:
+        print(f"✓ Recorded sizes of {images} images (install Pillow for responsive variants).")
+    else:
+        print(f"✓ Responsive images: {images} sources, {encoded} re-encoded "
+              f"({', '.join(site_images.formats())}).")
+
+
+if __name__ == "__main__":
+    main()
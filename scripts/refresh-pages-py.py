@@ -1,9 +1,15 @@
 #!/usr/bin/env python3
 """Refresh pages with OpenAI-derived ingredient analysis. Run with OPENAI_API_KEY set.
-By default refreshes ALL pages. Set REFRESH_SLUGS=slug1,slug2 to limit."""
+By default refreshes ALL pages. Set REFRESH_SLUGS=slug1,slug2 to limit.
+
+With CONTENT_STORE pointing at the SQLite store (scripts/content_store.py),
+pages can instead be picked by REFRESH_CATEGORY, REFRESH_STATUS and/or
+REFRESH_UPDATED_BEFORE=YYYY-MM-DD, and refreshed pages are saved to both the
+store and content/pages."""
 import json
 import os
 import re
+import sys
 import urllib.request
 from pathlib import Path
 
@@ -129,24 +135,49 @@ def main():
         print("Run: OPENAI_API_KEY=sk-your-key python3 scripts/refresh-pages-py.py")
         exit(1)
 
+    store_path = os.environ.get("CONTENT_STORE", "")
+    store = None
+    if store_path:
+        import content_store
+        store = content_store.ContentStore(store_path)
+    filters = {
+        "category": os.environ.get("REFRESH_CATEGORY") or None,
+        "status": os.environ.get("REFRESH_STATUS") or None,
+        "updated_before": os.environ.get("REFRESH_UPDATED_BEFORE") or None,
+    }
+    if any(filters.values()) and store is None:
+        print("Error: REFRESH_CATEGORY/REFRESH_STATUS/REFRESH_UPDATED_BEFORE need CONTENT_STORE.")
+        sys.exit(1)
+
     refresh_slugs_env = os.environ.get("REFRESH_SLUGS", "")
     if refresh_slugs_env:
         slugs = [s.strip() for s in refresh_slugs_env.split(",") if s.strip()]
+    elif store is not None:
+        slugs = [slug for slug in store.query(**filters) if slug not in EXCLUDED]
     else:
         slugs = sorted(
             f.stem for f in PAGES_DIR.glob("*.json")
             if f.stem not in EXCLUDED
         )
 
+    if store is not None:
+        # Pages are read from the store, so a hand edit to the file would be lost
+        conflicts = store.conflicts(slugs, PAGES_DIR)
+        if conflicts:
+            print(f"Error: {content_store.ExportConflict(conflicts)}. "
+                  "Run scripts/content-store.py import (or export --force) first.")
+            sys.exit(1)
+
     print(f"Refreshing {len(slugs)} pages...")
 
     for slug in slugs:
         path = PAGES_DIR / f"{slug}.json"
-        if not path.exists():
-            print(f"Skip {slug} (file not found)")
-            continue
-
-        page = json.loads(path.read_text(encoding="utf-8"))
+        page = store.get(slug) if store is not None else None
+        if page is None:
+            if not path.exists():
+                print(f"Skip {slug} (file not found)")
+                continue
+            page = json.loads(path.read_text(encoding="utf-8"))
         topic_name = topic_from_page(page)
 
         try:
@@ -160,7 +191,14 @@ def main():
             continue
 
         page = apply_profile(page, profile, topic_name)
-        path.write_text(json.dumps(page, indent=2) + "\n", encoding="utf-8")
+        if store is not None:
+            try:
+                store.save_page(slug, page, PAGES_DIR)
+            except content_store.ExportConflict as e:
+                print(f"Skip {slug} ({e})")
+                continue
+        else:
+            path.write_text(json.dumps(page, indent=2) + "\n", encoding="utf-8")
         print(f"Refreshed {slug}")
 
     print("Done.")
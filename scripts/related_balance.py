@@ -0,0 +1,174 @@
+"""Link-equity balancing of related-page picks (--related balanced).
+
+pagerank() scores the related-link graph by power iteration over its edge
+arrays. Each step is a single np.bincount, which amounts to a sparse
+matrix-vector product without scipy, so it converges in well under a second
+at 100k pages.
+
+balance() then moves picks from pages that attract many links to pages that
+attract few, while staying within the relevance constraints of the
+similarity picks:
+
+- a page only ever links to pages in its own candidate pool (its most
+  similar pages, from related_similarity.candidate_indexes);
+- its first `keep` picks, the closest matches, are never swapped out;
+- the per-category diversity limits of related_indexes still hold.
+
+Pages are visited poorest first by PageRank. An under-linked page takes a
+slot from a source that offers it, replacing that source's pick with the
+highest in-degree. A swap only happens when it narrows the gap between the
+two pages, so the in-degree spread shrinks every round and the loop always
+terminates. Requires numpy.
+"""
+import build_trace
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency, only needed for --related balanced
+    np = None
+
+DAMPING = 0.85
+TOLERANCE = 1e-10
+MAX_ITERATIONS = 100
+# Each page's closest matches stay put
+KEEP = 2
+MAX_ROUNDS = 4
+
+
+def available():
+    return np is not None
+
+
+def edge_arrays(related):
+    """(sources, targets) int arrays of the graph's links, without self-links."""
+    sources = np.fromiter((s for s, picks in enumerate(related) for _ in picks), dtype=np.int64)
+    targets = np.fromiter((t for picks in related for t in picks), dtype=np.int64)
+    keep = sources != targets
+    return sources[keep], targets[keep]
+
+
+def pagerank(related, damping=DAMPING, tolerance=TOLERANCE, max_iterations=MAX_ITERATIONS):
+    """(scores, iterations) for the graph where page i links to related[i].
+
+    Scores are scaled so the average page has 1.0. Rank held by pages with
+    no links is spread evenly, as in the standard formulation.
+    """
+    n = len(related)
+    if n == 0:
+        return np.zeros(0), 0
+    sources, targets = edge_arrays(related)
+    out_degree = np.bincount(sources, minlength=n).astype(np.float64)
+    dangling = out_degree == 0
+    weights = np.divide(1.0, out_degree, out=np.zeros(n), where=~dangling)
+    rank = np.full(n, 1.0 / n)
+    iterations = 0
+    for iterations in range(1, max_iterations + 1):
+        spread = (1.0 - damping + damping * rank[dangling].sum()) / n
+        new = spread + damping * np.bincount(targets, weights=(rank * weights)[sources], minlength=n)
+        delta = np.abs(new - rank).sum()
+        rank = new
+        if delta < tolerance:
+            break
+    return rank * n, iterations
+
+
+def gini(values):
+    """Gini coefficient: 0 when every value is equal, near 1 when one page has everything."""
+    values = np.sort(np.asarray(values, dtype=np.float64))
+    n = len(values)
+    if n == 0 or values.sum() == 0:
+        return 0.0
+    return float((2 * np.arange(1, n + 1) - n - 1) @ values / (n * values.sum()))
+
+
+def summarize(related):
+    """In-degree and PageRank distribution of a related-link graph."""
+    n = len(related)
+    _, targets = edge_arrays(related)
+    in_degree = np.bincount(targets, minlength=n)
+    scores, iterations = pagerank(related)
+    return {
+        "in_degree": in_degree,
+        "in_min": int(in_degree.min()) if n else 0,
+        "in_median": float(np.median(in_degree)) if n else 0.0,
+        "in_max": int(in_degree.max()) if n else 0,
+        "pagerank_min": float(scores.min()) if n else 0.0,
+        "pagerank_max": float(scores.max()) if n else 0.0,
+        "gini": gini(scores),
+        "iterations": iterations,
+    }
+
+
+def offers(candidates):
+    """For every page, the sources whose candidate pool holds it, closest first."""
+    n, pool = candidates.shape
+    flat = candidates.ravel()
+    # Group by target, then by how highly the source ranks it
+    order = np.lexsort((np.tile(np.arange(pool), n), flat))
+    bounds = np.searchsorted(flat[order], np.arange(n + 1))
+    sources = (order // pool).tolist() if pool else []
+    return [sources[bounds[u]:bounds[u + 1]] for u in range(n)]
+
+
+@build_trace.traced()
+def balance(related, candidates, categories, same_category_max=3, other_category_max=2,
+            keep=KEEP, max_rounds=MAX_ROUNDS):
+    """Rebalance related picks (see the module docstring).
+
+    related: each page's picks (related_similarity.related_indexes);
+    candidates: the candidate_indexes array they were picked from;
+    categories: per-page category. Returns (new picks, swaps, rounds).
+    """
+    related = [list(picks) for picks in related]
+    n = len(related)
+    if n == 0 or not candidates.size:
+        return related, 0, 0
+    _, targets = edge_arrays(related)
+    in_degree = np.bincount(targets, minlength=n).tolist()
+    target = sum(in_degree) // n
+    chosen = [set(picks) for picks in related]
+    offered = offers(candidates)
+
+    swaps = rounds = 0
+    for rounds in range(1, max_rounds + 1):
+        scores, _ = pagerank(related)
+        moved = 0
+        for page in np.argsort(scores, kind="stable").tolist():
+            if in_degree[page] >= target:
+                continue
+            page_cat = categories[page]
+            for source in offered[page]:
+                if in_degree[page] >= target:
+                    break
+                if page in chosen[source] or source == page:
+                    continue
+                picks = related[source]
+                limit = same_category_max if page_cat == categories[source] else other_category_max
+                in_category = sum(1 for p in picks if categories[p] == page_cat)
+                best = None
+                for slot in range(keep, len(picks)):
+                    drop = picks[slot]
+                    if in_degree[drop] <= in_degree[page] + 1:
+                        continue
+                    if categories[drop] != page_cat and in_category >= limit:
+                        continue
+                    if best is None or in_degree[drop] > in_degree[picks[best]]:
+                        best = slot
+                if best is None:
+                    continue
+                drop = picks[best]
+                picks[best] = page
+                chosen[source].discard(drop)
+                chosen[source].add(page)
+                in_degree[drop] -= 1
+                in_degree[page] += 1
+                moved += 1
+        swaps += moved
+        if not moved:
+            break
+
+    # Show each page's picks in relevance order again
+    for source, picks in enumerate(related):
+        position = {cand: i for i, cand in enumerate(candidates[source].tolist())}
+        picks[keep:] = sorted(picks[keep:], key=lambda cand: position.get(cand, len(position)))
+    return related, swaps, rounds
@@ -0,0 +1,228 @@
+"""Content-similarity related-page selection for programmatic SEO pages.
+
+Each page becomes a TF-IDF vector over its risk/safe ingredients, safe
+alternatives and verdict summary. Vectors are feature-hashed into a fixed
+number of columns so the whole corpus fits in one dense float32 matrix.
+
+Up to EXACT_MAX pages, top-k neighbours come from batched matrix products
+against the whole corpus. Beyond that the full product is O(n^2), so
+candidates are pruned first: each page gets a SIGNATURE_BITS-bit signature
+per table from random hyperplanes (signs of projections, so similar vectors
+share leading bits), pages are sorted by each table's signature, and a page's
+candidates are the WINDOW pages on either side of it in every table. Only
+those are scored, which keeps the cost linear in the corpus size at the price
+of occasionally missing a neighbour. Requires numpy.
+"""
+import math
+import re
+import zlib
+
+import build_trace
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency, only needed for --related similarity
+    np = None
+
+WORD_RE = re.compile(r"[a-z0-9]+")
+PAREN_RE = re.compile(r"\([^)]*\)")
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "be", "but", "by", "can", "for", "from", "gf",
+    "if", "in", "is", "it", "its", "made", "may", "of", "often", "on", "or",
+    "such", "that", "the", "these", "this", "to", "typically", "usually", "which",
+    "with", "gluten", "free", "contain", "contains", "containing", "use", "used",
+}
+
+# Relative weight of each field; whole ingredient phrases count more than
+# loose words so "Soy sauce" pages match each other before "soy milk" pages.
+FIELD_WEIGHTS = {"phrase": 2.0, "ingredient_word": 1.0, "summary_word": 0.5}
+
+# Corpora up to this size are scored exactly against every page
+EXACT_MAX = 5000
+# Candidate pruning for larger corpora (see the module docstring)
+TABLES = 8
+SIGNATURE_BITS = 24
+SIGNATURE_SEED = 0
+
+
+def available():
+    return np is not None
+
+
+def _words(text):
+    return [w for w in WORD_RE.findall(text.lower()) if w not in STOPWORDS and len(w) > 1]
+
+
+def page_terms(data):
+    """Return {term: weight} for one page's JSON data."""
+    terms = {}
+
+    def add(term, weight):
+        terms[term] = terms.get(term, 0.0) + weight
+
+    ingredients = data.get("ingredients", {})
+    items = list(ingredients.get("risk", [])) + list(ingredients.get("safe", [])) + list(data.get("safe_alternatives", []))
+    for item in items:
+        if not isinstance(item, str):
+            continue
+        phrase = " ".join(_words(PAREN_RE.sub("", item)))
+        if phrase:
+            add("p:" + phrase, FIELD_WEIGHTS["phrase"])
+        for w in _words(item):
+            add("w:" + w, FIELD_WEIGHTS["ingredient_word"])
+    for w in _words(data.get("verdict", {}).get("summary", "")):
+        add("w:" + w, FIELD_WEIGHTS["summary_word"])
+    return terms
+
+
+def _column(term, dims):
+    """Deterministic (unsalted) hash of a term to a signed column."""
+    h = zlib.crc32(term.encode("utf-8"))
+    return h % dims, (1.0 if (h >> 31) & 1 else -1.0)
+
+
+@build_trace.traced()
+def build_matrix(all_pages, dims=256):
+    """L2-normalised TF-IDF matrix (len(all_pages) x dims, float32)."""
+    page_term_lists = [page_terms(p["full_data"]) for p in all_pages]
+    df = {}
+    for terms in page_term_lists:
+        for term in terms:
+            df[term] = df.get(term, 0) + 1
+    n = len(all_pages)
+    idf = {term: math.log((1 + n) / (1 + count)) + 1.0 for term, count in df.items()}
+    columns = {term: _column(term, dims) for term in df}
+
+    rows, cols, values = [], [], []
+    for row, terms in enumerate(page_term_lists):
+        for term, tf in terms.items():
+            col, sign = columns[term]
+            rows.append(row)
+            cols.append(col)
+            values.append(sign * tf * idf[term])
+    matrix = np.zeros((n, dims), dtype=np.float32)
+    np.add.at(matrix, (np.array(rows, dtype=np.intp), np.array(cols, dtype=np.intp)), np.array(values, dtype=np.float32))
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def top_candidates(matrix, pool, batch_size=256, exact_max=EXACT_MAX):
+    """Yield (row, candidate indexes sorted by descending cosine similarity).
+
+    Corpora up to exact_max rows are scored batch_size rows at a time against
+    the full matrix, so memory stays at batch_size x n floats. Larger ones
+    only score the windows from signature_windows().
+    """
+    n = matrix.shape[0]
+    pool = min(pool, n - 1)
+    if pool <= 0:
+        for row in range(n):
+            yield row, []
+        return
+    if n > exact_max:
+        yield from _pruned_candidates(matrix, pool)
+        return
+    for start in range(0, n, batch_size):
+        stop = min(start + batch_size, n)
+        scores = matrix[start:stop] @ matrix.T
+        rows = np.arange(stop - start)
+        scores[rows, rows + start] = -np.inf
+        best = np.argpartition(scores, n - pool, axis=1)[:, n - pool:]
+        for offset in range(stop - start):
+            cand = best[offset]
+            # Highest score first; ties broken by corpus position for stable output
+            order = np.lexsort((cand, -scores[offset, cand]))
+            yield start + offset, cand[order].tolist()
+
+
+def signature_windows(matrix, tables=TABLES, bits=SIGNATURE_BITS, seed=SIGNATURE_SEED):
+    """(orders, positions): per table, rows sorted by random-hyperplane
+    signature and each row's position in that order (both tables x n)."""
+    n, dims = matrix.shape
+    planes = np.random.default_rng(seed).standard_normal((dims, tables * bits)).astype(np.float32)
+    weights = np.left_shift(np.int64(1), np.arange(bits - 1, -1, -1, dtype=np.int64))
+    orders = np.empty((tables, n), dtype=np.int64)
+    keys = np.empty((tables, n), dtype=np.int64)
+    for start in range(0, n, 4096):
+        signs = (matrix[start:start + 4096] @ planes > 0).reshape(-1, tables, bits)
+        keys[:, start:start + 4096] = (signs @ weights).T
+    positions = np.empty_like(orders)
+    for table in range(tables):
+        orders[table] = np.argsort(keys[table], kind="stable")
+        positions[table, orders[table]] = np.arange(n)
+    return orders, positions
+
+
+def _pruned_candidates(matrix, pool, batch_size=64):
+    """top_candidates() for large corpora: score only each row's signature
+    windows, WINDOW = pool rows either side of it in every table."""
+    n = matrix.shape[0]
+    window = min(pool, (n - 1) // 2)
+    orders, positions = signature_windows(matrix)
+    span = np.arange(2 * window + 1)
+    for start in range(0, n, batch_size):
+        stop = min(start + batch_size, n)
+        rows = np.arange(start, stop)
+        # Windows slide inwards at the ends so every one holds 2 * window + 1 rows
+        first = np.clip(positions[:, rows] - window, 0, n - 1 - 2 * window)
+        cands = np.concatenate([orders[t][first[t][:, None] + span] for t in range(len(orders))], axis=1)
+        cands.sort(axis=1)
+        scores = np.einsum("bd,bcd->bc", matrix[rows], matrix[cands])
+        # Drop each row itself and repeats of a candidate found by several tables
+        repeat = np.zeros(cands.shape, dtype=bool)
+        repeat[:, 1:] = cands[:, 1:] == cands[:, :-1]
+        scores[repeat | (cands == rows[:, None])] = -np.inf
+        width = cands.shape[1]
+        best = np.argpartition(scores, width - pool, axis=1)[:, width - pool:]
+        for offset in range(stop - start):
+            cand = cands[offset, best[offset]]
+            order = np.lexsort((cand, -scores[offset, best[offset]]))
+            yield start + offset, cand[order].tolist()
+
+
+@build_trace.traced()
+def candidate_indexes(all_pages, pool, dims=256):
+    """Every page's `pool` most similar pages, most similar first, as an
+    int32 array (len(all_pages) x min(pool, len(all_pages) - 1))."""
+    matrix = build_matrix(all_pages, dims=dims)
+    candidates = np.zeros((len(all_pages), max(0, min(pool, len(all_pages) - 1))), dtype=np.int32)
+    for row, cands in top_candidates(matrix, pool):
+        candidates[row] = cands
+    return candidates
+
+
+@build_trace.traced()
+def related_indexes(all_pages, categories, count=6, same_category_max=3, other_category_max=2, dims=256,
+                    candidates=None):
+    """Return, for every page, the indexes of its `count` most similar pages.
+
+    `categories` is the per-page category list (e.g. corpus_index['category']).
+    Diversity: at most `same_category_max` picks share the page's own category
+    and at most `other_category_max` come from any single other category;
+    the limits are relaxed only when candidates run out. Pass `candidates`
+    from candidate_indexes() to reuse them (default pool: count * 4).
+    """
+    if not all_pages:
+        return []
+    if candidates is None:
+        candidates = candidate_indexes(all_pages, count * 4, dims=dims)
+    related = [None] * len(all_pages)
+    for row, ranked in enumerate(candidates.tolist()):
+        own = categories[row]
+        per_category = {}
+        picks = []
+        for cand in ranked:
+            cat = categories[cand]
+            limit = same_category_max if cat == own else other_category_max
+            if per_category.get(cat, 0) >= limit:
+                continue
+            per_category[cat] = per_category.get(cat, 0) + 1
+            picks.append(cand)
+            if len(picks) == count:
+                break
+        if len(picks) < count:
+            picks.extend(c for c in ranked if c not in picks)
+            picks = picks[:count]
+        related[row] = picks
+    return related
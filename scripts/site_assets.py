@@ -0,0 +1,556 @@
+"""Shared CSS/JS bundles for generated pages, served from content-hashed URLs.
+
+Generators reference bundles with asset_url(); build-pages.py writes them to
+dist/assets/ with write_bundles(). The hash in the file name changes whenever
+the content does, so the files can be cached for as long as the CDN allows.
+
+HTML is only cached for minutes, so right after a deploy browsers and the CDN
+still serve pages that ask for the previous bundles. write_bundles() keeps
+each bundle's last GENERATIONS versions in .cache/bundles and publishes all of
+them, so those pages stay styled until they expire.
+"""
+import hashlib
+import json
+import re
+import shutil
+from pathlib import Path
+
+import site_search
+
+ROOT = Path(__file__).resolve().parent.parent
+ASSETS_PREFIX = "/assets/"
+BUNDLE_CACHE_DIR = ROOT / ".cache" / "bundles"
+# Versions of each bundle kept in dist/assets/: the current one and the one before
+GENERATIONS = 2
+
+# Programmatic SEO pages (build-pages.py)
+PAGE_CSS = """\
+:root {
+  --paper-color: #FDFBF7;
+  --primary-teal: #00A36F;
+  --navy: #0D1B2A;
+  --text-body: #5F6B7A;
+  --safe-green: #00a36f;
+  --caution-amber: #f59e0b;
+  --risk-red: #ef4444;
+}
+* { box-sizing: border-box; }
+body {
+  margin: 0;
+  font-family: 'Nunito', system-ui, -apple-system, sans-serif;
+  background: var(--paper-color);
+  color: var(--navy);
+  line-height: 1.6;
+}
+.container {
+  max-width: 960px;
+  margin: 0 auto;
+  padding: 24px 24px 80px;
+}
+a { color: var(--primary-teal); text-decoration: none; }
+a:hover { text-decoration: underline; }
+nav { display:flex; justify-content:space-between; align-items:center; padding:32px 0; margin-bottom:16px; }
+.logo { font-size:24px; font-weight:800; color:var(--navy); display:flex; align-items:center; gap:8px; text-decoration:none; }
+.logo:hover { color:var(--primary-teal); }
+.logo-mark { width:32px; height:32px; border-radius:8px; object-fit:cover; display:block; flex-shrink:0; }
+.nav-links a { text-decoration:none; color:var(--navy); font-weight:700; margin-left:24px; font-size:15px; transition:color 0.2s; border-radius:8px; padding:4px 8px; }
+.nav-links a:hover { color:var(--primary-teal); }
+.nav-links a:focus-visible { outline:2px solid var(--primary-teal); outline-offset:2px; }
+.nav-kebab { display:none; background:none; border:none; cursor:pointer; padding:8px; color:var(--navy); border-radius:8px; transition:background 0.2s; }
+.nav-kebab:hover { background: rgba(0,0,0,0.05); }
+.nav-kebab svg { width:24px; height:24px; }
+.nav-menu-mobile { display:none; position:absolute; top:100%; right:0; margin-top:8px; background:white; border-radius:16px; box-shadow:0 10px 40px rgba(13,27,42,0.15); padding:12px; min-width:200px; z-index:100; border:1px solid rgba(0,0,0,0.06); }
+.nav-menu-mobile.open { display:flex; flex-direction:column; gap:4px; }
+.nav-menu-mobile a { display:block; padding:12px 16px; text-decoration:none; color:var(--navy); font-weight:700; font-size:15px; border-radius:10px; transition:background 0.2s, color 0.2s; }
+.nav-menu-mobile a:hover { background: rgba(0,163,111,0.08); color: var(--primary-teal); }
+.nav-wrapper { position:relative; }
+.badge {
+  display: inline-block;
+  padding: 8px 16px;
+  border-radius: 999px;
+  font-weight: 700;
+  font-size: 13px;
+  letter-spacing: 0.05em;
+  margin-bottom: 12px;
+}
+.verdict-safe { --verdict-color: var(--safe-green); }
+.verdict-caution { --verdict-color: var(--caution-amber); }
+.verdict-unsafe { --verdict-color: var(--risk-red); }
+.verdict-badge {
+  background: var(--verdict-color);
+  color: white;
+}
+h1 {
+  font-size: 42px;
+  margin: 16px 0 20px;
+  letter-spacing: -1px;
+  line-height: 1.1;
+}
+h2 {
+  font-size: 26px;
+  margin: 40px 0 16px;
+  letter-spacing: -0.5px;
+}
+h3 {
+  font-size: 18px;
+  margin: 20px 0 12px;
+}
+p { 
+  line-height: 1.7; 
+  color: var(--text-body); 
+  font-size: 17px;
+  margin-bottom: 16px;
+}
+.intro {
+  font-size: 19px;
+  color: var(--navy);
+  margin-bottom: 24px;
+}
+.verdict-summary {
+  background: white;
+  border-radius: 16px;
+  padding: 24px;
+  margin: 32px 0;
+  box-shadow: 0 4px 12px rgba(13, 27, 42, 0.08);
+  border-left: 4px solid var(--verdict-color);
+}
+.verdict-summary p {
+  margin: 0;
+  font-size: 17px;
+  color: var(--navy);
+}
+ul {
+  padding-left: 24px;
+  margin: 16px 0 24px;
+}
+li {
+  margin-bottom: 10px;
+  color: var(--text-body);
+}
+.risk-list li {
+  color: var(--risk-red);
+}
+.safe-list li {
+  color: var(--safe-green);
+}
+.waiter-script {
+  background: rgba(0, 163, 111, 0.08);
+  border-radius: 16px;
+  padding: 24px;
+  margin: 32px 0;
+}
+.waiter-script h3 {
+  margin-top: 0;
+  color: var(--primary-teal);
+}
+.script-text {
+  font-size: 18px;
+  font-style: italic;
+  color: var(--navy);
+  font-weight: 600;
+}
+.faq {
+  margin: 24px 0;
+}
+.faq-item {
+  background: white;
+  border-radius: 12px;
+  padding: 20px;
+  margin-bottom: 16px;
+  box-shadow: 0 2px 8px rgba(13, 27, 42, 0.06);
+}
+.faq-item h3 {
+  margin-top: 0;
+  font-size: 17px;
+  color: var(--navy);
+}
+.faq-item p {
+  margin-bottom: 0;
+}
+.cta-section {
+  background: var(--navy);
+  color: white;
+  border-radius: 20px;
+  padding: 32px;
+  margin: 48px 0;
+  text-align: center;
+}
+.cta-section h2 {
+  color: white;
+  margin-top: 0;
+}
+.cta-section p {
+  color: rgba(255, 255, 255, 0.9);
+  margin-bottom: 24px;
+}
+.cta-btn {
+  display: inline-block;
+  padding: 14px 32px;
+  background: var(--primary-teal);
+  color: white;
+  border-radius: 999px;
+  font-weight: 700;
+  font-size: 16px;
+  text-decoration: none;
+}
+.cta-btn:hover {
+  background: #00b87a;
+  text-decoration: none;
+}
+.related-pages {
+  margin-top: 64px;
+  padding-top: 40px;
+  border-top: 2px solid rgba(0, 0, 0, 0.08);
+}
+.related-intro {
+  color: var(--text-body);
+  margin-bottom: 24px;
+}
+.related-grid {
+  display: grid;
+  grid-template-columns: repeat(auto-fill, minmax(220px, 1fr));
+  gap: 16px;
+  margin-top: 24px;
+}
+.related-card {
+  background: white;
+  border-radius: 16px;
+  padding: 20px;
+  box-shadow: 0 4px 12px rgba(13, 27, 42, 0.06);
+  transition: transform 0.2s, box-shadow 0.2s;
+  text-decoration: none;
+  color: inherit;
+  display: block;
+}
+.related-card:hover {
+  transform: translateY(-2px);
+  box-shadow: 0 8px 20px rgba(0, 163, 111, 0.12);
+  text-decoration: none;
+}
+.related-card h3 {
+  font-size: 16px;
+  margin: 0 0 8px;
+  color: var(--navy);
+  font-weight: 700;
+}
+.related-card p {
+  font-size: 14px;
+  color: var(--text-body);
+  margin: 0;
+  line-height: 1.5;
+}
+@media (max-width: 768px) { .nav-links { display:none; } .nav-kebab { display:flex; align-items:center; justify-content:center; } }
+@media (max-width: 640px) {
+  h1 { font-size: 32px; }
+  .related-grid { grid-template-columns: 1fr; }
+}
+"""
+
+# Knowledge hub (generate-knowledge-hub.py)
+HUB_CSS = """\
+:root { --paper-color: #FDFBF7; --primary-teal: #00A36F; --navy: #0D1B2A; --text-body: #5F6B7A; --radius-lg: 24px; --shadow-card: 0 10px 30px rgba(13, 27, 42, 0.05); }
+* { box-sizing: border-box; }
+body { font-family: 'Nunito', sans-serif; margin: 0; background: var(--paper-color); color: var(--navy); }
+.container { max-width: 980px; margin: 0 auto; padding: 0 24px; }
+nav { display: flex; justify-content: space-between; align-items: center; padding: 24px 0; }
+.logo { font-size: 22px; font-weight: 800; color: var(--navy); display: flex; align-items: center; gap: 8px; text-decoration: none; }
+.logo:hover { color: var(--primary-teal); }
+.logo-mark { width: 32px; height: 32px; border-radius: 8px; object-fit: cover; flex-shrink: 0; }
+.nav-links a { text-decoration: none; color: var(--navy); font-weight: 700; margin-left: 20px; }
+.nav-links a:hover { color: var(--primary-teal); }
+.nav-kebab { display: none; background: none; border: none; cursor: pointer; padding: 8px; color: var(--navy); border-radius: 8px; transition: background 0.2s; }
+.nav-kebab:hover { background: rgba(0,0,0,0.05); }
+.nav-kebab svg { width: 24px; height: 24px; }
+.nav-menu-mobile { display: none; position: absolute; top: 100%; right: 0; margin-top: 8px; background: white; border-radius: 16px; box-shadow: 0 10px 40px rgba(13,27,42,0.15); padding: 12px; min-width: 200px; z-index: 100; border: 1px solid rgba(0,0,0,0.06); }
+.nav-menu-mobile.open { display: flex; flex-direction: column; gap: 4px; }
+.nav-menu-mobile a { display: block; padding: 12px 16px; text-decoration: none; color: var(--navy); font-weight: 700; font-size: 15px; border-radius: 10px; transition: background 0.2s, color 0.2s; }
+.nav-menu-mobile a:hover { background: rgba(0,163,111,0.08); color: var(--primary-teal); }
+.nav-wrapper { position: relative; }
+@media (max-width: 768px) { .nav-links { display: none; } .nav-kebab { display: flex; align-items: center; justify-content: center; } }
+h1 { font-size: 36px; margin: 0 0 12px; }
+.sub { color: var(--text-body); margin-bottom: 32px; }
+.grid { display: grid; grid-template-columns: repeat(auto-fill, minmax(260px, 1fr)); gap: 16px; }
+.card { background: white; border-radius: var(--radius-lg); padding: 20px; box-shadow: var(--shadow-card); text-decoration: none; color: inherit; display: block; transition: transform 0.2s, box-shadow 0.2s; }
+.card:hover { transform: translateY(-4px); box-shadow: 0 20px 40px rgba(0,163,111,0.12); }
+.card h3 { font-size: 18px; margin: 0 0 6px; color: var(--navy); }
+.card p { font-size: 14px; color: var(--text-body); margin: 0; line-height: 1.4; }
+.hub-nav { display: block; padding: 0 0 24px; }
+.hub-categories, .hub-letters { display: flex; flex-wrap: wrap; gap: 8px; margin-bottom: 12px; }
+.hub-nav a, .hub-nav span { padding: 6px 12px; border-radius: 999px; background: white; box-shadow: var(--shadow-card); text-decoration: none; color: var(--navy); font-weight: 700; font-size: 14px; }
+.hub-letters a, .hub-letters span { padding: 4px 10px; }
+.hub-nav span { opacity: 0.35; box-shadow: none; }
+.hub-nav a:hover { color: var(--primary-teal); }
+.hub-nav a[aria-current="page"] { background: var(--primary-teal); color: #fff; }
+.hub-search { position: relative; margin: 0 0 24px; }
+.hub-search input { width: 100%; padding: 14px 20px; border-radius: 999px; border: 1px solid rgba(13,27,42,0.12); background: white; font: inherit; font-size: 16px; color: var(--navy); box-shadow: var(--shadow-card); }
+.hub-search input:focus { outline: 2px solid var(--primary-teal); outline-offset: 2px; }
+.hub-results { list-style: none; margin: 8px 0 0; padding: 8px; background: white; border-radius: 16px; box-shadow: 0 10px 40px rgba(13,27,42,0.15); }
+.hub-results a { display: block; padding: 10px 12px; border-radius: 10px; text-decoration: none; color: var(--navy); font-weight: 700; }
+.hub-results a:hover, .hub-results a:focus { background: rgba(0,163,111,0.08); color: var(--primary-teal); }
+.hub-results .empty { padding: 10px 12px; color: var(--text-body); }
+.pager { justify-content: center; gap: 16px; padding: 32px 0 0; color: var(--text-body); }
+.pager a { color: var(--primary-teal); font-weight: 700; text-decoration: none; }
+.btn { display: inline-flex; align-items: center; gap: 8px; padding: 14px 28px; border-radius: 999px; background: var(--navy); color: #fff; text-decoration: none; font-weight: 700; margin-top: 32px; }
+.btn:hover { opacity: 0.9; }
+footer { margin-top: 60px; padding: 40px 0; border-top: 1px solid rgba(0,0,0,0.05); color: var(--text-body); font-size: 14px; }
+.footer-content { display: flex; justify-content: space-between; align-items: center; flex-wrap: wrap; gap: 16px; }
+"""
+
+# Blog index and posts (generate-blog.py)
+BLOG_CSS = """\
+:root { --paper-color:#FDFBF7; --primary-teal:#00A36F; --navy:#0D1B2A; --text-body:#5F6B7A; --radius-lg:24px; --shadow-card:0 10px 30px rgba(13,27,42,.05); }
+* { box-sizing: border-box; }
+body { font-family:'Nunito',sans-serif; margin:0; background:var(--paper-color); color:var(--navy); }
+.container { max-width: 980px; margin: 0 auto; padding: 0 24px; }
+nav { display:flex; justify-content:space-between; align-items:center; padding:32px 0; }
+.logo { font-size:24px; font-weight:800; color:var(--navy); display:flex; align-items:center; gap:8px; text-decoration:none; }
+.logo:hover { color:var(--primary-teal); }
+.logo-mark { width:32px; height:32px; border-radius:8px; object-fit:cover; display:block; flex-shrink:0; }
+.nav-links a { text-decoration:none; color:var(--navy); font-weight:700; margin-left:24px; font-size:15px; transition:color 0.2s; border-radius:8px; padding:4px 8px; }
+.nav-links a:hover { color:var(--primary-teal); }
+.nav-links a:focus-visible { outline:2px solid var(--primary-teal); outline-offset:2px; }
+.nav-kebab { display:none; background:none; border:none; cursor:pointer; padding:8px; color:var(--navy); border-radius:8px; transition:background 0.2s; }
+.nav-kebab:hover { background: rgba(0,0,0,0.05); }
+.nav-kebab svg { width:24px; height:24px; }
+.nav-menu-mobile { display:none; position:absolute; top:100%; right:0; margin-top:8px; background:white; border-radius:16px; box-shadow:0 10px 40px rgba(13,27,42,0.15); padding:12px; min-width:200px; z-index:100; border:1px solid rgba(0,0,0,0.06); }
+.nav-menu-mobile.open { display:flex; flex-direction:column; gap:4px; }
+.nav-menu-mobile a { display:block; padding:12px 16px; text-decoration:none; color:var(--navy); font-weight:700; font-size:15px; border-radius:10px; transition:background 0.2s, color 0.2s; }
+.nav-menu-mobile a:hover { background: rgba(0,163,111,0.08); color: var(--primary-teal); }
+.nav-wrapper { position:relative; }
+@media (max-width: 768px) { .nav-links { display:none; } .nav-kebab { display:flex; align-items:center; justify-content:center; } }
+.main { background:#fff; border-radius:var(--radius-lg); box-shadow:var(--shadow-card); padding:28px; margin-bottom:28px; }
+h1,h2,h3 { line-height:1.2; }
+p,li { color:#334155; line-height:1.75; }
+a { color:#0f766e; }
+.meta { color:#64748b; font-size:14px; margin-bottom:14px; }
+.hero { width:100%; height:auto; border-radius:16px; margin: 12px 0 24px; }
+figure { margin: 24px 0; }
+figure img { width:100%; height:auto; border-radius:16px; }
+.cta-group { display:flex; gap:12px; flex-wrap:wrap; margin: 20px 0; }
+.btn { display:inline-flex; align-items:center; gap:10px; padding:16px 32px; border-radius:999px; text-decoration:none; font-weight:700; font-size:17px; transition: transform .2s ease, box-shadow .2s ease; }
+.btn:hover { transform: translateY(-3px) scale(1.02); box-shadow: 0 14px 28px rgba(13, 27, 42, 0.25); }
+.btn-primary { background: var(--navy); color:#fff !important; box-shadow: 0 10px 20px rgba(13, 27, 42, 0.2); }
+.grid { display:grid; grid-template-columns:repeat(auto-fill,minmax(280px,1fr)); gap:16px; }
+.card { background:white; border-radius:16px; padding:20px; box-shadow:var(--shadow-card); text-decoration:none; color:inherit; display:block; }
+.card:hover { transform:translateY(-2px); }
+.card p { margin:0; }
+footer { margin:32px 0; padding: 28px 0; border-top: 1px solid rgba(0,0,0,0.06); color:var(--text-body); font-size:14px; }
+.footer-content { display:flex; justify-content:space-between; align-items:center; flex-wrap:wrap; gap:16px; }
+"""
+
+# Nav menu, footer year and App Store CTA tracking, shared by every generator
+SITE_JS = """\
+(function () {
+  var yearEl = document.getElementById('y');
+  if (yearEl) yearEl.textContent = new Date().getFullYear();
+
+  var kebab = document.querySelector('.nav-kebab');
+  var menu = document.getElementById('nav-menu-mobile');
+  if (kebab && menu) {
+    kebab.addEventListener('click', function() {
+      var open = menu.classList.toggle('open');
+      kebab.setAttribute('aria-expanded', open ? 'true' : 'false');
+    });
+    document.addEventListener('click', function(e) {
+      if (!kebab.contains(e.target) && !menu.contains(e.target)) {
+        menu.classList.remove('open');
+        kebab.setAttribute('aria-expanded', 'false');
+      }
+    });
+  }
+
+  // GA4 key event: any App Store CTA / bio-link click
+  document.addEventListener('click', function (e) {
+    var link = e.target && e.target.closest ? e.target.closest('a[href]') : null;
+    if (!link) return;
+
+    var href = link.getAttribute('href') || '';
+    var isAppStore = href.indexOf('apps.apple.com/app/biteright-gluten-scanner') !== -1;
+    var isBioRoute = href === '/tt' || href === '/go' || href === '/app' || href.indexOf('/tt?') === 0 || href.indexOf('/go?') === 0 || href.indexOf('/app?') === 0;
+    if (!isAppStore && !isBioRoute) return;
+
+    if (typeof window.gtag === 'function') {
+      window.gtag('event', 'app_store_cta_click', {
+        event_category: 'engagement',
+        event_label: href,
+        link_url: href,
+        link_text: (link.textContent || '').trim().slice(0, 120)
+      });
+    }
+  }, true);
+})();
+"""
+
+# Knowledge hub search box (generate-knowledge-hub.py); reads the index
+# site_search.py writes, with its tokenizer and layout constants filled in below
+SEARCH_JS = """\
+(function () {
+  var form = document.querySelector('.hub-search');
+  if (!form || !window.fetch) return;
+  var base = form.getAttribute('data-index');
+  var input = form.querySelector('input');
+  var list = form.querySelector('.hub-results');
+  var STOPWORDS = __STOPWORDS__;
+  var PREFIX = __PREFIX_LENGTH__, DOCS = __DOCS_PER_SHARD__, LIMIT = 10;
+  var cache = {}, latest = 0, timer;
+
+  function load(path) {
+    if (!cache[path]) {
+      // A missing shard just means no term starts with that prefix
+      cache[path] = fetch(base + path).then(function (r) { return r.ok ? r.json() : {}; })
+        .catch(function () { delete cache[path]; return {}; });
+    }
+    return cache[path];
+  }
+
+  // Same rules as site_search.tokenize
+  function tokens(text) {
+    text = text.toLowerCase();
+    if (text.normalize) text = text.normalize('NFKD').replace(/[\u0300-\u036f]/g, '');
+    return (text.match(/[a-z0-9]+/g) || []).filter(function (t) {
+      return t.length >= PREFIX && STOPWORDS.indexOf(t) === -1;
+    });
+  }
+
+  // {doc id: score} for one query term: whole-word title hits beat prefix
+  // title hits, which beat ingredient hits
+  function scores(term) {
+    return load('t/' + term.slice(0, PREFIX) + '.json').then(function (shard) {
+      var out = {};
+      Object.keys(shard).forEach(function (key) {
+        if (key.indexOf(term) !== 0) return;
+        [key === term ? 3 : 2, 1].forEach(function (weight, field) {
+          var id = 0;
+          shard[key][field].forEach(function (delta) {
+            id += delta;
+            if (!(out[id] >= weight)) out[id] = weight;
+          });
+        });
+      });
+      return out;
+    });
+  }
+
+  function show(items, query) {
+    list.innerHTML = '';
+    if (!items.length) {
+      var empty = document.createElement('li');
+      empty.className = 'empty';
+      empty.textContent = 'No guides match \u201c' + query + '\u201d.';
+      list.appendChild(empty);
+    }
+    items.forEach(function (doc) {
+      var item = document.createElement('li');
+      var link = document.createElement('a');
+      link.href = '/' + doc[0] + '/';
+      link.textContent = doc[1];
+      item.appendChild(link);
+      list.appendChild(item);
+    });
+    list.hidden = false;
+  }
+
+  function search() {
+    var query = input.value.trim();
+    var terms = tokens(query);
+    var seq = ++latest;
+    if (!terms.length) { list.hidden = true; return; }
+    Promise.all(terms.map(scores)).then(function (perTerm) {
+      // Every term has to match; scores add up
+      var total = perTerm[0];
+      perTerm.slice(1).forEach(function (next) {
+        var both = {};
+        Object.keys(total).forEach(function (id) { if (next[id]) both[id] = total[id] + next[id]; });
+        total = both;
+      });
+      var ids = Object.keys(total).map(Number).sort(function (a, b) {
+        return total[b] - total[a] || a - b;
+      }).slice(0, LIMIT);
+      return Promise.all(ids.map(function (id) {
+        return load('d/' + Math.floor(id / DOCS) + '.json').then(function (docs) { return docs[id % DOCS]; });
+      }));
+    }).then(function (docs) {
+      if (seq === latest) show(docs.filter(Boolean), query);
+    });
+  }
+
+  input.addEventListener('input', function () {
+    clearTimeout(timer);
+    timer = setTimeout(search, 120);
+  });
+  input.addEventListener('keydown', function (e) {
+    if (e.key === 'Escape') { input.value = ''; list.hidden = true; }
+  });
+  form.addEventListener('submit', function (e) {
+    e.preventDefault();
+    clearTimeout(timer);
+    search();
+  });
+  var q = /[?&]q=([^&]*)/.exec(location.search);
+  if (q) {
+    input.value = decodeURIComponent(q[1].replace(/\\+/g, ' '));
+    search();
+  }
+})();
+""".replace("__STOPWORDS__", json.dumps(sorted(site_search.STOPWORDS))).replace(
+    "__PREFIX_LENGTH__", str(site_search.PREFIX_LENGTH)).replace("__DOCS_PER_SHARD__", str(site_search.DOCS_PER_SHARD))
+
+BUNDLES = {
+    "page.css": PAGE_CSS,
+    "hub.css": HUB_CSS,
+    "blog.css": BLOG_CSS,
+    "site.js": SITE_JS,
+    "search.js": SEARCH_JS,
+}
+
+
+def fingerprinted_name(name):
+    """page.css -> page.<first 10 hex of sha256>.css"""
+    stem, ext = name.rsplit(".", 1)
+    digest = hashlib.sha256(BUNDLES[name].encode("utf-8")).hexdigest()[:10]
+    return f"{stem}.{digest}.{ext}"
+
+
+def asset_url(name):
+    return ASSETS_PREFIX + fingerprinted_name(name)
+
+
+# Exactly the fingerprinted names of BUNDLES (page.<10 hex>.css and so on)
+BUNDLE_FILE_RE = re.compile("|".join(
+    rf"{re.escape(stem)}\.[0-9a-f]{{10}}\.{re.escape(ext)}" for stem, ext in (name.rsplit(".", 1) for name in BUNDLES)))
+
+
+def write_bundles(dist_dir):
+    """Write every bundle to <dist_dir>/assets/, with its previous versions.
+
+    Returns the current file names. Older fingerprints of a bundle are
+    deleted; other files in assets/ are left alone.
+    """
+    out_dir = Path(dist_dir) / "assets"
+    out_dir.mkdir(parents=True, exist_ok=True)
+    BUNDLE_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    history_path = BUNDLE_CACHE_DIR / "history.json"
+    try:
+        history = json.loads(history_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        history = {}
+
+    # bundle name -> kept file names, newest first
+    kept = {}
+    for name in BUNDLES:
+        current = fingerprinted_name(name)
+        cached = BUNDLE_CACHE_DIR / current
+        if not cached.exists():
+            cached.write_text(BUNDLES[name], encoding="utf-8")
+        older = [old for old in history.get(name, []) if old != current and (BUNDLE_CACHE_DIR / old).exists()]
+        kept[name] = [current] + older[:GENERATIONS - 1]
+    keep = {file_name for names in kept.values() for file_name in names}
+    for file_name in keep:
+        if not (out_dir / file_name).exists():
+            shutil.copyfile(BUNDLE_CACHE_DIR / file_name, out_dir / file_name)
+    for directory in (out_dir, BUNDLE_CACHE_DIR):
+        for path in directory.iterdir():
+            if path.name not in keep and BUNDLE_FILE_RE.fullmatch(path.name):
+                path.unlink()
+    history_path.write_text(json.dumps(kept, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+    return sorted(fingerprinted_name(name) for name in BUNDLES)
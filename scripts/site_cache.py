@@ -0,0 +1,139 @@
+"""Long-lived caching for dist/: fingerprinted static files and _headers.
+
+Every file under src/img and public/images gets a content-hashed copy under
+/assets/ (e.g. /img/biteright-icon.png -> /assets/img/biteright-icon.<hash>.png).
+asset_url() maps a URL to its copy; the templates use it, and the copied
+static pages are rewritten through rewrite_urls(). The originals stay where
+they were for external links and social previews. The URL -> copy map is
+written to .cache/asset-manifest.json, outside the deployed dist/.
+
+Hashes are cached in .cache/asset-fingerprints.json by size and mtime, so
+unchanged files aren't re-read.
+
+dist/_headers (Cloudflare static assets) gives everything content-addressed
+(/assets/, /images/v/ and the versioned search index) a one-year immutable
+Cache-Control, and HTML a short TTL with revalidation. Cloudflare sends a
+content-hash ETag with every asset and answers If-None-Match with a 304, so
+revalidation costs repeat visitors a 304 instead of the page. Per-page
+Last-Modified from meta.updated_at can't be set through _headers, which is
+capped at 100 rules; sitemap.xml carries those dates instead.
+"""
+import functools
+import hashlib
+import json
+import os
+import re
+from pathlib import Path
+from urllib.parse import urljoin
+
+import asset_sync
+
+ROOT = Path(__file__).resolve().parent.parent
+STATIC_DIRS = [(ROOT / "src" / "img", "/img/"), (ROOT / "public" / "images", "/images/")]
+FINGERPRINT_PREFIX = "/assets"
+CACHE_PATH = ROOT / ".cache" / "asset-fingerprints.json"
+MANIFEST_PATH = ROOT / ".cache" / "asset-manifest.json"
+URL_ATTR_RE = re.compile(r"""\b(src|href)=("|')([^"'>]+)\2""", re.I)
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+# (URL pattern, Cache-Control); patterns don't overlap, so no header is
+# merged from two rules. Bare /img/ and /images/ URLs get Cloudflare's default.
+CACHE_RULES = [
+    ("/assets/*", IMMUTABLE),
+    ("/images/v/*", IMMUTABLE),
+    ("/knowledge-hub/search/*", IMMUTABLE),
+    ("/", "public, max-age=300, must-revalidate"),
+    ("/*/", "public, max-age=300, must-revalidate"),
+]
+
+
+def fingerprinted(url, digest):
+    """/img/logo.png -> /assets/img/logo.<digest>.png"""
+    head, dot, ext = url.rpartition(".")
+    if not dot or "/" in ext:
+        return f"{FINGERPRINT_PREFIX}{url}.{digest}"
+    return f"{FINGERPRINT_PREFIX}{head}.{digest}.{ext}"
+
+
+@functools.lru_cache(maxsize=None)
+def fingerprints():
+    """{URL: fingerprinted URL} for every file under STATIC_DIRS."""
+    try:
+        cached = json.loads(CACHE_PATH.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        cached = {}
+    current, entries = {}, {}
+    for root, prefix in STATIC_DIRS:
+        if not root.exists():
+            continue
+        for path in sorted(p for p in root.rglob("*") if p.is_file()):
+            url = prefix + path.relative_to(root).as_posix()
+            st = path.stat()
+            entry = cached.get(url)
+            if entry is None or entry[:2] != [st.st_size, st.st_mtime_ns]:
+                entry = [st.st_size, st.st_mtime_ns, hashlib.sha256(path.read_bytes()).hexdigest()[:10]]
+            entries[url] = entry
+            current[url] = fingerprinted(url, entry[2])
+    if entries != cached:
+        CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        tmp = CACHE_PATH.with_name(f"{CACHE_PATH.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(entries, indent=1, sort_keys=True), encoding="utf-8")
+        os.replace(tmp, CACHE_PATH)
+    return current
+
+
+def asset_url(url):
+    """The fingerprinted URL for a static file's URL (url itself if it isn't one)."""
+    return fingerprints().get(url, url)
+
+
+def source_path(url):
+    for root, prefix in STATIC_DIRS:
+        if url.startswith(prefix):
+            return root / url[len(prefix):]
+    return None
+
+
+def rewrite_urls(page_html, page_url):
+    """page_html with src/href references to static files fingerprinted."""
+    table = fingerprints()
+
+    def replace(m):
+        target = table.get(urljoin(page_url, m.group(3)))
+        return f"{m.group(1)}={m.group(2)}{target}{m.group(2)}" if target else m.group(0)
+    return URL_ATTR_RE.sub(replace, page_html)
+
+
+def render_headers():
+    blocks = [f"{pattern}\n  Cache-Control: {value}" for pattern, value in CACHE_RULES]
+    return "# Generated by scripts/site_cache.py (CACHE_RULES); don't edit.\n" + "\n".join(blocks) + "\n"
+
+
+def publish(dist_dir):
+    """Write the fingerprinted copies, the manifest and _headers into dist_dir.
+
+    Returns the number of copies written.
+    """
+    dist_dir = Path(dist_dir)
+    table = fingerprints()
+    written = 0
+    for url, target in table.items():
+        dst = dist_dir / target.lstrip("/")
+        if not dst.exists():
+            dst.parent.mkdir(parents=True, exist_ok=True)
+            asset_sync.place(source_path(url), dst)
+            written += 1
+    # Drop copies of files that changed or were deleted
+    current = {dist_dir / target.lstrip("/") for target in table.values()}
+    for _, prefix in STATIC_DIRS:
+        root = dist_dir / FINGERPRINT_PREFIX.strip("/") / prefix.strip("/")
+        if root.exists():
+            for path in [p for p in root.rglob("*") if p.is_file() and p not in current]:
+                path.unlink()
+            for directory in sorted((p for p in root.rglob("*") if p.is_dir()), reverse=True):
+                if not any(directory.iterdir()):
+                    directory.rmdir()
+    MANIFEST_PATH.parent.mkdir(parents=True, exist_ok=True)
+    MANIFEST_PATH.write_text(json.dumps(table, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+    (dist_dir / "_headers").write_text(render_headers(), encoding="utf-8")
+    return written
@@ -0,0 +1,131 @@
+"""Category rules for programmatic pages.
+
+Shared by build-pages.py (related-page selection), build-with-related.py and
+the content store. RULES is the whole rule table: the first rule with a
+keyword in the page's topic_key (or title, where listed) wins, otherwise the
+page is 'other'. A page's JSON can name its category outright with a
+top-level "category" field.
+
+The keywords are compiled into one Aho-Corasick automaton per field, so a
+page costs one pass over its topic_key and title however long the keyword
+lists grow. Results are memoized per (topic_key, title, category override).
+"""
+import collections
+import functools
+
+# Categories for related content
+CATEGORIES = {
+    'sauces': [],
+    'noodles': [],
+    'breakfast': [],
+    'meals': [],
+    'bread_baked': [],
+    'asian': [],
+    'condiments': [],
+    'other': []
+}
+DEFAULT_CATEGORY = 'other'
+
+# (category, fields searched, keywords), in priority order
+RULES = [
+    ('sauces', ('topic_key', 'title'), ['sauce']),
+    ('noodles', ('topic_key',), ['noodle', 'vermicelli', 'pasta', 'tortilla', 'wrapper', 'dumpling', 'spring-roll']),
+    ('breakfast', ('topic_key',), ['egg', 'pancake', 'waffle', 'bacon', 'oat', 'hash-brown', 'omelette']),
+    ('bread_baked', ('topic_key',), ['bread', 'bagel', 'croissant', 'pretzel', 'matzo', 'crumb']),
+    ('asian', ('topic_key',), ['miso', 'ramen', 'pho', 'pad-thai', 'teriyaki', 'sushi', 'tempura',
+                               'kimchi', 'gochujang', 'hoisin', 'oyster', 'soy', 'tamari',
+                               'tempeh', 'edamame']),
+    ('condiments', ('topic_key',), ['vinegar', 'mustard', 'ketchup', 'mayonnaise', 'tzatziki']),
+    ('meals', ('topic_key',), ['stir-fry', 'curry', 'chicken', 'meatball', 'sausage',
+                               'nugget', 'fish-and-chips', 'sweet-and-sour', 'stuffing']),
+]
+
+
+class Matcher:
+    """Aho-Corasick automaton finding the highest-priority rule with a keyword in a string.
+
+    Each character costs one transition (plus amortised fail-link steps),
+    whatever the number of keywords.
+    """
+
+    def __init__(self, keywords):
+        # keywords: {keyword: rule index}; state 0 is the root
+        self.goto = [{}]
+        self.best = [None]  # lowest rule index ending at each state
+        for keyword, rule in keywords.items():
+            state = 0
+            for char in keyword:
+                nxt = self.goto[state].get(char)
+                if nxt is None:
+                    nxt = self.goto[state][char] = len(self.goto)
+                    self.goto.append({})
+                    self.best.append(None)
+                state = nxt
+            if self.best[state] is None or rule < self.best[state]:
+                self.best[state] = rule
+        # Breadth-first, so a state's fail target is final before its children need it
+        self.fail = [0] * len(self.goto)
+        queue = collections.deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, nxt in self.goto[state].items():
+                queue.append(nxt)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(char, 0)
+                self.fail[nxt] = target if target != nxt else 0
+                # Keywords that are suffixes of this state's text end here too
+                inherited = self.best[self.fail[nxt]]
+                if inherited is not None and (self.best[nxt] is None or inherited < self.best[nxt]):
+                    self.best[nxt] = inherited
+
+    def __call__(self, text):
+        """Lowest rule index matched in text, or None."""
+        goto, fail, best_at = self.goto, self.fail, self.best
+        state, best = 0, None
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            rule = best_at[state]
+            if rule is not None and (best is None or rule < best):
+                if rule == 0:
+                    return 0
+                best = rule
+        return best
+
+
+def compile_rules(rules):
+    """{field: Matcher} for a rule table shaped like RULES."""
+    keywords = {}
+    for index, (_, fields, words) in enumerate(rules):
+        for field in fields:
+            for word in words:
+                keywords.setdefault(field, {}).setdefault(word.lower(), index)
+    return {field: Matcher(words) for field, words in keywords.items()}
+
+
+MATCHERS = compile_rules(RULES)
+
+
+def classify(topic_key, title, override=None, rules=RULES, matchers=MATCHERS):
+    """The category for one page's topic_key/title, honouring a valid override."""
+    if override in CATEGORIES:
+        return override
+    fields = {'topic_key': topic_key.lower(), 'title': title.lower()}
+    best = None
+    for field, matcher in matchers.items():
+        rule = matcher(fields[field])
+        if rule is not None and (best is None or rule < best):
+            best = rule
+    return rules[best][0] if best is not None else DEFAULT_CATEGORY
+
+
+_classify_cached = functools.lru_cache(maxsize=None)(classify)
+
+
+def categorize_page(page):
+    """Determine the category for a page (a PageRecord or page dict)."""
+    override = page.get('category')
+    return _classify_cached(page['topic_key'], page['title'], override if isinstance(override, str) else None)
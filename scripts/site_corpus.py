@@ -0,0 +1,297 @@
+"""The parsed programmatic-page corpus shared by the build stages.
+
+build-site.py reads and validates content/pages once into a Corpus and hands
+it to the knowledge hub, the page renderer, the sitemap and link verification;
+the standalone scripts load the same Corpus for their own runs. Only compact
+per-page metadata is kept; full documents are re-read from disk when a page is
+rendered.
+
+What each file contributes is cached in .cache/pages-corpus.bin (marshal),
+stored column by column and checked against every file's mtime and size, so
+a warm load is one sequential read plus a stat per file. Changed files are
+re-hashed and only re-parsed when their content differs. Files modified
+within RACY_WINDOW_NS of the cache being written are always re-hashed,
+because a second edit in the same mtime tick wouldn't show up in the stat.
+The cache is dropped whenever this module or one whose output it stores
+(CACHED_MODULES) changes; delete the file to force a cold load.
+"""
+import gc
+import hashlib
+import json
+import marshal
+import os
+import time
+from array import array
+from collections import namedtuple
+from pathlib import Path
+
+import build_trace
+import site_categories
+import site_search
+import site_sitemap
+from site_categories import CATEGORIES
+from site_sitemap import SITE_ORIGIN
+
+CACHE_PATH = Path(__file__).resolve().parent.parent / ".cache" / "pages-corpus.bin"
+RACY_WINDOW_NS = 2_000_000_000
+
+# Related cards show description[:100] plus "..." when longer, so 101 chars
+# is all the metadata index needs to keep.
+DESCRIPTION_LIMIT = 101
+
+# Same rules as scripts/validate-pages.mjs
+REQUIRED_FIELDS = ["schema_version", "topic_key", "slug", "title", "verdict", "disclaimer"]
+
+
+class PageRecord(namedtuple('PageRecord', 'slug title topic_key description source_hash category file')):
+    """Compact metadata for one page; the full JSON is re-read on demand.
+
+    A namedtuple so a warm load can build 100k of them cheaply; file is the
+    page's path as a str for the same reason. Supports page['slug']-style
+    access so the selection helpers work on records and plain dicts alike.
+    """
+    __slots__ = ()
+
+    def __getitem__(self, key):
+        return getattr(self, key) if key.__class__ is str else tuple.__getitem__(self, key)
+
+    def get(self, key, default=None):
+        return getattr(self, key, default)
+
+    @property
+    def path(self):
+        return Path(self.file)
+
+    @property
+    def full_data(self):
+        """The parsed page JSON, loaded fresh so it is never held corpus-wide."""
+        with build_trace.span("json_load", slug=self.slug):
+            return json.loads(Path(self.file).read_text(encoding="utf-8"))
+
+
+def page_record(path, raw, data):
+    """Build the PageRecord for one page file from its raw bytes and parsed JSON."""
+    return PageRecord(
+        slug=data.get('slug', path.stem),
+        title=data.get('heading', data.get('title', '')),
+        topic_key=data.get('topic_key', ''),
+        description=data.get('verdict', {}).get('summary', data.get('description', ''))[:DESCRIPTION_LIMIT],
+        source_hash=hashlib.sha256(raw).hexdigest(),
+        category=data.get('category') if isinstance(data.get('category'), str) else None,
+        file=os.fspath(path),
+    )
+
+
+def short_desc(page):
+    """Generate a short description from page data."""
+    verdict = page.get("verdict", {})
+    summary = verdict.get("summary", "")
+    if len(summary) > 80:
+        return summary[:77] + "..."
+    return summary
+
+
+def hub_card(stem, data):
+    """The knowledge hub's (slug, title, short description) card for one page."""
+    slug = data.get("slug", stem)
+    title = data.get("heading", data.get("title", slug.replace("-", " ").title()))
+    return (slug, title, short_desc(data))
+
+
+def sitemap_entry(record, data):
+    """(loc, lastmod) for one page; lastmod is None without meta.updated_at."""
+    meta = data.get('meta') if isinstance(data.get('meta'), dict) else {}
+    return (data.get('canonical') or f"{SITE_ORIGIN}/{record.slug}/", meta.get('updated_at'))
+
+
+def validate_page(path, data):
+    """Return the problems with one page's JSON (empty when it is valid)."""
+    problems = [f"missing '{k}'" for k in REQUIRED_FIELDS if k not in data]
+    if 'slug' in data and data['slug'] != path.stem:
+        problems.append(f"slug mismatch: slug='{data['slug']}' filename='{path.stem}'")
+    verdict = data.get('verdict') if isinstance(data.get('verdict'), dict) else {}
+    if not verdict.get('status'):
+        problems.append("missing verdict.status")
+    if not verdict.get('summary'):
+        problems.append("missing verdict.summary")
+    if 'disclaimer' in data and len(data['disclaimer'] or '') < 10:
+        problems.append("disclaimer too short")
+    if 'category' in data and not (isinstance(data['category'], str) and data['category'] in CATEGORIES):
+        problems.append(f"unknown category '{data['category']}' (expected one of: {', '.join(CATEGORIES)})")
+    return problems
+
+
+class Corpus:
+    """Every stage's view of content/pages, from a single parse.
+
+    - pages: PageRecords in file-name order (what build-pages.py renders)
+    - cards: knowledge hub cards (hub_card), one per page
+    - sitemap: (loc, lastmod) per page; lastmod is None without meta.updated_at
+    - search: site_search.page_terms (title terms, ingredient terms) per page
+    - problems: (file name, problem) pairs from validate_page, plus files
+      that aren't valid JSON (those are left out of the lists above)
+    """
+
+    def __init__(self, pages, cards, sitemap, search, problems):
+        self.pages = pages
+        self.cards = cards
+        self.sitemap = sitemap
+        self.search = search
+        self.problems = problems
+
+    def invalid_json(self):
+        return [(name, problem) for name, problem in self.problems if problem.startswith("invalid JSON")]
+
+
+# Cache columns, one list per field; lastmod is '' when absent and a page's
+# validation problems are joined with newlines.
+COLUMNS = ('slug', 'title', 'topic_key', 'description', 'source_hash', 'category',
+           'card_slug', 'card_title', 'card_desc', 'loc', 'lastmod', 'search_title', 'search_ingredients',
+           'problems')
+
+
+def parse_page(path, raw):
+    """One page file's COLUMNS values."""
+    data = json.loads(raw.decode("utf-8"))
+    record = page_record(path, raw, data)
+    loc, lastmod = sitemap_entry(record, data)
+    card = hub_card(path.stem, data)
+    return (record.slug, record.title, record.topic_key, record.description, record.source_hash, record.category,
+            *card, loc, lastmod or '', *site_search.page_terms(card[1], data), "\n".join(validate_page(path, data)))
+
+
+# Modules whose output ends up in the cached columns; editing any of them
+# (e.g. site_search.STOPWORDS) invalidates the cache
+CACHED_MODULES = [Path(__file__), Path(site_search.__file__), Path(site_categories.__file__),
+                  Path(site_sitemap.__file__)]
+
+
+def _cache_key():
+    h = hashlib.sha256()
+    for path in CACHED_MODULES:
+        h.update(path.read_bytes())
+    return h.hexdigest()
+
+
+def read_cache(cache_path):
+    """The cache dict (names, mtimes, sizes, columns, written_ns), or None if unusable."""
+    try:
+        cache = marshal.loads(Path(cache_path).read_bytes())
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    if not isinstance(cache, dict) or cache.get('key') != _cache_key():
+        return None
+    cache['mtimes'] = array('q', cache['mtimes'])
+    cache['sizes'] = array('q', cache['sizes'])
+    return cache
+
+
+def write_cache(cache_path, names, mtimes, sizes, columns):
+    cache_path = Path(cache_path)
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+    tmp.write_bytes(marshal.dumps({
+        'key': _cache_key(), 'written_ns': time.time_ns(), 'names': names,
+        'mtimes': mtimes.tobytes(), 'sizes': sizes.tobytes(), 'columns': columns,
+    }))
+    os.replace(tmp, cache_path)
+
+
+def _refresh(pages_dir, names, mtimes, sizes, cache, problems):
+    """Columns for names, re-parsing the files whose cached entry can't be trusted.
+
+    Returns (names, mtimes, sizes, columns, dirty); files that aren't valid JSON
+    are reported in problems and left out.
+    """
+    if cache is None:
+        cache = {'names': [], 'mtimes': array('q'), 'sizes': array('q'), 'written_ns': 0,
+                 'columns': [[] for _ in COLUMNS]}
+    cached_at = {name: i for i, name in enumerate(cache['names'])}
+    cached_columns = cache['columns']
+    racy_after = cache['written_ns'] - RACY_WINDOW_NS
+    out_names, out_mtimes, out_sizes = [], array('q'), array('q')
+    columns = [[] for _ in COLUMNS]
+    dirty = len(cached_at) != len(names)
+    for name, mtime, size in zip(names, mtimes, sizes):
+        j = cached_at.get(name)
+        fresh = j is not None and cache['mtimes'][j] == mtime and cache['sizes'][j] == size
+        if fresh and mtime < racy_after:
+            values = [column[j] for column in cached_columns]
+        else:
+            path = pages_dir / name
+            raw = path.read_bytes()
+            if j is not None and cached_columns[4][j] == hashlib.sha256(raw).hexdigest():
+                values = [column[j] for column in cached_columns]  # touched, not changed
+                dirty = dirty or not fresh
+            else:
+                try:
+                    values = parse_page(path, raw)
+                except ValueError as e:
+                    problems.append((name, f"invalid JSON: {e}"))
+                    dirty = dirty or j is not None
+                    continue
+                dirty = True
+        out_names.append(name)
+        out_mtimes.append(mtime)
+        out_sizes.append(size)
+        for column, value in zip(columns, values):
+            column.append(value)
+    return out_names, out_mtimes, out_sizes, columns, dirty
+
+
+@build_trace.traced()
+def load_corpus(pages_dir, excluded, cache_path=CACHE_PATH):
+    """Read, parse and validate every page JSON under pages_dir.
+
+    Unchanged files come from the cache at cache_path (None disables it).
+    """
+    # Building a few hundred thousand tuples would otherwise trigger repeated
+    # cyclic-GC passes over everything allocated so far; nothing here is cyclic.
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return _load_corpus(Path(pages_dir), excluded, cache_path)
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+
+def _load_corpus(pages_dir, excluded, cache_path):
+    prefix = os.path.join(os.fspath(pages_dir), "")
+    names = sorted(name for name in os.listdir(pages_dir) if name.endswith(".json"))
+    stats = [os.stat(prefix + name) for name in names]
+    mtimes = array('q', [st.st_mtime_ns for st in stats])
+    sizes = array('q', [st.st_size for st in stats])
+    del stats
+
+    cache = read_cache(cache_path) if cache_path is not None else None
+    problems = []
+    if (cache is not None and cache['names'] == names and cache['mtimes'] == mtimes
+            and cache['sizes'] == sizes and (not mtimes or max(mtimes) < cache['written_ns'] - RACY_WINDOW_NS)):
+        columns = cache['columns']  # nothing changed since the cache was written
+    else:
+        # Excluded files are cached too, so scripts with different exclusions share one cache
+        names, mtimes, sizes, columns, dirty = _refresh(pages_dir, names, mtimes, sizes, cache, problems)
+        if cache_path is not None and dirty:
+            write_cache(cache_path, names, mtimes, sizes, columns)
+    del cache
+
+    (slugs, titles, topic_keys, descriptions, hashes, categories, card_slugs, card_titles, card_descs,
+     locs, lastmods, search_titles, search_ingredients, page_problems) = columns
+    files = [prefix + name for name in names]
+    if excluded:
+        problems = [(name, problem) for name, problem in problems if name[:-5] not in excluded]
+        keep = [name[:-5] not in excluded for name in names]
+        if not all(keep):
+            names, files, *columns = ([value for value, kept in zip(column, keep) if kept]
+                                      for column in [names, files, *columns])
+            (slugs, titles, topic_keys, descriptions, hashes, categories, card_slugs, card_titles, card_descs,
+             locs, lastmods, search_titles, search_ingredients, page_problems) = columns
+    pages = list(map(PageRecord._make, zip(slugs, titles, topic_keys, descriptions, hashes, categories, files)))
+    cards = list(zip(card_slugs, card_titles, card_descs))
+    sitemap = list(zip(locs, [lastmod or None for lastmod in lastmods]))
+    search = list(zip(search_titles, search_ingredients))
+    problems.extend((name, problem) for name, joined in zip(names, page_problems) if joined
+                    for problem in joined.split("\n"))
+    problems.sort(key=lambda item: item[0])
+    return Corpus(pages, cards, sitemap, search, problems)
@@ -0,0 +1,75 @@
+"""Feather icons, inlined as SVG at build time.
+
+The shared templates call icon() directly. For the hand-written src/ pages,
+build-pages.py passes dist's copies through inline_icons(). That function
+replaces each <i data-feather="name"> with the same <svg> that
+feather.replace() would have built in the browser, and drops the
+feather-icons <script>. The result is one less render-blocking third-party
+request on every page, and no layout shift when the icons appear.
+
+ICONS holds the bodies of the icons the site uses, copied from feather-icons
+4.29 (MIT, Cole Bemis). To use a new icon, add its body here from
+https://github.com/feathericons/feather/tree/main/icons.
+"""
+import html
+import re
+
+ICONS = {
+    "alert-triangle": '<path d="M10.29 3.86L1.82 18a2 2 0 0 0 1.71 3h16.94a2 2 0 0 0 1.71-3L13.71 3.86a2 2 0 0 0-3.42 0z"></path><line x1="12" y1="9" x2="12" y2="13"></line><line x1="12" y1="17" x2="12.01" y2="17"></line>',
+    "arrow-right": '<line x1="5" y1="12" x2="19" y2="12"></line><polyline points="12 5 19 12 12 19"></polyline>',
+    "book-open": '<path d="M2 3h6a4 4 0 0 1 4 4v14a3 3 0 0 0-3-3H2z"></path><path d="M22 3h-6a4 4 0 0 0-4 4v14a3 3 0 0 1 3-3h7z"></path>',
+    "camera": '<path d="M23 19a2 2 0 0 1-2 2H3a2 2 0 0 1-2-2V8a2 2 0 0 1 2-2h4l2-3h6l2 3h4a2 2 0 0 1 2 2z"></path><circle cx="12" cy="13" r="4"></circle>',
+    "credit-card": '<rect x="1" y="4" width="22" height="16" rx="2" ry="2"></rect><line x1="1" y1="10" x2="23" y2="10"></line>',
+    "globe": '<circle cx="12" cy="12" r="10"></circle><line x1="2" y1="12" x2="22" y2="12"></line><path d="M12 2a15.3 15.3 0 0 1 4 10 15.3 15.3 0 0 1-4 10 15.3 15.3 0 0 1-4-10 15.3 15.3 0 0 1 4-10z"></path>',
+    "grid": '<rect x="3" y="3" width="7" height="7"></rect><rect x="14" y="3" width="7" height="7"></rect><rect x="14" y="14" width="7" height="7"></rect><rect x="3" y="14" width="7" height="7"></rect>',
+    "heart": '<path d="M20.84 4.61a5.5 5.5 0 0 0-7.78 0L12 5.67l-1.06-1.06a5.5 5.5 0 0 0-7.78 7.78l1.06 1.06L12 21.23l7.78-7.78 1.06-1.06a5.5 5.5 0 0 0 0-7.78z"></path>',
+    "home": '<path d="M3 9l9-7 9 7v11a2 2 0 0 1-2 2H5a2 2 0 0 1-2-2z"></path><polyline points="9 22 9 12 15 12 15 22"></polyline>',
+    "instagram": '<rect x="2" y="2" width="20" height="20" rx="5" ry="5"></rect><path d="M16 11.37A4 4 0 1 1 12.63 8 4 4 0 0 1 16 11.37z"></path><line x1="17.5" y1="6.5" x2="17.51" y2="6.5"></line>',
+    "life-buoy": '<circle cx="12" cy="12" r="10"></circle><circle cx="12" cy="12" r="4"></circle><line x1="4.93" y1="4.93" x2="9.17" y2="9.17"></line><line x1="14.83" y1="14.83" x2="19.07" y2="19.07"></line><line x1="14.83" y1="9.17" x2="19.07" y2="4.93"></line><line x1="14.83" y1="9.17" x2="18.36" y2="5.64"></line><line x1="4.93" y1="19.07" x2="9.17" y2="14.83"></line>',
+    "lock": '<rect x="3" y="11" width="18" height="11" rx="2" ry="2"></rect><path d="M7 11V7a5 5 0 0 1 10 0v4"></path>',
+    "maximize-2": '<polyline points="15 3 21 3 21 9"></polyline><polyline points="9 21 3 21 3 15"></polyline><line x1="21" y1="3" x2="14" y2="10"></line><line x1="3" y1="21" x2="10" y2="14"></line>',
+    "message-circle": '<path d="M21 11.5a8.38 8.38 0 0 1-.9 3.8 8.5 8.5 0 0 1-7.6 4.7 8.38 8.38 0 0 1-3.8-.9L3 21l1.9-5.7a8.38 8.38 0 0 1-.9-3.8 8.5 8.5 0 0 1 4.7-7.6 8.38 8.38 0 0 1 3.8-.9h.5a8.48 8.48 0 0 1 8 8v.5z"></path>',
+    "more-vertical": '<circle cx="12" cy="12" r="1"></circle><circle cx="12" cy="5" r="1"></circle><circle cx="12" cy="19" r="1"></circle>',
+    "search": '<circle cx="11" cy="11" r="8"></circle><line x1="21" y1="21" x2="16.65" y2="16.65"></line>',
+    "shield": '<path d="M12 22s8-4 8-10V5l-8-3-8 3v7c0 6 8 10 8 10z"></path>',
+    "user": '<path d="M20 21v-2a4 4 0 0 0-4-4H8a4 4 0 0 0-4 4v2"></path><circle cx="12" cy="7" r="4"></circle>',
+}
+
+# feather's defaults; attributes from the <i> (style, aria-*) are added after them
+DEFAULT_ATTRS = {
+    "xmlns": "http://www.w3.org/2000/svg", "width": "24", "height": "24", "viewBox": "0 0 24 24",
+    "fill": "none", "stroke": "currentColor", "stroke-width": "2",
+    "stroke-linecap": "round", "stroke-linejoin": "round",
+}
+ICON_TAG_RE = re.compile(r"<i\b([^>]*\bdata-feather\s*=\s*[^>]*)>\s*</i>", re.I)
+ATTR_RE = re.compile(r'([a-zA-Z][\w:-]*)\s*=\s*("[^"]*"|\'[^\']*\')')
+SCRIPT_RE = re.compile(r"[ \t]*<script\b[^>]*\bsrc=[\"'][^\"']*/feather(?:\.min)?\.js[\"'][^>]*>\s*</script>[ \t]*\n?", re.I)
+
+
+def icon(name, **attrs):
+    """Inline <svg> for the feather icon name; attrs are extra attributes (class_ for class)."""
+    attrs = {"class" if key == "class_" else key.replace("_", "-"): value for key, value in attrs.items()}
+    classes = " ".join(filter(None, ["feather", f"feather-{name}", attrs.pop("class", "")]))
+    merged = {**DEFAULT_ATTRS, "class": classes, **attrs}
+    rendered = " ".join(f'{key}="{html.escape(value)}"' for key, value in merged.items())
+    return f"<svg {rendered}>{ICONS[name]}</svg>"
+
+
+def inline_icons(page_html):
+    """(page_html with its feather icons inlined and the feather script removed,
+    names of icons it uses that aren't in ICONS).
+
+    Unknown icons are left as they are; feather.replace() doesn't render them
+    either.
+    """
+    unknown = set()
+
+    def replace(m):
+        attrs = {key: html.unescape(value[1:-1]) for key, value in ATTR_RE.findall(m.group(1))}
+        name = attrs.pop("data-feather", "")
+        if name not in ICONS:
+            unknown.add(name)
+            return m.group(0)
+        return icon(name, **{"class_" if key == "class" else key: value for key, value in attrs.items()})
+    page_html = ICON_TAG_RE.sub(replace, page_html)
+    return SCRIPT_RE.sub("", page_html), sorted(unknown)
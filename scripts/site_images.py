@@ -0,0 +1,285 @@
+"""Responsive image variants for public/images and src/img.
+
+build_variants() re-encodes every raster image at least MIN_WIDTH wide as
+AVIF and WebP at each of WIDTHS below its own width (plus its own width,
+capped at the largest). It also makes a tiny blurred WebP placeholder that is
+inlined as a data URI. Variants are cached in .cache/images under a hash of
+the source bytes and the encoder settings, so an image is only re-encoded
+when it changes, and encoding runs in a process pool. The results are
+recorded in .cache/images/index.json (URL -> entry).
+
+publish() links the variants into dist/images/v/ (their names are
+content-addressed, so they can be cached forever). generate-blog.py emits
+markup for them through img_html(), and build-pages.py gives the <img> tags
+of the copied static pages the same treatment with rewrite_imgs():
+
+  <picture>
+    <source type="image/avif" srcset="... 480w, ... 960w" sizes="..." />
+    <source type="image/webp" ... />
+    <img src="<original>" width=".." height=".." loading="lazy" ... />
+  </picture>
+
+Pillow is optional. Without it no variants are made, and images are still
+given width/height, read from the file headers.
+"""
+import base64
+import hashlib
+import html
+import io
+import json
+import os
+import re
+import shutil
+import struct
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from urllib.parse import urljoin
+
+import build_trace
+import site_cache
+
+try:
+    from PIL import Image, ImageFilter, features
+except ImportError:  # optional; see the module docstring
+    Image = None
+
+ROOT = Path(__file__).resolve().parent.parent
+SOURCE_DIRS = [(ROOT / "public" / "images", "/images/"), (ROOT / "src" / "img", "/img/")]
+CACHE_DIR = ROOT / ".cache" / "images"
+INDEX_PATH = CACHE_DIR / "index.json"
+VARIANTS_URL = "/images/v/"
+EXTENSIONS = {".png", ".jpg", ".jpeg", ".webp"}
+
+WIDTHS = (480, 768, 1080, 1600)
+MIN_WIDTH = 400
+# Encoder options; AVIF speed 8 is ~3x faster than the default for ~10% more bytes
+ENCODER_OPTIONS = {"avif": {"quality": 50, "speed": 8}, "webp": {"quality": 75, "method": 4}}
+PLACEHOLDER_WIDTH = 16
+DEFAULT_SIZES = "(max-width: 980px) 100vw, 980px"
+IMG_RE = re.compile(r"<img\b[^>]*>", re.I)
+ATTR_RE = re.compile(r'([a-zA-Z][\w-]*)\s*=\s*("[^"]*"|\'[^\']*\')')
+
+
+def formats():
+    """The variant formats this Pillow can write, best first."""
+    if Image is None:
+        return []
+    return [fmt for fmt in ("avif", "webp") if features.check(fmt)]
+
+
+def settings_key():
+    return json.dumps([WIDTHS, ENCODER_OPTIONS, PLACEHOLDER_WIDTH, formats()])
+
+
+def image_size(data):
+    """(width, height) from PNG, JPEG or WebP header bytes, or None."""
+    if data[:8] == b"\x89PNG\r\n\x1a\n":
+        return struct.unpack(">II", data[16:24])
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        chunk = data[12:16]
+        if chunk == b"VP8 ":
+            w, h = struct.unpack("<HH", data[26:30])
+            return w & 0x3FFF, h & 0x3FFF
+        if chunk == b"VP8L":
+            bits = int.from_bytes(data[21:25], "little")
+            return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+        if chunk == b"VP8X":
+            return int.from_bytes(data[24:27], "little") + 1, int.from_bytes(data[27:30], "little") + 1
+        return None
+    if data[:2] == b"\xff\xd8":
+        i = 2
+        while i + 9 < len(data) and data[i] == 0xFF:
+            marker = data[i + 1]
+            if marker == 0xFF:  # fill byte
+                i += 1
+                continue
+            if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):  # start of frame
+                h, w = struct.unpack(">HH", data[i + 5:i + 9])
+                return w, h
+            i += 2 + struct.unpack(">H", data[i + 2:i + 4])[0]
+    return None
+
+
+def variant_widths(width):
+    if width < MIN_WIDTH:
+        return []
+    return [w for w in WIDTHS if w < width] + [min(width, WIDTHS[-1])]
+
+
+def variant_name(digest, width, fmt):
+    return f"{digest}-{width}.{fmt}"
+
+
+def encode(job):
+    """Write one source image's variants into CACHE_DIR; returns its placeholder data URI."""
+    path, digest, widths, fmts = job
+    with Image.open(path) as im:
+        im.load()
+        has_alpha = im.mode in ("RGBA", "LA", "PA") or "transparency" in im.info
+        im = im.convert("RGBA" if has_alpha else "RGB")
+        for width in widths:
+            height = round(im.height * width / im.width)
+            resized = im if width == im.width else im.resize((width, height), Image.LANCZOS)
+            for fmt in fmts:
+                tmp = CACHE_DIR / f".{variant_name(digest, width, fmt)}.{os.getpid()}.tmp"
+                resized.save(tmp, fmt.upper(), **ENCODER_OPTIONS[fmt])
+                os.replace(tmp, CACHE_DIR / variant_name(digest, width, fmt))
+        if has_alpha:
+            return ""  # a blurred backdrop would show through transparent areas
+        tiny = im.resize((PLACEHOLDER_WIDTH, max(1, round(im.height * PLACEHOLDER_WIDTH / im.width))))
+        buf = io.BytesIO()
+        tiny.filter(ImageFilter.GaussianBlur(1)).save(buf, "WEBP", quality=30)
+        return "data:image/webp;base64," + base64.b64encode(buf.getvalue()).decode("ascii")
+
+
+def source_images():
+    """(URL, path) for every raster image under SOURCE_DIRS."""
+    for root, prefix in SOURCE_DIRS:
+        if not root.exists():
+            continue
+        for path in sorted(root.rglob("*")):
+            if path.suffix.lower() in EXTENSIONS and path.is_file():
+                yield prefix + path.relative_to(root).as_posix(), path
+
+
+def load_index(path=INDEX_PATH):
+    """URL -> entry from the last build_variants() run ({} before the first)."""
+    try:
+        return json.loads(Path(path).read_text(encoding="utf-8")).get("images", {})
+    except (OSError, ValueError):
+        return {}
+
+
+@build_trace.traced()
+def build_variants(jobs=None):
+    """Bring the variant cache and index up to date; returns (images, encoded)."""
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    try:
+        previous = json.loads(INDEX_PATH.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        previous = {}
+    old = previous.get("images", {}) if previous.get("key") == settings_key() else {}
+    old_by_hash = {entry["hash"]: entry for entry in old.values()}
+    fmts = formats()
+
+    images, todo = {}, []
+    for url, path in source_images():
+        st = path.stat()
+        entry = old.get(url)
+        if entry and entry["mtime_ns"] == st.st_mtime_ns and entry["size"] == st.st_size:
+            images[url] = entry
+            continue
+        data = path.read_bytes()
+        size = image_size(data)
+        if size is None:
+            continue
+        digest = hashlib.sha256(data + settings_key().encode("utf-8")).hexdigest()[:16]
+        widths = variant_widths(size[0]) if fmts else []
+        entry = {"mtime_ns": st.st_mtime_ns, "size": st.st_size, "hash": digest, "width": size[0],
+                 "height": size[1], "widths": widths, "formats": fmts if widths else [], "placeholder": ""}
+        reuse = old_by_hash.get(digest)  # moved or touched, not changed
+        names = [variant_name(digest, w, fmt) for w in widths for fmt in fmts]
+        if reuse is not None and all((CACHE_DIR / name).exists() for name in names):
+            entry["placeholder"] = reuse["placeholder"]
+        elif widths:
+            todo.append((url, (path, digest, widths, fmts)))
+        images[url] = entry
+
+    if todo:
+        workers = min(len(todo), jobs or os.cpu_count() or 1)
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                placeholders = list(pool.map(encode, [job for _, job in todo]))
+        else:
+            placeholders = [encode(job) for _, job in todo]
+        for (url, _), placeholder in zip(todo, placeholders):
+            images[url]["placeholder"] = placeholder
+
+    # Drop cached variants no image uses any more
+    current = {variant_name(e["hash"], w, fmt) for e in images.values() for w in e["widths"] for fmt in e["formats"]}
+    for path in CACHE_DIR.iterdir():
+        if path.is_file() and path != INDEX_PATH and path.name not in current:
+            path.unlink()
+    tmp = INDEX_PATH.with_name(f"{INDEX_PATH.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps({"key": settings_key(), "images": images}, indent=1, sort_keys=True), encoding="utf-8")
+    os.replace(tmp, INDEX_PATH)
+    return len(images), len(todo)
+
+
+def picture_html(attrs, entry, sizes=DEFAULT_SIZES):
+    """<img> markup for attrs (an img's attributes, in order), wrapped in a
+    <picture> with a srcset per format when the image has variants."""
+    attrs = dict(attrs)
+    sizes = attrs.pop("sizes", sizes)
+    if entry:
+        attrs.setdefault("width", str(entry["width"]))
+        attrs.setdefault("height", str(entry["height"]))
+        style = attrs.get("style", "").strip()
+        if style and not style.endswith(";"):
+            style += ";"
+        if "height" not in style:
+            style += " height: auto;"
+        if entry["placeholder"]:
+            style += f" background: url({entry['placeholder']}) center / cover no-repeat;"
+        attrs["style"] = style.strip()
+    attrs.setdefault("loading", "lazy")
+    attrs.setdefault("decoding", "async")
+    img = "<img " + " ".join(f'{name}="{html.escape(value)}"' for name, value in attrs.items()) + " />"
+    if not entry or not entry["widths"]:
+        return img
+    sources = "".join(
+        f'<source type="image/{fmt}" srcset="'
+        + ", ".join(f"{VARIANTS_URL}{variant_name(entry['hash'], w, fmt)} {w}w" for w in entry["widths"])
+        + f'" sizes="{html.escape(sizes)}" />'
+        for fmt in entry["formats"])
+    return f"<picture>{sources}{img}</picture>"
+
+
+def img_html(url, alt, images, sizes=DEFAULT_SIZES, **attrs):
+    """Responsive markup for the image at url; attrs are extra img attributes
+    (class_ for class; loading="eager", fetchpriority="high" for a hero)."""
+    attrs = {"class" if name == "class_" else name: value for name, value in attrs.items()}
+    return picture_html({"src": site_cache.asset_url(url), "alt": alt, **attrs}, images.get(url), sizes)
+
+
+def rewrite_imgs(page_html, page_url, images):
+    """page_html with each plain <img> of a known image made responsive."""
+    def replace(m):
+        attrs = {name.lower(): html.unescape(value[1:-1]) for name, value in ATTR_RE.findall(m.group(0))}
+        if "srcset" in attrs or "src" not in attrs:
+            return m.group(0)
+        entry = images.get(urljoin(page_url, attrs["src"]))
+        # Small images that already have dimensions (logos, icons) are left alone
+        if not entry or not (entry["widths"] or "width" not in attrs):
+            return m.group(0)
+        return picture_html(attrs, entry)
+    return IMG_RE.sub(replace, page_html)
+
+
+def static_pages(src_dir):
+    """(page URL, path) for src/index.html and src/<dir>/index.html."""
+    pages = [("/", src_dir / "index.html")]
+    pages += [(f"/{p.parent.name}/", p) for p in sorted(src_dir.glob("*/index.html"))]
+    return [(url, path) for url, path in pages if path.exists()]
+
+
+@build_trace.traced()
+def publish(dist_dir, images=None):
+    """Link the variants into dist/images/v/, dropping ones no image uses."""
+    images = load_index() if images is None else images
+    out_dir = Path(dist_dir) / VARIANTS_URL.strip("/")
+    current = {variant_name(e["hash"], w, fmt) for e in images.values() for w in e["widths"] for fmt in e["formats"]}
+    if current:
+        out_dir.mkdir(parents=True, exist_ok=True)
+    for name in current:
+        target = out_dir / name
+        if not target.exists():
+            try:
+                os.link(CACHE_DIR / name, target)
+            except OSError:
+                shutil.copy2(CACHE_DIR / name, target)
+    if out_dir.exists():
+        for path in out_dir.iterdir():
+            if path.name not in current:
+                path.unlink()
+
@@ -0,0 +1,148 @@
+"""The site's link graph, built from dist/ in one pass.
+
+scan() reads and parses every HTML file under dist/ exactly once, in a
+process pool when jobs > 1. A real HTML parser collects each page's <a href>
+links and the fragment targets it defines (id="..." and <a name="...">).
+LinkGraph then resolves the links in a single pass against the set of pages
+and files. Programmatic pages, the blog, the hub shards and the static pages
+all go into one adjacency list. The whole check is linear in the number of
+pages plus links.
+
+A link is internal when it's relative or points at SITE_HOSTS. It resolves
+to a page if its path is a page's URL, or becomes one by adding the trailing
+slash that Cloudflare redirects to. Otherwise it resolves to a file in dist/.
+A link that resolves to neither is broken. A #fragment on a link to a page
+must name an id on that page.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from html.parser import HTMLParser
+from pathlib import Path
+from urllib.parse import unquote, urljoin, urlsplit
+
+SITE_ORIGIN = "https://biterightgluten.com"
+SITE_HOSTS = {"biterightgluten.com", "www.biterightgluten.com"}
+# Pages nothing needs to link to
+ENTRY_PAGES = {"/", "/404.html"}
+
+
+class LinkExtractor(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.hrefs = []
+        self.ids = set()
+
+    def handle_starttag(self, tag, attrs):
+        for name, value in attrs:
+            if name == "id" and value:
+                self.ids.add(value)
+        if tag == "a":
+            for name, value in attrs:
+                if name == "href" and value:
+                    self.hrefs.append(value.strip())
+                elif name == "name" and value:
+                    self.ids.add(value)
+
+
+def page_url(rel):
+    """dist-relative path -> URL: x/index.html -> /x/, 404.html -> /404.html"""
+    rel = rel.replace(os.sep, "/")
+    if rel == "index.html":
+        return "/"
+    if rel.endswith("/index.html"):
+        return "/" + rel[:-len("index.html")]
+    return "/" + rel
+
+
+def parse_page(path):
+    """(hrefs, ids) of one HTML file."""
+    parser = LinkExtractor()
+    parser.feed(Path(path).read_text(encoding="utf-8", errors="replace"))
+    parser.close()
+    return parser.hrefs, parser.ids
+
+
+def dist_files(dist_dir):
+    """Every file under dist_dir, as dist-relative paths with / separators."""
+    files = []
+    for dirpath, _, names in os.walk(dist_dir):
+        rel_dir = os.path.relpath(dirpath, dist_dir)
+        prefix = "" if rel_dir == "." else rel_dir.replace(os.sep, "/") + "/"
+        files.extend(prefix + name for name in names)
+    return files
+
+
+def scan(dist_dir, jobs=1):
+    """The LinkGraph of every HTML page under dist_dir."""
+    dist_dir = Path(dist_dir)
+    files = dist_files(dist_dir)
+    pages = sorted(rel for rel in files if rel.endswith(".html"))
+    paths = [dist_dir / rel for rel in pages]
+    if jobs > 1 and len(paths) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            parsed = list(pool.map(parse_page, paths, chunksize=max(1, min(64, len(paths) // (jobs * 4)))))
+    else:
+        parsed = [parse_page(path) for path in paths]
+    return LinkGraph({page_url(rel): links for rel, links in zip(pages, parsed)}, {"/" + rel for rel in files})
+
+
+class LinkGraph:
+    """Resolved links between a site's pages.
+
+    - links: page URL -> set of page URLs it links to (not counting itself)
+    - ids: page URL -> fragment targets on the page
+    - broken: (page URL, href) for links to nothing in dist/
+    - broken_anchors: (page URL, href) for #fragments their page doesn't define
+    """
+
+    def __init__(self, parsed, files):
+        self.ids = {url: ids for url, (_, ids) in parsed.items()}
+        self.links = {url: set() for url in parsed}
+        self.broken = []
+        self.broken_anchors = []
+        for url, (hrefs, _) in parsed.items():
+            for href in hrefs:
+                resolved = self.resolve(url, href)
+                if resolved is None:
+                    continue
+                path, fragment = resolved
+                target = self.page_for(path)
+                if target is None:
+                    if unquote(path) not in files:
+                        self.broken.append((url, href))
+                    continue
+                if fragment and unquote(fragment) not in self.ids[target]:
+                    self.broken_anchors.append((url, href))
+                if target != url:
+                    self.links[url].add(target)
+
+    @staticmethod
+    def resolve(page, href):
+        """(path, fragment) for an internal link, or None for external and non-HTTP ones."""
+        parts = urlsplit(urljoin(SITE_ORIGIN + page, href))
+        if parts.scheme not in ("http", "https") or parts.hostname not in SITE_HOSTS:
+            return None
+        return parts.path or "/", parts.fragment
+
+    def page_for(self, path):
+        path = unquote(path)
+        for candidate in (path, path + "/", path[:-len("index.html")] if path.endswith("/index.html") else None):
+            if candidate in self.links:
+                return candidate
+        return None
+
+    def incoming(self):
+        """page URL -> number of other pages linking to it."""
+        counts = dict.fromkeys(self.links, 0)
+        for targets in self.links.values():
+            for target in targets:
+                counts[target] += 1
+        return counts
+
+    def orphans(self, incoming=None):
+        """Pages no other page links to, apart from ENTRY_PAGES."""
+        incoming = self.incoming() if incoming is None else incoming
+        return sorted(url for url, count in incoming.items() if count == 0 and url not in ENTRY_PAGES)
+
+    def edge_count(self):
+        return sum(len(targets) for targets in self.links.values())
@@ -0,0 +1,104 @@
+"""Static search index for the knowledge hub.
+
+generate-knowledge-hub.py builds it from the same corpus pass as the hub
+shards, with one document per guide in hub (title) order. The browser side
+is search.js in site_assets.py; it fetches only the shards a query needs:
+
+  <version>/t/<prefix>.json   terms starting with prefix (PREFIX_LENGTH chars):
+                              {term: [title ids, ingredient ids]}, each list
+                              sorted and delta-encoded
+  <version>/d/<n>.json        [[slug, title], ...] for documents
+                              n * DOCS_PER_SHARD onwards
+
+Title ids are guides with the term in their title or topic_key. Ingredient ids
+are guides where it only appears in ingredients.risk/safe. The version
+directory is a hash of the whole index, so a cached shard never gets mixed
+with a newer one. Older versions are deleted when a new one is written.
+"""
+import hashlib
+import json
+import re
+import shutil
+import unicodedata
+from pathlib import Path
+
+import build_trace
+
+PREFIX_LENGTH = 2
+DOCS_PER_SHARD = 256
+# Words in nearly every title; search.js drops them from queries too
+STOPWORDS = frozenset("a an and are for free gluten in is it of on or the to with".split())
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text):
+    """Lower-cased, accent-folded search terms (mirrors tokens() in search.js)."""
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return [t for t in TOKEN_RE.findall(text) if len(t) >= PREFIX_LENGTH and t not in STOPWORDS]
+
+
+def page_terms(title, data):
+    """(title/topic terms, ingredient-only terms) for one page, as space-joined strings."""
+    primary = tokenize(f"{title} {data.get('topic_key', '').replace('-', ' ')}")
+    ingredients = data.get('ingredients') if isinstance(data.get('ingredients'), dict) else {}
+    names = [item for key in ('risk', 'safe') if isinstance(ingredients.get(key), list)
+             for item in ingredients[key] if isinstance(item, str)]
+    primary = list(dict.fromkeys(primary))
+    extra = [t for t in dict.fromkeys(tokenize(" ".join(names))) if t not in primary]
+    return " ".join(primary), " ".join(extra)
+
+
+def _delta(ids):
+    out, previous = [], 0
+    for i in ids:
+        out.append(i - previous)
+        previous = i
+    return out
+
+
+def _dump(path, value):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(value, separators=(",", ":"), ensure_ascii=False), encoding="utf-8")
+
+
+@build_trace.traced()
+def write_index(out_dir, docs):
+    """Write the index for docs, [(slug, title, (primary terms, ingredient terms))].
+
+    Returns the version directory's name.
+    """
+    out_dir = Path(out_dir)
+    postings = {}
+    for doc_id, (_, _, (primary, ingredients)) in enumerate(docs):
+        for field, terms in enumerate((primary, ingredients)):
+            for term in terms.split():
+                postings.setdefault(term, ([], []))[field].append(doc_id)
+
+    shards = {}
+    for term in sorted(postings):
+        title_ids, ingredient_ids = postings[term]
+        shards.setdefault(term[:PREFIX_LENGTH], {})[term] = [_delta(title_ids), _delta(ingredient_ids)]
+    del postings
+    doc_shards = [[[slug, title] for slug, title, _ in docs[start:start + DOCS_PER_SHARD]]
+                  for start in range(0, len(docs), DOCS_PER_SHARD)]
+
+    digest = hashlib.sha256()
+    for value in (shards, doc_shards, PREFIX_LENGTH, DOCS_PER_SHARD):
+        digest.update(json.dumps(value, sort_keys=True).encode("utf-8"))
+    version = digest.hexdigest()[:12]
+
+    target = out_dir / version
+    if not target.exists():
+        staging = out_dir / f".{version}.tmp"
+        shutil.rmtree(staging, ignore_errors=True)
+        for prefix, terms in shards.items():
+            _dump(staging / "t" / f"{prefix}.json", terms)
+        for n, shard in enumerate(doc_shards):
+            _dump(staging / "d" / f"{n}.json", shard)
+        staging.mkdir(parents=True, exist_ok=True)
+        staging.rename(target)
+    for old in out_dir.iterdir():
+        if old.name != version:
+            shutil.rmtree(old) if old.is_dir() else old.unlink()
+    return version
@@ -0,0 +1,258 @@
+"""sitemap.xml generation (Python replacement for scripts/generate-sitemap.mjs).
+
+Takes the (loc, lastmod) page entries from a site_corpus.Corpus, so the
+single-process build doesn't walk content/pages again. The static hub pages
+under src/ and the blog posts are discovered the same way the Node script
+does. lastmod only moves when content does:
+
+  programmatic pages   meta.updated_at
+  blog posts           frontmatter updated, else date
+  everything else      see below
+
+File mtimes and "today" change on every fresh checkout, so they aren't used
+directly. For the home and src/ pages, and for pages and posts without a
+date, .cache/sitemap-dates.json records each URL's content hash and lastmod.
+The lastmod is kept until the hash changes. A URL that is new or changed
+gets its file's last commit date if git has the file unmodified, and today
+otherwise (an edit that isn't committed yet).
+
+Up to SHARD_FILL * MAX_URLS URLs go into a single sitemap.xml. Bigger sites get
+a sitemap index at sitemap.xml pointing at gzipped sitemap-<n>.xml.gz shards.
+URLs are assigned to shards by a hash of their loc, so adding a page only
+touches its own shard. A manifest of entry hashes (.cache/sitemap-manifest.json)
+lets unchanged shards skip rendering and compression, and they are never
+rewritten.
+"""
+import gzip
+import hashlib
+import json
+import re
+import subprocess
+import zlib
+from datetime import datetime, timezone
+from pathlib import Path
+
+import build_trace
+
+ROOT = Path(__file__).resolve().parent.parent
+SITE_ORIGIN = "https://biterightgluten.com"
+EXCLUDED_SRC_DIRS = {"img"}
+
+# sitemaps.org limits per sitemap file (uncompressed)
+MAX_URLS = 50_000
+MAX_BYTES = 50 * 1024 * 1024
+# Shards are sized for this fraction of MAX_URLS, so hash buckets have
+# headroom and the shard count only changes when the site doubles
+SHARD_FILL = 0.8
+SHARD_RE = re.compile(r"^sitemap-\d+\.xml\.gz$")
+# Build state lives outside dist/, which is deployed as-is
+MANIFEST_PATH = ROOT / ".cache" / "sitemap-manifest.json"
+DATES_PATH = ROOT / ".cache" / "sitemap-dates.json"
+BLOG_DATE_RE = re.compile(r'^(updated|date):\s*"?(\d{4}-\d{2}-\d{2})"?\s*$', re.M)
+
+
+def today():
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d")
+
+
+def esc_xml(s=""):
+    return (s.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+            .replace('"', "&quot;").replace("'", "&apos;"))
+
+
+def commit_dates(directory):
+    """Absolute path -> date of the last commit that touched it, for the files
+    under directory that git has unmodified. Empty outside a git checkout."""
+    def git(*args):
+        return subprocess.run(["git", *args], cwd=directory, capture_output=True, text=True, check=True).stdout
+    try:
+        top = Path(git("rev-parse", "--show-toplevel").strip())
+        log = git("log", "--format=%x00%cs", "--name-only", "--no-renames", "--", ".")
+        dirty = git("status", "--porcelain", "--untracked-files=all", "--no-renames", "--", ".")
+    except (OSError, subprocess.CalledProcessError):
+        return {}
+    dates = {}
+    date = None
+    for line in log.splitlines():
+        if line.startswith("\0"):
+            date = line[1:]
+        elif line:
+            # Newest commit first, so the first date seen for a file wins
+            dates.setdefault(top / line, date)
+    for line in dirty.splitlines():
+        dates.pop(top / line[3:], None)
+    return dates
+
+
+class StableDates:
+    """lastmod for URLs whose content carries no date (see the module docstring)."""
+
+    def __init__(self, path=DATES_PATH):
+        self.path = path
+        try:
+            self.previous = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            self.previous = {}
+        self.current = {}
+        self.commits = {}
+        self.scanned = set()
+
+    def date(self, loc, file, digest=None):
+        """The lastmod for loc, whose content is file (hashed unless digest is given)."""
+        if digest is None:
+            try:
+                digest = hashlib.sha256(file.read_bytes()).hexdigest()
+            except OSError:
+                digest = ""
+        previous = self.previous.get(loc)
+        if previous and previous[0] == digest:
+            date = previous[1]
+        else:
+            # One git log per directory tree, and only once something needs it
+            directory = file.parent
+            if not any(d == directory or d in directory.parents for d in self.scanned):
+                self.scanned.add(directory)
+                self.commits.update(commit_dates(directory))
+            date = self.commits.get(file.resolve()) or today()
+        self.current[loc] = [digest, date]
+        return date
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(json.dumps(self.current, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+
+
+def blog_lastmod(path):
+    """A post's frontmatter updated (or date) value, or None."""
+    text = path.read_text(encoding="utf-8")
+    end = text.find("\n---\n", 4) if text.startswith("---\n") else -1
+    dates = dict(m.groups() for m in BLOG_DATE_RE.finditer(text[4:end])) if end != -1 else {}
+    return dates.get("updated") or dates.get("date")
+
+
+def sitemap_urls(page_entries, pages, src_dir, blog_dir):
+    """[(loc, lastmod)]: home, static hub pages, programmatic pages, blog posts.
+
+    pages are the PageRecords page_entries came from, in the same order.
+    Updates .cache/sitemap-dates.json.
+    """
+    dates = StableDates()
+    home = src_dir / "index.html"
+    urls = [(f"{SITE_ORIGIN}/", dates.date(f"{SITE_ORIGIN}/", home))]
+    for name in sorted(p.name for p in src_dir.iterdir()):
+        full = src_dir / name
+        if name not in EXCLUDED_SRC_DIRS and full.is_dir() and (full / "index.html").exists():
+            loc = f"{SITE_ORIGIN}/{name}/"
+            urls.append((loc, dates.date(loc, full / "index.html")))
+    urls.extend((loc, lastmod or dates.date(loc, page.path, page.source_hash))
+                for (loc, lastmod), page in zip(page_entries, pages))
+    if blog_dir.exists():
+        for name in sorted(p.name for p in blog_dir.iterdir() if p.name.endswith(".md")):
+            slug = re.sub(r"\.md$", "", re.sub(r"^\d{4}-\d{2}-\d{2}-", "", name))
+            if slug:
+                loc = f"{SITE_ORIGIN}/blog/{slug}/"
+                urls.append((loc, blog_lastmod(blog_dir / name) or dates.date(loc, blog_dir / name)))
+    dates.save()
+    return urls
+
+
+def url_entry(loc, lastmod):
+    return f"  <url>\n    <loc>{esc_xml(loc)}</loc>\n    <lastmod>{esc_xml(lastmod)}</lastmod>\n  </url>"
+
+
+URLSET_HEAD = ('<?xml version="1.0" encoding="UTF-8"?>\n'
+               '<urlset xmlns="https://www.sitemaps.org/schemas/sitemap/0.9">\n')
+URLSET_TAIL = "\n</urlset>\n"
+
+
+def render_sitemap(urls):
+    return URLSET_HEAD + "\n".join(url_entry(loc, lastmod) for loc, lastmod in urls) + URLSET_TAIL
+
+
+def render_index(shards):
+    """A sitemap index for [(file name, lastmod)]."""
+    body = "\n".join(
+        f"  <sitemap>\n    <loc>{esc_xml(f'{SITE_ORIGIN}/{name}')}</loc>\n    <lastmod>{esc_xml(lastmod)}</lastmod>\n"
+        f"  </sitemap>"
+        for name, lastmod in shards
+    )
+    return ('<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<sitemapindex xmlns="https://www.sitemaps.org/schemas/sitemap/0.9">\n'
+            f"{body}\n</sitemapindex>\n")
+
+
+def shard_urls(urls, max_urls=MAX_URLS, max_bytes=MAX_BYTES):
+    """Split urls into buckets by crc32(loc), each within the per-file limits.
+
+    Returns [[(loc, lastmod, entry XML)]], keeping the input order in each
+    bucket. The bucket count is a power of two, so it only changes when the
+    site doubles in size (or a bucket overflows).
+    """
+    entries = [(loc, lastmod, url_entry(loc, lastmod)) for loc, lastmod in urls]
+    count = 1
+    while count * max_urls * SHARD_FILL < len(entries):
+        count *= 2
+    overhead = len(URLSET_HEAD) + len(URLSET_TAIL)
+    while True:
+        buckets = [[] for _ in range(count)]
+        for entry in entries:
+            buckets[zlib.crc32(entry[0].encode("utf-8")) % count].append(entry)
+        if all(len(bucket) <= max_urls
+               and overhead + sum(len(e[2].encode("utf-8")) + 1 for e in bucket) <= max_bytes
+               for bucket in buckets):
+            return [bucket for bucket in buckets if bucket] or [[]]
+        count *= 2
+
+
+def _write_if_changed(path, data):
+    try:
+        if path.read_bytes() == data:
+            return False
+    except OSError:
+        pass
+    path.write_bytes(data)
+    return True
+
+
+@build_trace.traced()
+def write_sitemap(out_path, urls, max_urls=MAX_URLS, max_bytes=MAX_BYTES):
+    """Write sitemap.xml (or an index plus gzipped shards) for urls.
+
+    Returns (sitemap files, files rewritten); an unsharded sitemap counts as one.
+    """
+    out_path = Path(out_path)
+    out_dir = out_path.parent
+    out_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = MANIFEST_PATH
+    try:
+        manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        manifest = {}
+
+    buckets = shard_urls(urls, max_urls, max_bytes)
+    written, new_manifest, shards = 0, {}, []
+    if len(buckets) == 1:
+        written += _write_if_changed(out_path, render_sitemap(urls).encode("utf-8"))
+    else:
+        for n, bucket in enumerate(buckets, 1):
+            name = f"sitemap-{n}.xml.gz"
+            body = "\n".join(entry for _, _, entry in bucket)
+            digest = hashlib.sha256(body.encode("utf-8")).hexdigest()
+            new_manifest[name] = digest
+            shards.append((name, max(lastmod for _, lastmod, _ in bucket)))
+            if manifest.get(name) == digest and (out_dir / name).exists():
+                continue
+            # mtime=0 keeps the gzip bytes a function of the content alone
+            (out_dir / name).write_bytes(gzip.compress((URLSET_HEAD + body + URLSET_TAIL).encode("utf-8"), mtime=0))
+            written += 1
+        written += _write_if_changed(out_path, render_index(shards).encode("utf-8"))
+
+    for path in out_dir.iterdir():
+        if SHARD_RE.match(path.name) and path.name not in new_manifest:
+            path.unlink()
+    if new_manifest:
+        manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        manifest_path.write_text(json.dumps(new_manifest, indent=2), encoding="utf-8")
+    elif manifest_path.exists():
+        manifest_path.unlink()
+    return max(1, len(shards)), written
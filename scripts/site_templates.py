@@ -0,0 +1,142 @@
+"""Compiled HTML templates plus the markup every generator shares.
+
+A template is compiled once per build: its text is split into static chunks
+and {{ field }} slots. Slots named after a shared fragment (head analytics,
+nav, footer, scripts, ...) are filled in at compile time, so rendering a page
+only escapes its own fields and joins them with the precomputed chunks.
+
+Syntax: {{ name }} is HTML-escaped, {{ name|safe }} is inserted as-is.
+"""
+import html
+import re
+
+import site_assets
+import site_cache
+import site_icons
+
+SLOT_RE = re.compile(r"\{\{\s*(\w+)(\|safe)?\s*\}\}")
+
+
+class Template:
+    """A template compiled into alternating static chunks and field slots."""
+
+    __slots__ = ("chunks", "slots")
+
+    def __init__(self, source, fragments=None):
+        fragments = FRAGMENTS if fragments is None else fragments
+        chunks = [""]
+        slots = []
+        pos = 0
+        for m in SLOT_RE.finditer(source):
+            chunks[-1] += source[pos:m.start()]
+            name, safe = m.group(1), bool(m.group(2))
+            if name in fragments:
+                value = fragments[name]
+                chunks[-1] += value if safe else html.escape(value)
+            else:
+                slots.append((name, safe))
+                chunks.append("")
+            pos = m.end()
+        chunks[-1] += source[pos:]
+        self.chunks = tuple(chunks)
+        self.slots = tuple(slots)
+
+    def render(self, **fields):
+        """Fill the slots from fields; a missing field raises KeyError."""
+        chunks = self.chunks
+        out = [chunks[0]]
+        for i, (name, safe) in enumerate(self.slots, 1):
+            value = fields[name]
+            out.append(value if safe else html.escape(value))
+            out.append(chunks[i])
+        return "".join(out)
+
+
+ANALYTICS_HEAD = """\
+  <!-- Google tag (gtag.js) -->
+  <script async src="https://www.googletagmanager.com/gtag/js?id=G-NFPKT4GJ0P"></script>
+  <script>
+    window.dataLayer = window.dataLayer || [];
+    function gtag(){dataLayer.push(arguments);}
+    gtag('js', new Date());
+
+    gtag('config', 'G-NFPKT4GJ0P');
+  </script>
+  <!-- Google Tag Manager -->
+  <script>(function(w,d,s,l,i){w[l]=w[l]||[];w[l].push({'gtm.start':
+  new Date().getTime(),event:'gtm.js'});var f=d.getElementsByTagName(s)[0],
+  j=d.createElement(s),dl=l!='dataLayer'?'&l='+l:'';j.async=true;j.src=
+  'https://www.googletagmanager.com/gtm.js?id='+i+dl;f.parentNode.insertBefore(j,f);
+  })(window,document,'script','dataLayer','GTM-NM5CZKKT');</script>
+  <!-- End Google Tag Manager -->"""
+
+GTM_NOSCRIPT = """\
+  <!-- Google Tag Manager (noscript) -->
+  <noscript><iframe src="https://www.googletagmanager.com/ns.html?id=GTM-NM5CZKKT"
+  height="0" width="0" style="display:none;visibility:hidden"></iframe></noscript>
+  <!-- End Google Tag Manager (noscript) -->"""
+
+HEAD_ASSETS = """\
+  <link rel="preconnect" href="https://fonts.googleapis.com">
+  <link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>
+  <link href="https://fonts.googleapis.com/css2?family=Nunito:wght@400;600;700;800&display=swap" rel="stylesheet">"""
+
+NAV_LINKS = """\
+          <a href="/#features">Features</a>
+          <a href="/#how-it-works">How it works</a>
+          <a href="/knowledge-hub/">Knowledge Hub</a>
+          <a href="/blog/">Blog</a>
+          <a href="/gluten-free-diet/">Gluten&#8209;free diet</a>
+          <a href="/newly-diagnosed/">Newly diagnosed?</a>
+          <a href="/#faq">FAQ</a>"""
+
+NAV = f"""\
+    <nav>
+      <a href="/" class="logo" aria-label="BiteRight home">
+        <img class="logo-mark" src="{site_cache.asset_url("/img/biteright-icon.png")}" alt="" width="32" height="32" />
+        BiteRight
+      </a>
+      <div class="nav-wrapper">
+        <div class="nav-links">
+{NAV_LINKS}
+        </div>
+        <button class="nav-kebab" type="button" aria-label="Open menu" aria-expanded="false" aria-haspopup="true">
+          {site_icons.icon("more-vertical")}
+        </button>
+        <div class="nav-menu-mobile" id="nav-menu-mobile">
+{NAV_LINKS}
+        </div>
+      </div>
+    </nav>"""
+
+FOOTER = f"""\
+    <footer>
+      <div class="footer-content">
+        <div>
+          <strong>BiteRight</strong> • Eat safely. <span style="opacity: 0.7; font-size: 13px; margin-left: 8px;">Try free for 3 days. Cancel anytime.</span>
+        </div>
+        <div style="text-align: center;">
+          Made with aroha in Aotearoa ❤️
+        </div>
+        <div>
+          © <span id="y"></span> BiteRight Inc.
+          <a href="/#privacy" style="margin-left:20px; color:inherit; text-decoration:none;">Privacy</a>
+          <a href="/#support" style="margin-left:20px; color:inherit; text-decoration:none;">Support</a>
+          <a href="https://www.instagram.com/biterightgluten" target="_blank" rel="noopener noreferrer" style="margin-left:20px; color:inherit; text-decoration:none;" aria-label="Instagram" title="Instagram">{site_icons.icon("instagram", style="width:20px;height:20px;vertical-align:middle;")}</a>
+          <a href="https://www.tiktok.com/@biterightgluten" target="_blank" rel="noopener noreferrer" style="margin-left:20px; color:inherit; text-decoration:none;" aria-label="TikTok" title="TikTok"><svg viewBox="0 0 24 24" width="20" height="20" fill="currentColor" style="vertical-align: middle;"><path d="M19.59 6.69a4.83 4.83 0 0 1-3.77-4.25V2h-3.45v13.67a2.89 2.89 0 0 1-5.2 1.74 2.89 2.89 0 0 1 2.31-4.64 2.93 2.93 0 0 1 .88.13V9.4a6.84 6.84 0 0 0-1-.05A6.33 6.33 0 0 0 5 20.1a6.34 6.34 0 0 0 10.86-4.43v-7a8.16 8.16 0 0 0 4.77 1.52v-3.4a4.85 4.85 0 0 1-1-.1z"/></svg></a>
+        </div>
+      </div>
+    </footer>"""
+
+FRAGMENTS = {
+    "analytics_head": ANALYTICS_HEAD,
+    "gtm_noscript": GTM_NOSCRIPT,
+    "head_assets": HEAD_ASSETS,
+    "nav": NAV,
+    "footer": FOOTER,
+    "site_js": f'  <script src="{site_assets.asset_url("site.js")}"></script>',
+    "hub_search_js": f'  <script src="{site_assets.asset_url("search.js")}"></script>',
+    "page_css_url": site_assets.asset_url("page.css"),
+    "hub_css_url": site_assets.asset_url("hub.css"),
+    "blog_css_url": site_assets.asset_url("blog.css"),
+}
@@ -5,6 +5,8 @@ const root = process.cwd();
 const pagesDir = path.join(root, "content", "pages");
 
 const REQUIRED_TOP = ["schema_version", "topic_key", "slug", "title", "verdict", "disclaimer"];
+// Optional "category" override; keep in sync with CATEGORIES in scripts/site_categories.py
+const CATEGORIES = ["sauces", "noodles", "breakfast", "meals", "bread_baked", "asian", "condiments", "other"];
 
 function die(msg) {
   console.error(msg);
@@ -38,6 +40,10 @@ for (const file of files) {
 
   // Optional guardrail
   if (!json.disclaimer || json.disclaimer.length < 10) die(`Disclaimer too short in ${file}`);
+
+  if (json.category !== undefined && !CATEGORIES.includes(json.category)) {
+    die(`Unknown category '${json.category}' in ${file} (expected one of: ${CATEGORIES.join(", ")})`);
+  }
 }
 
 console.log(`Validated ${files.length} programmatic pages.`);
@@ -1,61 +1,110 @@
 #!/usr/bin/env python3
-"""Verify internal linking structure across programmatic SEO pages."""
-import json
+"""Verify internal linking across the built site in dist/.
+
+Parses every HTML page in dist/ once (scripts/site_links.py) and reports the
+programmatic pages' incoming links, the whole site's in/out-degree
+distribution, orphan pages, and broken links and #anchors. Exits with status 1
+if anything is broken (unless --no-fail).
+"""
+import argparse
+import os
+import sys
 from pathlib import Path
-from collections import defaultdict
+from collections import Counter, defaultdict
+
+import site_corpus
+import site_links
 
 ROOT = Path(__file__).resolve().parent.parent
 PAGES_DIR = ROOT / "content" / "pages"
 DIST_DIR = ROOT / "dist"
+HUB_PREFIX = "/knowledge-hub/"
+SHOW = 10
 
-def count_links_to_page(slug, all_pages):
-    """Count how many other pages link to this page."""
-    link_count = 0
-    
-    # Check if page has an HTML file
-    page_html = DIST_DIR / slug / "index.html"
-    if not page_html.exists():
-        return 0
-    
-    # Count links from other pages
-    for other_page in all_pages:
-        if other_page['slug'] == slug:
-            continue
-        
-        other_html = DIST_DIR / other_page['slug'] / "index.html"
-        if not other_html.exists():
-            continue
-        
-        content = other_html.read_text(encoding="utf-8")
-        if f'href="/{slug}/"' in content:
-            link_count += 1
-    
-    return link_count
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--jobs", "-j", type=int, default=0, metavar="N",
+                        help="worker processes for parsing (0 = one per CPU core)")
+    parser.add_argument("--no-fail", action="store_true",
+                        help="exit 0 even if links or anchors are broken")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    if not DIST_DIR.exists():
+        print("No dist/ directory; run the build first.")
+        return 1
 
-def main():
-    # Load all pages
-    all_pages = []
-    for f in sorted(PAGES_DIR.glob("*.json")):
-        if "test" in f.stem:
+    corpus = site_corpus.load_corpus(PAGES_DIR, excluded=set())
+    all_pages = [page for page in corpus.pages if "test" not in page.path.stem]
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    graph = site_links.scan(DIST_DIR, jobs)
+
+    # Incoming links from other programmatic pages, and from the hub's shards
+    page_urls = {f"/{page['slug']}/" for page in all_pages}
+    incoming = {url: 0 for url in page_urls}
+    from_hub = set()
+    for source, targets in graph.links.items():
+        for target in targets & page_urls:
+            if source in page_urls:
+                incoming[target] += 1
+            elif source.startswith(HUB_PREFIX):
+                from_hub.add(target)
+    kb_links = len(from_hub) if HUB_PREFIX in graph.links else None
+
+    print_report(all_pages, {page['slug']: incoming[f"/{page['slug']}/"] for page in all_pages}, kb_links)
+    print()
+    status = print_graph_report(graph)
+    return 0 if args.no_fail else status
+
+def print_graph_report(graph):
+    """Print the whole-site graph: degrees, orphans, broken links and anchors.
+
+    Returns the exit status (1 if any link or anchor is broken).
+    """
+    incoming = graph.incoming()
+    print("Site Link Graph")
+    print("=" * 60)
+    print(f"  Pages: {len(graph.links)}   Internal links: {graph.edge_count()}")
+    print()
+    for label, degrees in (("In-degree", incoming.values()), ("Out-degree", map(len, graph.links.values()))):
+        degrees = sorted(degrees)
+        if degrees:
+            median, p90 = (degrees[min(len(degrees) - 1, int(q * len(degrees)))] for q in (0.5, 0.9))
+            print(f"  {label}: min {degrees[0]}, median {median}, p90 {p90}, max {degrees[-1]}")
+    print()
+
+    orphans = graph.orphans(incoming)
+    broken_by_target = Counter(href for _, href in graph.broken)
+    for title, items in (("Orphan pages (no incoming links)", orphans),
+                         ("Broken internal links", [f"{page} -> {href}" for page, href in graph.broken]),
+                         ("Broken #anchors", [f"{page} -> {href}" for page, href in graph.broken_anchors])):
+        if not items:
+            print(f"✓ {title}: none")
             continue
-        data = json.loads(f.read_text(encoding="utf-8"))
-        all_pages.append({
-            'slug': data.get('slug', f.stem),
-            'title': data.get('heading', data.get('title', ''))
-        })
-    
+        print(f"⚠ {title} ({len(items)}):")
+        for item in items[:SHOW]:
+            print(f"  - {item}")
+        if len(items) > SHOW:
+            print(f"  ... and {len(items) - SHOW} more")
+    if len(broken_by_target) > 1:
+        print("  Most common broken targets: " + ", ".join(f"{href} ({n})" for href, n in broken_by_target.most_common(3)))
+    return 1 if graph.broken or graph.broken_anchors else 0
+
+def print_report(all_pages, incoming, kb_links):
+    """Print the linking analysis.
+
+    incoming maps each slug to the number of other programmatic pages linking
+    to it; kb_links is how many pages the knowledge hub links to (None if the
+    hub is missing).
+    """
+    kb_exists = kb_links is not None
     print("Internal Linking Analysis")
     print("=" * 60)
     print()
-    
-    # Check knowledge hub
-    kb_path = ROOT / "src" / "knowledge-hub" / "index.html"
-    kb_exists = kb_path.exists()
-    
+
     print(f"Knowledge Hub: {'✓ Generated' if kb_exists else '✗ Missing'}")
     if kb_exists:
-        kb_content = kb_path.read_text(encoding="utf-8")
-        kb_links = sum(1 for page in all_pages if f'href="/{page["slug"]}/"' in kb_content)
         print(f"  Links to programmatic pages: {kb_links}/{len(all_pages)}")
     print()
     
@@ -64,7 +113,7 @@ def main():
     pages_with_insufficient_links = []
     
     for page in all_pages:
-        incoming_links = count_links_to_page(page['slug'], all_pages)
+        incoming_links = incoming[page['slug']]
         # +1 for knowledge hub link
         total_links = incoming_links + (1 if kb_exists else 0)
         link_distribution[total_links] += 1
@@ -115,4 +164,4 @@ def main():
         print("    Add more related content sections to improve indexation")
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())